@@ -0,0 +1,58 @@
+import hashlib
+
+
+class AutosaveBuffer:
+    # Write-behind buffer for the page that is open in the editor.
+    # Keystrokes only mark the buffer dirty; the text is read and written
+    # once per flush, and identical content is never written twice.
+    IDLE_INTERVAL_MS = 1500
+    MAX_PENDING_EDITS = 400
+    MAX_PENDING_CHARS = 16 * 1024
+
+    def __init__(self, save_callback, idle_interval_ms=None, max_pending_edits=None, max_pending_chars=None):
+        self.save_callback = save_callback
+        self.idle_interval_ms = idle_interval_ms or self.IDLE_INTERVAL_MS
+        self.max_pending_edits = max_pending_edits or self.MAX_PENDING_EDITS
+        self.max_pending_chars = max_pending_chars or self.MAX_PENDING_CHARS
+        self.page_id = None
+        self.saved_digest = None
+        self.pending_edits = 0
+        self.pending_chars = 0
+
+    @staticmethod
+    def digest(text):
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    @property
+    def dirty(self):
+        return self.pending_edits > 0
+
+    def begin(self, page_id, text):
+        # Called after a page has been loaded into the editor
+        self.page_id = page_id
+        self.saved_digest = self.digest(text or "")
+        self.pending_edits = 0
+        self.pending_chars = 0
+
+    def note_edit(self, size_hint=1):
+        # Returns True when the pending edits are large enough to flush right away
+        if self.page_id is None:
+            return False
+        self.pending_edits += 1
+        self.pending_chars += max(size_hint, 1)
+        return (self.pending_edits >= self.max_pending_edits
+                or self.pending_chars >= self.max_pending_chars)
+
+    def flush(self, get_text):
+        # get_text is only called when there is something to save
+        if self.page_id is None or not self.dirty:
+            return False
+        text = get_text()
+        digest = self.digest(text)
+        self.pending_edits = 0
+        self.pending_chars = 0
+        if digest == self.saved_digest:
+            return False
+        self.save_callback(self.page_id, text)
+        self.saved_digest = digest
+        return True
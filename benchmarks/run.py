@@ -0,0 +1,214 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from autosave import AutosaveBuffer
+from sticky_notes import StickyBoard
+from twelveb.core import DatabaseManager, PageStore, StickyNoteStore
+
+from benchmarks.workspace import WORDS, add_config_arguments, build_workspace, config_from_args
+
+# Times the data paths behind the editor's hot UI actions against a
+# synthetic workspace. Nothing here imports wx, so it runs on a headless box.
+#
+#   python -m benchmarks.run --output bench.json
+#   python -m benchmarks.run --compare old.json
+
+VIEWPORT = (0, 0, 1200, 800)
+DRAGGED_NOTES = 50
+DRAG_FRAMES = 30
+
+
+def percentile(samples, fraction):
+    # Nearest rank on sorted samples
+    index = max(0, min(len(samples) - 1, int(round(fraction * len(samples))) - 1))
+    return samples[index]
+
+
+def summarize(samples_ns):
+    samples = sorted(ns / 1e6 for ns in samples_ns)
+    return {
+        "runs": len(samples),
+        "mean_ms": round(sum(samples) / len(samples), 4),
+        "p50_ms": round(percentile(samples, 0.50), 4),
+        "p95_ms": round(percentile(samples, 0.95), 4),
+        "p99_ms": round(percentile(samples, 0.99), 4),
+        "max_ms": round(samples[-1], 4),
+    }
+
+
+def measure(case, iterations, warmup=3):
+    # case() returns a callable for one run, so setup stays out of the timing
+    for _ in range(warmup):
+        case()()
+    samples = []
+    for _ in range(iterations):
+        run = case()
+        start = time.perf_counter_ns()
+        run()
+        samples.append(time.perf_counter_ns() - start)
+    result = summarize(samples)
+    # Separate pass: tracing allocations would distort the timings above
+    run = case()
+    tracemalloc.start()
+    run()
+    result["peak_kb"] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+    tracemalloc.stop()
+    return result
+
+
+class Suite:
+    def __init__(self, db, user_id, seed):
+        self.db = db
+        self.user_id = user_id
+        self.rng = random.Random(seed)
+        with db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id FROM pages WHERE user_id=? ORDER BY id", (user_id,))
+            self.page_ids = [row[0] for row in cursor.fetchall()]
+            cursor.execute("SELECT DISTINCT parent_id FROM pages WHERE user_id=? AND parent_id IS NOT NULL",
+                           (user_id,))
+            self.parent_ids = [row[0] for row in cursor.fetchall()] or [None]
+        self.pages = PageStore(db)
+        self.sticky_notes = StickyNoteStore(db)
+
+    def load_pages(self):
+        user_id = self.user_id
+        return lambda: self.pages.children(user_id, None)
+
+    def expand_page(self):
+        parent_id = self.rng.choice(self.parent_ids)
+        return lambda: self.pages.children(self.user_id, parent_id)
+
+    def load_page_content(self):
+        page_id = self.rng.choice(self.page_ids)
+        return lambda: self.pages.get(page_id)
+
+    def on_search(self):
+        word = self.rng.choice(WORDS)
+        # Live search sees every prefix the user types
+        term = word[:self.rng.randint(2, len(word))] if len(word) > 2 else word
+        return lambda: self.pages.search(self.user_id, term)
+
+    def autosave(self):
+        page_id = self.rng.choice(self.page_ids)
+        state = self.pages.get(page_id)
+        text = state.content
+        cut = self.rng.randint(0, len(text))
+        edited = text[:cut] + self.rng.choice(WORDS) + " " + text[cut:]
+        buffer = AutosaveBuffer(self.pages.save_content)
+        buffer.begin(page_id, text)
+        buffer.note_edit(1)
+
+        def run():
+            buffer.flush(lambda: edited)
+        return run
+
+    def sticky_load(self):
+        page_id = self.rng.choice(self.page_ids)
+
+        def run():
+            board = StickyBoard()
+            notes = self.sticky_notes.page(page_id)
+            board.extend(notes)
+            while len(notes) == StickyNoteStore.BATCH:
+                notes = self.sticky_notes.page(page_id, notes[-1].id)
+                board.extend(notes)
+            board.visible(*VIEWPORT)
+        return run
+
+    def sticky_drag(self):
+        # A drag of many notes: one move per frame, one commit on drop
+        page_id = self.rng.choice(self.page_ids)
+        board = StickyBoard()
+        board.load(self.sticky_notes.page(page_id, limit=DRAGGED_NOTES))
+        notes = [board.store.note(slot) for slot in range(len(board))]
+
+        def run():
+            for frame in range(1, DRAG_FRAMES + 1):
+                for note_id, content, color, x, y in notes:
+                    board.move(note_id, x + frame, y + frame)
+                board.visible(*VIEWPORT)
+            self.sticky_notes.move_many([(note_id, int(x) + DRAG_FRAMES, int(y) + DRAG_FRAMES)
+                                         for note_id, content, color, x, y in notes])
+        return run
+
+    CASES = ("load_pages", "expand_page", "load_page_content", "on_search",
+             "autosave", "sticky_load", "sticky_drag")
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(path, config, iterations, cases=None):
+    user_ids = build_workspace(path, config)
+    db = DatabaseManager(path)
+    try:
+        suite = Suite(db, user_ids[0], config.seed)
+        results = {}
+        for name in cases or Suite.CASES:
+            results[name] = measure(getattr(suite, name), iterations)
+    finally:
+        db.close()
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "iterations": iterations,
+        "workspace": config.as_dict(),
+        "results": results,
+    }
+
+
+def compare(report, baseline):
+    # Prints p50/p95 of this run relative to an earlier report
+    for name, result in report["results"].items():
+        old = baseline.get("results", {}).get(name)
+        if not old:
+            continue
+        ratios = ["{} {:.2f}x".format(key, result[key] / old[key]) if old[key] else key + " n/a"
+                  for key in ("p50_ms", "p95_ms")]
+        print(f"{name:20} " + "  ".join(ratios), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the TwelveB data paths")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--case", action="append", choices=Suite.CASES,
+                        help="run only this case (repeatable)")
+    parser.add_argument("--workspace", help="where to build the database (default: a temp file)")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", help="earlier JSON report to compare against")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    config = config_from_args(args)
+    with tempfile.TemporaryDirectory() as directory:
+        path = args.workspace or os.path.join(directory, "workspace.db")
+        report = run_suite(path, config, args.iterations, args.case)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
@@ -0,0 +1,184 @@
+import argparse
+import os
+import random
+from datetime import datetime, timedelta
+
+from blocks import split_markdown
+from order_keys import key_between, keys_between
+from createTables import DatabaseManager
+
+# Builds reproducible synthetic workspaces: the same config and seed always
+# give the same database, so timings can be compared across commits.
+
+WORDS = (
+    "page note idea plan task draft review meeting project research list "
+    "design sprint goal result data report summary todo question answer "
+    "kitap ders ödev sınav proje çalışma günlük okul ılık ışık iğne"
+).split()
+COLORS = ("#ffff00", "#ffb6c1", "#90ee90", "#87cefa", "#d8bfd8")
+BASE_TIME = datetime(2024, 1, 1)
+
+
+class WorkspaceConfig:
+    def __init__(self, users=1, pages_per_user=1000, depth=4, fanout=8,
+                 page_chars=2000, sticky_notes_per_page=5, tags_per_user=20,
+                 tags_per_page=2, blocks_per_page=0, seed=12):
+        self.users = users
+        self.pages_per_user = pages_per_user
+        self.depth = depth
+        self.fanout = fanout
+        self.page_chars = page_chars
+        self.sticky_notes_per_page = sticky_notes_per_page
+        self.tags_per_user = tags_per_user
+        self.tags_per_page = tags_per_page
+        # 0 leaves the number of blocks to the text size
+        self.blocks_per_page = blocks_per_page
+        self.seed = seed
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+def sentence(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def text_block(rng, chars=0):
+    # One markdown block: a heading, a list, a code block or a paragraph.
+    # Lists and paragraphs grow to at least chars.
+    kind = rng.random()
+    if kind < 0.15:
+        return "## " + sentence(rng, rng.randint(2, 5)) + "\n\n"
+    if kind < 0.35:
+        items = ["- " + sentence(rng, rng.randint(3, 8)) + "\n" for _ in range(rng.randint(2, 6))]
+        while sum(map(len, items)) < chars:
+            items.append("- " + sentence(rng, rng.randint(3, 8)) + "\n")
+        return "".join(items) + "\n"
+    if kind < 0.40:
+        return "```\n" + "\n".join(sentence(rng, 4) for _ in range(3)) + "\n```\n\n"
+    sentences = [sentence(rng, rng.randint(6, 16)) for _ in range(rng.randint(1, 5))]
+    while len(" ".join(sentences)) < chars:
+        sentences.append(sentence(rng, rng.randint(6, 16)))
+    return " ".join(sentences) + "\n\n"
+
+
+def page_text(rng, chars, blocks=0):
+    # Markdown with headings, paragraphs, lists and the odd code block. With
+    # blocks, the page has exactly that many blocks sharing about chars;
+    # otherwise blocks are added until the page has chars.
+    parts = []
+    size = 0
+    if blocks:
+        # Short blocks leave their share to the blocks after them
+        for left in range(blocks, 0, -1):
+            part = text_block(rng, (chars - size) // left)
+            parts.append(part)
+            size += len(part)
+        return "".join(parts)
+    while size < chars:
+        part = text_block(rng)
+        parts.append(part)
+        size += len(part)
+    return "".join(parts)
+
+
+def page_parents(rng, count, depth, fanout):
+    # parent index (or None) for each page, filling the tree level by level
+    parents = []
+    level = [None]
+    for _ in range(depth):
+        next_level = []
+        for parent in level:
+            for _ in range(rng.randint(1, fanout) if parent is not None else fanout):
+                if len(parents) == count:
+                    return parents
+                parents.append(parent)
+                next_level.append(len(parents) - 1)
+        level = next_level
+        if not level:
+            break
+    # Anything left over goes to the top level
+    parents.extend([None] * (count - len(parents)))
+    return parents
+
+
+def build_workspace(path, config=None):
+    # Overwrites path; returns the ids of the generated users
+    config = config or WorkspaceConfig()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    rng = random.Random(config.seed)
+    db = DatabaseManager(path)
+    db.migrate()
+    user_ids = []
+    with db.writing() as conn:
+        cursor = conn.cursor()
+        for u in range(config.users):
+            cursor.execute("""
+                INSERT INTO users (username, password, security_question, security_answer)
+                VALUES (?, ?, ?, ?)
+            """, (f"bench{u}", "bench", "q", "a"))
+            user_id = cursor.lastrowid
+            user_ids.append(user_id)
+            cursor.execute("INSERT INTO settings (user_id) VALUES (?)", (user_id,))
+            cursor.executemany("INSERT INTO tags (name, color, user_id) VALUES (?, ?, ?)",
+                               [(f"tag{t}", rng.choice(COLORS), user_id)
+                                for t in range(config.tags_per_user)])
+            cursor.execute("SELECT id FROM tags WHERE user_id=?", (user_id,))
+            tag_ids = [row[0] for row in cursor.fetchall()]
+
+            page_ids = []
+            last_keys = {}
+            parents = page_parents(rng, config.pages_per_user, config.depth, config.fanout)
+            for i, parent in enumerate(parents):
+                created = BASE_TIME + timedelta(minutes=i)
+                order_key = last_keys[parent] = key_between(last_keys.get(parent), None)
+                cursor.execute("""
+                    INSERT INTO pages (user_id, title, color, parent_id, order_key, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, (user_id, f"{sentence(rng, 3)[:-1]} {i}", "#ffffff",
+                      None if parent is None else page_ids[parent], order_key, created, created))
+                page_id = cursor.lastrowid
+                page_ids.append(page_id)
+                text = page_text(rng, rng.randint(config.page_chars // 2, config.page_chars * 3 // 2),
+                                 config.blocks_per_page)
+                blocks = split_markdown(text)
+                cursor.executemany("""
+                    INSERT INTO blocks (page_id, type, content, order_key, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, [(page_id, kind, content, order_key, created, created)
+                      for order_key, (kind, content) in zip(keys_between(None, None, len(blocks)), blocks)])
+                cursor.executemany("""
+                    INSERT INTO sticky_notes (page_id, content, color, position_x, position_y, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, [(page_id, sentence(rng, rng.randint(3, 12)), rng.choice(COLORS),
+                       rng.randint(0, 4000), rng.randint(0, 3000), created, created)
+                      for _ in range(config.sticky_notes_per_page)])
+                if tag_ids:
+                    cursor.executemany("INSERT INTO page_tags (page_id, tag_id) VALUES (?, ?)",
+                                       [(page_id, tag_id) for tag_id in
+                                        rng.sample(tag_ids, min(config.tags_per_page, len(tag_ids)))])
+    with db.writing() as conn:
+        conn.execute("ANALYZE")
+    db.close()
+    return user_ids
+
+
+def add_config_arguments(parser):
+    defaults = WorkspaceConfig()
+    for name, value in defaults.as_dict().items():
+        parser.add_argument("--" + name.replace("_", "-"), type=int, default=value)
+
+
+def config_from_args(args):
+    return WorkspaceConfig(**{name: getattr(args, name) for name in WorkspaceConfig().as_dict()})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a synthetic TwelveB workspace")
+    parser.add_argument("path", nargs="?", default="bench_workspace.db")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+    users = build_workspace(args.path, config_from_args(args))
+    print(f"Built {args.path} for users {users}")
@@ -0,0 +1,273 @@
+import re
+from collections import OrderedDict
+from datetime import datetime
+from difflib import SequenceMatcher
+
+from order_keys import MAX_KEY_LENGTH, keys_between, spread_keys
+from page_bodies import read_body
+
+# Pages are stored as rows in the blocks table instead of one pages.content
+# string. A page is split into Markdown blocks (paragraphs, headings, fenced
+# code, lists, quotes) so that the blocks concatenate back to exactly the
+# original text; saving an edited page only touches the blocks that changed.
+#
+# Blocks of type 'row' are the rows of a database page (see
+# twelveb/core/database_store.py) and not part of the page text; every text
+# query says type != 'row' so it can use the idx_blocks_page_text index.
+
+_HEADING_RE = re.compile(r"#{1,6}(\s|$)")
+_LIST_RE = re.compile(r"([-*+]|\d+[.)])\s")
+_FENCES = ("```", "~~~")
+# YAML front matter at the very start of a Markdown file
+FRONT_MATTER_RE = re.compile(r"\A---\s*\n(.*?)\n---\s*(\n|\Z)", re.S)
+
+
+def block_type(text):
+    first = text.lstrip()
+    if first.startswith(_FENCES):
+        return "code"
+    if _HEADING_RE.match(first):
+        return "heading"
+    if _LIST_RE.match(first):
+        return "list"
+    if first.startswith(">"):
+        return "quote"
+    return "text"
+
+
+def split_markdown(text):
+    # Returns (type, content) pairs; "".join of the contents is the input text.
+    # A block is a run of lines plus the blank lines after it. Headings stand
+    # alone and fenced code stays in one block, blank lines included.
+    blocks = []
+    current = []
+    has_text = False
+    after_break = False
+    fence = None
+
+    def flush():
+        content = "".join(current)
+        blocks.append((block_type(content), content))
+        current.clear()
+
+    for line in (text or "").splitlines(keepends=True):
+        stripped = line.strip()
+        if fence:
+            current.append(line)
+            if stripped.startswith(fence):
+                fence = None
+                after_break = True
+            continue
+        if not stripped:
+            current.append(line)
+            if has_text:
+                after_break = True
+            continue
+        is_heading = bool(_HEADING_RE.match(stripped))
+        opens_fence = stripped.startswith(_FENCES)
+        if has_text and (after_break or is_heading or opens_fence):
+            flush()
+        current.append(line)
+        has_text = True
+        after_break = is_heading
+        if opens_fence:
+            fence = stripped[:3]
+    if current:
+        flush()
+    return blocks
+
+
+def insert_blocks(cursor, page_id, text, after_key=None):
+    # Appends the blocks of text after the block with order key after_key
+    now = datetime.now()
+    blocks = split_markdown(text)
+    cursor.executemany("""
+        INSERT INTO blocks (page_id, type, content, order_key, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, [(page_id, kind, content, key, now, now)
+          for (kind, content), key in zip(blocks, keys_between(after_key, None, len(blocks)))])
+
+
+def fetch_page_text(conn, page_id):
+    cursor = conn.cursor()
+    cursor.execute("SELECT content FROM blocks WHERE page_id=? AND type != 'row' ORDER BY order_key, id", (page_id,))
+    text = "".join(row[0] or "" for row in cursor)
+    if not text:
+        # Pages not edited for a while are stored as one (compressed) body
+        text = read_body(conn, page_id) or ""
+    return text
+
+
+class Block:
+    __slots__ = ("id", "type", "content", "order_key")
+
+    def __init__(self, block_id, kind, content, order_key):
+        self.id = block_id
+        self.type = kind
+        self.content = content
+        self.order_key = order_key
+
+
+class BlockDocument:
+    # The stored blocks of one page, used to work out which rows an edit dirtied
+    def __init__(self, page_id, blocks):
+        self.page_id = page_id
+        self.blocks = blocks
+        # Set when new blocks got long order keys; see rebalance()
+        self.needs_rebalance = False
+
+    @classmethod
+    def load(cls, conn, page_id):
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT id, type, content, order_key FROM blocks
+            WHERE page_id=? AND type != 'row' ORDER BY order_key, id
+        """, (page_id,))
+        return cls(page_id, [Block(*row) for row in cursor])
+
+    def text(self):
+        return "".join(block.content or "" for block in self.blocks)
+
+    def save(self, cursor, text):
+        # Writes only inserted, edited and deleted blocks: the blocks that
+        # stay keep their order keys, and new ones get keys between their
+        # neighbours. Returns the number of rows written.
+        if any(block.order_key is None for block in self.blocks):
+            # Rows written before order keys, or by hand
+            self.rebalance(cursor)
+        new = split_markdown(text)
+        old = self.blocks
+        old_contents = [block.content for block in old]
+        new_contents = [content for kind, content in new]
+
+        result = []
+        updates = []
+        inserts = []
+        deletes = []
+        matcher = SequenceMatcher(None, old_contents, new_contents, autojunk=False)
+        for op, i1, i2, j1, j2 in matcher.get_opcodes():
+            if op == "equal":
+                result.extend(old[i1:i2])
+                continue
+            reused = old[i1:i2]
+            for offset, j in enumerate(range(j1, j2)):
+                kind, content = new[j]
+                if offset < len(reused):
+                    # Edited in place: keep the row, rewrite its content
+                    block = reused[offset]
+                    block.type = kind
+                    block.content = content
+                    updates.append(block)
+                else:
+                    block = Block(None, kind, content, None)
+                    inserts.append(block)
+                result.append(block)
+            deletes.extend(reused[j2 - j1:])
+
+        # Runs of new blocks go between the kept blocks around them
+        start = 0
+        while start < len(result):
+            if result[start].order_key is not None:
+                start += 1
+                continue
+            end = start
+            while end < len(result) and result[end].order_key is None:
+                end += 1
+            before = result[start - 1].order_key if start else None
+            after = result[end].order_key if end < len(result) else None
+            for block, key in zip(result[start:end], keys_between(before, after, end - start)):
+                block.order_key = key
+                if len(key) > MAX_KEY_LENGTH:
+                    self.needs_rebalance = True
+            start = end
+
+        now = datetime.now()
+        if deletes:
+            cursor.executemany("DELETE FROM blocks WHERE id=?", [(block.id,) for block in deletes])
+        if updates:
+            cursor.executemany("""
+                UPDATE blocks SET type=?, content=?, updated_at=? WHERE id=?
+            """, [(block.type, block.content, now, block.id) for block in updates])
+        for block in inserts:
+            cursor.execute("""
+                INSERT INTO blocks (page_id, type, content, order_key, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (self.page_id, block.type, block.content, block.order_key, now, now))
+            block.id = cursor.lastrowid
+        self.blocks = result
+        return len(deletes) + len(updates) + len(inserts)
+
+    def rebalance(self, cursor):
+        # Evenly spaced keys for every block; rewrites all rows of the page
+        keys = spread_keys(len(self.blocks))
+        for block, key in zip(self.blocks, keys):
+            block.order_key = key
+        cursor.executemany("UPDATE blocks SET order_key=? WHERE id=?",
+                           [(block.order_key, block.id) for block in self.blocks])
+        self.needs_rebalance = False
+        return len(self.blocks)
+
+
+class BlockStore:
+    # Keeps the block layout of recently saved pages so a save does not have
+    # to re-read the page. Only use it from one thread (the database writer).
+    MAX_DOCUMENTS = 16
+
+    def __init__(self, max_documents=None):
+        self.max_documents = max_documents or self.MAX_DOCUMENTS
+        self.documents = OrderedDict()
+        self.unbalanced = set()
+
+    def document(self, conn, page_id):
+        document = self.documents.get(page_id)
+        if document is None:
+            document = BlockDocument.load(conn, page_id)
+            self.documents[page_id] = document
+            while len(self.documents) > self.max_documents:
+                self.documents.popitem(last=False)
+        else:
+            self.documents.move_to_end(page_id)
+        return document
+
+    def save(self, db, page_id, text):
+        with db.writing() as conn:
+            return self.write(conn, page_id, text)
+
+    def write(self, conn, page_id, text):
+        # save() inside a transaction of the caller, which must forget() the
+        # page if the transaction is rolled back after this returns
+        cursor = conn.cursor()
+        document = self.document(conn, page_id)
+        try:
+            written = document.save(cursor, text)
+        except Exception:
+            # The transaction rolls back, so the cached layout is stale
+            self.documents.pop(page_id, None)
+            raise
+        if document.needs_rebalance:
+            self.unbalanced.add(page_id)
+        # Pages from before block storage keep their text in pages.content
+        # until the first save moves it over
+        cursor.execute("""
+            UPDATE pages SET content=NULL, updated_at=? WHERE id=?
+        """, (datetime.now(), page_id))
+        return written
+
+    def rebalance(self, db):
+        # Gives the pages whose new blocks got long order keys fresh keys;
+        # meant for idle time. Returns the number of rows written.
+        written = 0
+        while self.unbalanced:
+            page_id = self.unbalanced.pop()
+            with db.writing() as conn:
+                document = self.document(conn, page_id)
+                try:
+                    written += document.rebalance(conn.cursor())
+                except Exception:
+                    self.documents.pop(page_id, None)
+                    raise
+        return written
+
+    def forget(self, page_id):
+        self.documents.pop(page_id, None)
+        self.unbalanced.discard(page_id)
@@ -1,110 +1,123 @@
+import os
+import queue
 import sqlite3
+import threading
+from contextlib import contextmanager
+from migrations import migrate
+from page_bodies import archive_path, attach_archive
 
 class DatabaseManager:
-    def __init__(self, db_name):
-        self.conn = sqlite3.connect("twelveb.db")
-        self.conn.execute("PRAGMA foreign_keys = ON")
+    # One writer connection plus a pool of read-only connections per database
+    # file. In WAL mode readers work from a snapshot and never wait for the
+    # writer, so page loads and searches are not held up by an autosave.
+    MMAP_SIZE = 256 * 1024 * 1024
+    CACHE_SIZE_KB = 32 * 1024
+    BUSY_TIMEOUT_MS = 5000
+    STATEMENT_CACHE_SIZE = 512
+    READER_POOL_SIZE = 4
 
-    def create_tables(self):
-        cursor = self.conn.cursor()
-        
-        # Users table with security question
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT NOT NULL UNIQUE,
-                password TEXT NOT NULL,
-                security_question TEXT NOT NULL,
-                security_answer TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, db_name="twelveb.db"):
+        self.db_name = db_name
+        self.in_memory = db_name == ":memory:"
+        self.write_lock = threading.RLock()
+        self.readers = queue.LifoQueue()
+        self.conn = self.connect()
 
-        # Pages table (like Notion pages)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS pages (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                title TEXT NOT NULL,
-                content TEXT,
-                icon TEXT,
-                cover_image TEXT,
-                color TEXT DEFAULT '#ffffff',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                parent_id INTEGER,
-                FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE,
-                FOREIGN KEY(parent_id) REFERENCES pages(id) ON DELETE SET NULL
-            )
-        ''')
+    @classmethod
+    def shared(cls, db_name="twelveb.db", migrate_schema=True):
+        # The single entry point for SQL in the app: one manager per file
+        key = db_name if db_name == ":memory:" else os.path.abspath(db_name)
+        with cls._shared_lock:
+            db = cls._shared.get(key)
+            if db is None:
+                db = cls(db_name)
+                if migrate_schema:
+                    db.migrate()
+                cls._shared[key] = db
+            return db
 
-        # Sticky notes table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS sticky_notes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                page_id INTEGER,
-                content TEXT,
-                color TEXT DEFAULT '#ffff00',
-                position_x INTEGER DEFAULT 0,
-                position_y INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(page_id) REFERENCES pages(id) ON DELETE CASCADE
-            )
-        ''')
+    def connect(self, read_only=False):
+        if read_only:
+            uri = "file:" + os.path.abspath(self.db_name) + "?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False,
+                                   timeout=self.BUSY_TIMEOUT_MS / 1000,
+                                   cached_statements=self.STATEMENT_CACHE_SIZE)
+        else:
+            conn = sqlite3.connect(self.db_name, check_same_thread=False,
+                                   timeout=self.BUSY_TIMEOUT_MS / 1000,
+                                   cached_statements=self.STATEMENT_CACHE_SIZE)
+        self.configure(conn, read_only)
+        return conn
 
-        # Blocks table (for page content)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS blocks (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                page_id INTEGER,
-                type TEXT NOT NULL,  -- text, heading, list, code, etc.
-                content TEXT,
-                properties TEXT,  -- JSON string for additional properties
-                position INTEGER,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(page_id) REFERENCES pages(id) ON DELETE CASCADE
-            )
-        ''')
+    def configure(self, conn, read_only=False):
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute(f"PRAGMA busy_timeout = {self.BUSY_TIMEOUT_MS}")
+        conn.execute(f"PRAGMA cache_size = -{self.CACHE_SIZE_KB}")
+        conn.execute(f"PRAGMA mmap_size = {self.MMAP_SIZE}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        if read_only:
+            conn.execute("PRAGMA query_only = ON")
+        elif not self.in_memory:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+        # Cold pages live in a second file, made by the first page that goes
+        # cold; see page_bodies.py and twelveb/core/storage_tiers.py
+        if not self.in_memory and os.path.exists(archive_path(self.db_name)):
+            attach_archive(conn, archive_path(self.db_name), read_only)
 
-        # Tags table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS tags (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                color TEXT,
-                user_id INTEGER,
-                FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE
-            )
-        ''')
+    @property
+    def writer(self):
+        return self.conn
 
-        # Page-Tag relationship
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS page_tags (
-                page_id INTEGER,
-                tag_id INTEGER,
-                PRIMARY KEY(page_id, tag_id),
-                FOREIGN KEY(page_id) REFERENCES pages(id) ON DELETE CASCADE,
-                FOREIGN KEY(tag_id) REFERENCES tags(id) ON DELETE CASCADE
-            )
-        ''')
+    @contextmanager
+    def writing(self):
+        # Serializes writers across threads and commits on success
+        with self.write_lock:
+            try:
+                yield self.conn
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
 
-        # User settings
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS settings (
-                user_id INTEGER PRIMARY KEY,
-                dark_mode INTEGER DEFAULT 0,
-                font_size INTEGER DEFAULT 16,
-                theme TEXT DEFAULT 'default',
-                FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE
-            )
-        ''')
+    @contextmanager
+    def reader(self):
+        if self.in_memory:
+            # A private in-memory database cannot be opened a second time
+            with self.write_lock:
+                yield self.conn
+            return
+        try:
+            conn = self.readers.get_nowait()
+        except queue.Empty:
+            conn = self.connect(read_only=True)
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            if self.readers.qsize() < self.READER_POOL_SIZE:
+                self.readers.put(conn)
+            else:
+                conn.close()
 
-        self.conn.commit()
+    def migrate(self):
+        with self.write_lock:
+            return migrate(self.conn)
+
+    def create_tables(self):
+        # The schema lives in migrations.py; this brings any database up to date
+        applied = self.migrate()
+        if applied:
+            print(f"Applied schema migrations: {applied}")
         print("Tables created successfully.")
 
     def close(self):
+        while not self.readers.empty():
+            self.readers.get_nowait().close()
         self.conn.close()
 
 if __name__ == "__main__":
@@ -0,0 +1,381 @@
+import wx
+import wx.grid
+
+from twelveb.core.database_store import COLUMN_TYPES, OPERATORS, coerce
+
+# Rows are fetched this many at a time, around the first one on screen
+WINDOW = 200
+# Properties kept for rows that scrolled away before the cache starts over
+CACHE_ROWS = 5000
+
+
+def display_value(column, value):
+    if value is None:
+        return ""
+    if column.type == "checkbox":
+        return "1"
+    return str(value)
+
+
+class DatabaseTable(wx.grid.GridTableBase):
+    # Virtual grid table of a database view. It holds the ids of every row
+    # in view order but only the properties of the rows that were on
+    # screen; others are fetched a window at a time on the database worker
+    # and shown empty until they arrive.
+    def __init__(self, dialog):
+        super(DatabaseTable, self).__init__()
+        self.dialog = dialog
+        self.columns = []
+        self.attrs = []
+        self.row_ids = []
+        # row index -> (label, count) of the group starting there
+        self.group_starts = {}
+        self.cache = {}
+        self.loading = None
+
+    def reset(self, grid, columns, view):
+        old_rows, old_columns = len(self.row_ids), len(self.columns)
+        self.columns = columns
+        self.attrs = [self.column_attr(column) for column in columns]
+        self.row_ids = view.row_ids
+        self.group_starts = {start: (label, count) for label, start, count in view.groups}
+        self.loading = None
+        grid.BeginBatch()
+        for old, new, deleted, appended in (
+                (old_rows, len(self.row_ids), wx.grid.GRIDTABLE_NOTIFY_ROWS_DELETED,
+                 wx.grid.GRIDTABLE_NOTIFY_ROWS_APPENDED),
+                (old_columns, len(columns), wx.grid.GRIDTABLE_NOTIFY_COLS_DELETED,
+                 wx.grid.GRIDTABLE_NOTIFY_COLS_APPENDED)):
+            if new < old:
+                grid.ProcessTableMessage(wx.grid.GridTableMessage(self, deleted, new, old - new))
+            elif new > old:
+                grid.ProcessTableMessage(wx.grid.GridTableMessage(self, appended, new - old))
+        grid.EndBatch()
+        grid.ForceRefresh()
+
+    @staticmethod
+    def column_attr(column):
+        attr = wx.grid.GridCellAttr()
+        if column.type == "checkbox":
+            attr.SetEditor(wx.grid.GridCellBoolEditor())
+            attr.SetRenderer(wx.grid.GridCellBoolRenderer())
+            attr.SetAlignment(wx.ALIGN_CENTER, wx.ALIGN_CENTER)
+        elif column.type == "select":
+            # New choices can be typed in and are added to the column
+            attr.SetEditor(wx.grid.GridCellChoiceEditor(column.options, allowOthers=True))
+        elif column.type == "number":
+            attr.SetAlignment(wx.ALIGN_RIGHT, wx.ALIGN_CENTER)
+        return attr
+
+    def GetNumberRows(self):
+        return len(self.row_ids)
+
+    def GetNumberCols(self):
+        return len(self.columns)
+
+    def GetColLabelValue(self, col):
+        column = self.columns[col]
+        return f"{column.name} ({column.type})"
+
+    def GetRowLabelValue(self, row):
+        group = self.group_starts.get(row)
+        if group is None:
+            return ""
+        label, count = group
+        return f"{'(empty)' if label is None else label} · {count}"
+
+    def GetAttr(self, row, col, kind):
+        attr = self.attrs[col]
+        attr.IncRef()
+        return attr
+
+    def IsEmptyCell(self, row, col):
+        return not self.GetValue(row, col)
+
+    def GetValue(self, row, col):
+        properties = self.cache.get(self.row_ids[row])
+        if properties is None:
+            self.fetch(row)
+            return ""
+        column = self.columns[col]
+        return display_value(column, properties.get(column.key))
+
+    def SetValue(self, row, col, value):
+        block_id = self.row_ids[row]
+        column = self.columns[col]
+        self.dialog.save_value(block_id, column, value)
+
+    def fetch(self, row):
+        start = row - row % WINDOW
+        if self.loading == start:
+            return
+        self.loading = start
+        self.dialog.fetch_rows(self.row_ids[start:start + WINDOW])
+
+    def rows_loaded(self, rows):
+        if len(self.cache) + len(rows) > CACHE_ROWS:
+            self.cache.clear()
+        self.cache.update(rows)
+        self.loading = None
+
+
+class DatabaseDialog(wx.Dialog):
+    # The rows of a database page as a grid with filters, a sort and
+    # grouping. Opening it makes the page a database. Every query runs on
+    # the database worker; the grid only asks for the rows it shows.
+    def __init__(self, parent, page_id, title):
+        super(DatabaseDialog, self).__init__(
+            parent, title=f"Database: {title}", size=(1000, 650),
+            style=wx.DEFAULT_DIALOG_STYLE | wx.RESIZE_BORDER)
+        self.parent = parent
+        self.page_id = page_id
+        self.store = parent.databases
+        self.columns = []
+        self.filters = []
+        self.init_ui()
+        self.Bind(wx.EVT_WINDOW_DESTROY, self.on_destroy)
+        parent.worker.submit_write(lambda db: self.store.ensure(page_id), self.on_columns_loaded,
+                                   on_error=self.on_error)
+
+    def init_ui(self):
+        panel = wx.Panel(self)
+        vbox = wx.BoxSizer(wx.VERTICAL)
+
+        edit_box = wx.BoxSizer(wx.HORIZONTAL)
+        add_row = wx.Button(panel, label="Add Row")
+        add_column = wx.Button(panel, label="Add Column...")
+        delete_rows = wx.Button(panel, label="Delete Rows")
+        add_row.Bind(wx.EVT_BUTTON, self.on_add_row)
+        add_column.Bind(wx.EVT_BUTTON, self.on_add_column)
+        delete_rows.Bind(wx.EVT_BUTTON, self.on_delete_rows)
+        for button in (add_row, add_column, delete_rows):
+            edit_box.Add(button, 0, wx.RIGHT, 5)
+        vbox.Add(edit_box, 0, wx.ALL, 5)
+
+        filter_box = wx.BoxSizer(wx.HORIZONTAL)
+        self.filter_column = wx.Choice(panel)
+        self.filter_operator = wx.Choice(panel, choices=list(OPERATORS))
+        self.filter_operator.SetSelection(0)
+        self.filter_value = wx.TextCtrl(panel, style=wx.TE_PROCESS_ENTER)
+        add_filter = wx.Button(panel, label="Add Filter")
+        clear_filters = wx.Button(panel, label="Clear")
+        add_filter.Bind(wx.EVT_BUTTON, self.on_add_filter)
+        self.filter_value.Bind(wx.EVT_TEXT_ENTER, self.on_add_filter)
+        clear_filters.Bind(wx.EVT_BUTTON, self.on_clear_filters)
+        filter_box.Add(wx.StaticText(panel, label="Filter:"), 0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, 5)
+        filter_box.Add(self.filter_column, 0, wx.RIGHT, 5)
+        filter_box.Add(self.filter_operator, 0, wx.RIGHT, 5)
+        filter_box.Add(self.filter_value, 1, wx.RIGHT, 5)
+        filter_box.Add(add_filter, 0, wx.RIGHT, 5)
+        filter_box.Add(clear_filters, 0)
+        vbox.Add(filter_box, 0, wx.LEFT | wx.RIGHT | wx.EXPAND, 5)
+        self.filter_label = wx.StaticText(panel, label="No filters")
+        vbox.Add(self.filter_label, 0, wx.ALL, 5)
+
+        view_box = wx.BoxSizer(wx.HORIZONTAL)
+        self.sort_column = wx.Choice(panel)
+        self.sort_descending = wx.CheckBox(panel, label="Descending")
+        self.group_column = wx.Choice(panel)
+        self.sort_column.Bind(wx.EVT_CHOICE, self.on_view_changed)
+        self.sort_descending.Bind(wx.EVT_CHECKBOX, self.on_view_changed)
+        self.group_column.Bind(wx.EVT_CHOICE, self.on_view_changed)
+        view_box.Add(wx.StaticText(panel, label="Sort by:"), 0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, 5)
+        view_box.Add(self.sort_column, 0, wx.RIGHT, 5)
+        view_box.Add(self.sort_descending, 0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, 15)
+        view_box.Add(wx.StaticText(panel, label="Group by:"), 0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, 5)
+        view_box.Add(self.group_column, 0)
+        vbox.Add(view_box, 0, wx.ALL, 5)
+
+        self.grid = wx.grid.Grid(panel)
+        self.table = DatabaseTable(self)
+        self.grid.SetTable(self.table, False)
+        self.grid.SetRowLabelSize(140)
+        self.grid.SetDefaultColSize(150)
+        self.grid.Bind(wx.grid.EVT_GRID_LABEL_RIGHT_CLICK, self.on_label_menu)
+        vbox.Add(self.grid, 1, wx.ALL | wx.EXPAND, 5)
+
+        bottom_box = wx.BoxSizer(wx.HORIZONTAL)
+        self.status = wx.StaticText(panel, label="Loading…")
+        close_button = wx.Button(panel, wx.ID_CLOSE, label="Close")
+        close_button.Bind(wx.EVT_BUTTON, self.on_close)
+        bottom_box.Add(self.status, 1, wx.ALIGN_CENTER_VERTICAL)
+        bottom_box.Add(close_button, 0)
+        vbox.Add(bottom_box, 0, wx.ALL | wx.EXPAND, 5)
+
+        panel.SetSizer(vbox)
+
+    def on_columns_loaded(self, columns):
+        if not self:
+            return
+        self.columns = columns
+        keys = {column.key for column in columns}
+        self.filters = [item for item in self.filters if item[0] in keys]
+        names = [column.name for column in columns]
+        for choice, first in ((self.filter_column, None), (self.sort_column, "None"),
+                              (self.group_column, "None")):
+            selection = choice.GetStringSelection()
+            choice.Set(([first] if first else []) + names)
+            if not choice.SetStringSelection(selection):
+                choice.SetSelection(0)
+        self.show_filters()
+        self.reload()
+
+    def column_of(self, choice, offset=1):
+        # The column picked in a choice whose first entry is "None"
+        index = choice.GetSelection() - offset
+        return self.columns[index] if 0 <= index < len(self.columns) else None
+
+    def reload(self):
+        sort_column = self.column_of(self.sort_column)
+        group_column = self.column_of(self.group_column)
+        page_id = self.page_id
+        filters = list(self.filters)
+        sort = (sort_column.key, self.sort_descending.GetValue()) if sort_column else None
+        group_by = group_column.key if group_column else None
+        self.status.SetLabel("Loading…")
+        # A newer view supersedes one still loading
+        self.parent.worker.submit(lambda db: self.store.view(page_id, filters, sort, group_by),
+                                  self.on_view_loaded, key="database view", after_writes=True,
+                                  on_error=self.on_error)
+
+    def on_view_loaded(self, view):
+        if not self:
+            return
+        self.table.reset(self.grid, self.columns, view)
+        groups = f" in {len(view.groups)} groups" if view.groups else ""
+        self.status.SetLabel(f"{len(view.row_ids)} rows{groups}")
+
+    def fetch_rows(self, row_ids):
+        self.parent.worker.submit(lambda db: self.store.rows(row_ids), self.on_rows_loaded,
+                                  key="database rows", after_writes=True)
+
+    def on_rows_loaded(self, rows):
+        if not self:
+            return
+        self.table.rows_loaded(rows)
+        self.grid.ForceRefresh()
+
+    def save_value(self, block_id, column, value):
+        def on_saved(properties):
+            if self:
+                self.table.cache[block_id] = properties
+                self.grid.ForceRefresh()
+                if column.type == "select":
+                    # A new choice was added to the column
+                    self.reload_columns()
+
+        self.parent.worker.submit_write(lambda db: self.store.update_row(block_id, {column.key: value}),
+                                        on_saved, on_error=self.on_error)
+
+    def reload_columns(self):
+        page_id = self.page_id
+        self.parent.worker.submit(lambda db: self.store.columns(page_id), self.on_columns_loaded,
+                                  key="database columns", after_writes=True)
+
+    def on_add_row(self, event):
+        page_id = self.page_id
+        self.parent.worker.submit_write(lambda db: self.store.add_rows(page_id, [{}]),
+                                        lambda block_ids: self.reload() if self else None,
+                                        on_error=self.on_error)
+
+    def on_delete_rows(self, event):
+        rows = self.grid.GetSelectedRows()
+        if not rows:
+            self.status.SetLabel("Select rows by their labels to delete them")
+            return
+        block_ids = [self.table.row_ids[row] for row in rows]
+        answer = wx.MessageBox(f"Delete {len(block_ids)} rows?", "Delete Rows",
+                               wx.YES_NO | wx.NO_DEFAULT | wx.ICON_WARNING, self)
+        if answer != wx.YES:
+            return
+        self.parent.worker.submit_write(lambda db: self.store.delete_rows(block_ids),
+                                        lambda result: self.reload() if self else None,
+                                        on_error=self.on_error)
+
+    def on_add_column(self, event):
+        name = wx.GetTextFromUser("Column name:", "Add Column", parent=self).strip()
+        if not name:
+            return
+        kind = wx.GetSingleChoice("Column type:", "Add Column", list(COLUMN_TYPES), parent=self)
+        if not kind:
+            return
+        page_id = self.page_id
+        self.parent.worker.submit_write(lambda db: self.store.add_column(page_id, name, kind),
+                                        lambda column: self.reload_columns() if self else None,
+                                        on_error=self.on_error)
+
+    def on_label_menu(self, event):
+        col = event.GetCol()
+        if col < 0 or event.GetRow() >= 0:
+            return
+        column = self.table.columns[col]
+        menu = wx.Menu()
+        rename = menu.Append(wx.ID_ANY, "Rename...")
+        delete = menu.Append(wx.ID_ANY, "Delete Column")
+        # The Name column is the row's title and stays
+        delete.Enable(col > 0)
+        self.Bind(wx.EVT_MENU, lambda e: self.rename_column(column), rename)
+        self.Bind(wx.EVT_MENU, lambda e: self.delete_column(column), delete)
+        self.grid.PopupMenu(menu)
+        menu.Destroy()
+
+    def rename_column(self, column):
+        name = wx.GetTextFromUser("Column name:", "Rename Column", column.name, parent=self).strip()
+        if name and name != column.name:
+            self.parent.worker.submit_write(lambda db: self.store.rename_column(column.id, name),
+                                            lambda result: self.reload_columns() if self else None,
+                                            on_error=self.on_error)
+
+    def delete_column(self, column):
+        answer = wx.MessageBox(f'Delete the column "{column.name}"?', "Delete Column",
+                               wx.YES_NO | wx.NO_DEFAULT | wx.ICON_WARNING, self)
+        if answer == wx.YES:
+            self.parent.worker.submit_write(lambda db: self.store.delete_column(column.id),
+                                            lambda result: self.reload_columns() if self else None,
+                                            on_error=self.on_error)
+
+    def on_add_filter(self, event):
+        column = self.column_of(self.filter_column, 0)
+        operator = self.filter_operator.GetStringSelection()
+        raw = self.filter_value.GetValue()
+        if column is None or not operator:
+            return
+        if operator not in ("contains", "is empty", "is not empty"):
+            try:
+                coerce(column, raw)
+            except ValueError:
+                self.status.SetLabel(f'"{raw}" is not a valid {column.type}')
+                return
+        self.filters.append((column.key, operator, raw))
+        self.filter_value.Clear()
+        self.show_filters()
+        self.reload()
+
+    def on_clear_filters(self, event):
+        self.filters = []
+        self.show_filters()
+        self.reload()
+
+    def show_filters(self):
+        names = {column.key: column.name for column in self.columns}
+        terms = []
+        for key, operator, raw in self.filters:
+            terms.append(f"{names[key]} {operator}" + ("" if operator.startswith("is ") else f" {raw}"))
+        self.filter_label.SetLabel("; ".join(terms) or "No filters")
+
+    def on_view_changed(self, event):
+        self.reload()
+
+    def on_error(self, error):
+        if self:
+            self.status.SetLabel(f"Error: {error}")
+            self.grid.ForceRefresh()
+
+    def on_close(self, event):
+        self.EndModal(wx.ID_CLOSE)
+
+    def on_destroy(self, event):
+        if event.GetEventObject() is self:
+            for key in ("database view", "database rows", "database columns"):
+                self.parent.worker.cancel(key)
+        event.Skip()
@@ -0,0 +1,109 @@
+import itertools
+import queue
+import threading
+
+
+class DatabaseWorker:
+    # Runs database jobs off the UI thread.
+    #
+    # A job is a callable taking the DatabaseManager. Reads are spread over a
+    # few threads using pooled read-only connections; writes go through one
+    # thread so they commit in the order they were submitted. Results are
+    # handed to `dispatch` (wx.CallAfter in the app) so callbacks run on the
+    # UI thread.
+    #
+    # Jobs submitted with a key supersede each other: submitting a new job
+    # under a key cancels the older one if it has not started, and drops its
+    # result if it has.
+    READ_THREADS = 2
+
+    def __init__(self, db, dispatch, read_threads=None):
+        self.db = db
+        self.dispatch = dispatch
+        self.read_jobs = queue.Queue()
+        self.write_jobs = queue.Queue()
+        self.latest = {}
+        self.lock = threading.Lock()
+        self.counter = itertools.count(1)
+        self.pending_writes = 0
+        self.stopped = False
+        self.threads = []
+        for i in range(read_threads or self.READ_THREADS):
+            self.threads.append(threading.Thread(target=self.run, args=(self.read_jobs,),
+                                                 name=f"db-reader-{i}", daemon=True))
+        self.threads.append(threading.Thread(target=self.run, args=(self.write_jobs,),
+                                             name="db-writer", daemon=True))
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, job, on_done=None, key=None, on_error=None, after_writes=False):
+        # after_writes makes a read wait for every write submitted before it
+        generation = next(self.counter)
+        with self.lock:
+            if key is not None:
+                self.latest[key] = generation
+            serialized = after_writes and self.pending_writes > 0
+            if serialized:
+                self.pending_writes += 1
+        target = self.write_jobs if serialized else self.read_jobs
+        target.put((generation, key, job, on_done, on_error, serialized))
+        return generation
+
+    def submit_write(self, job, on_done=None, key=None, on_error=None):
+        generation = next(self.counter)
+        with self.lock:
+            if key is not None:
+                self.latest[key] = generation
+            self.pending_writes += 1
+        self.write_jobs.put((generation, key, job, on_done, on_error, True))
+        return generation
+
+    def cancel(self, key):
+        with self.lock:
+            self.latest[key] = next(self.counter)
+
+    def is_current(self, key, generation):
+        if key is None:
+            return True
+        with self.lock:
+            return self.latest.get(key) == generation
+
+    def run(self, jobs):
+        while True:
+            item = jobs.get()
+            if item is None:
+                break
+            generation, key, job, on_done, on_error, serialized = item
+            try:
+                if not self.is_current(key, generation):
+                    continue
+                try:
+                    result = job(self.db)
+                except Exception as error:
+                    if on_error is not None:
+                        self.dispatch(self.deliver, key, generation, on_error, error)
+                    else:
+                        print(f"Database job failed: {error}")
+                    continue
+                if on_done is not None and self.is_current(key, generation):
+                    self.dispatch(self.deliver, key, generation, on_done, result)
+            finally:
+                if serialized:
+                    with self.lock:
+                        self.pending_writes -= 1
+
+    def deliver(self, key, generation, callback, value):
+        # Runs on the UI thread; a newer job may have been submitted meanwhile
+        if not self.stopped and self.is_current(key, generation):
+            callback(value)
+
+    def stop(self):
+        # Finishes every queued write before returning
+        for thread in self.threads:
+            if thread.name == "db-writer":
+                self.write_jobs.put(None)
+            else:
+                self.read_jobs.put(None)
+        for thread in self.threads:
+            thread.join()
+        self.stopped = True
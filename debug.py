@@ -1,31 +1,66 @@
 import sys
 import traceback
-import wx
 import sqlite3
 
-try:
-    from twelveb import LoginDialog
-    
-    app = wx.App()
-    login_dialog = LoginDialog(None)
-    login_dialog.ShowModal()
-    app.MainLoop()
-except Exception as e:
-    print("Error occurred:", str(e))
-    print("\nFull traceback:")
-    traceback.print_exc()
-    
-    # Check database connection
+# Starts the app and, if it fails, prints what is known about the database
+# and the environment. `python debug.py --check` only runs the database
+# diagnostics, which do not need wx.
+
+
+def check_database(db_name="twelveb.db"):
+    from migrations import full_scans, schema_version
+
     try:
-        conn = sqlite3.connect("twelveb.db")
+        conn = sqlite3.connect(db_name)
         cursor = conn.cursor()
         cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
         tables = cursor.fetchall()
         print("\nDatabase tables:", tables)
+        print("Schema version:", schema_version(conn))
+        try:
+            offenders = full_scans(conn)
+        except sqlite3.Error as error:
+            print("Query plans not checked:", error)
+        else:
+            print("Full scans in hot queries:", offenders or "none")
         conn.close()
     except Exception as db_error:
         print("\nDatabase connection error:", str(db_error))
-    
-    # Check Python and wxPython versions
+
+
+def print_versions():
     print("\nPython version:", sys.version)
-    print("wxPython version:", wx.version()) 
\ No newline at end of file
+    try:
+        import wx
+        print("wxPython version:", wx.version())
+    except ImportError:
+        print("wxPython is not installed")
+
+
+def run_app():
+    import wx
+    from twelveb import LoginDialog
+
+    app = wx.App()
+    login_dialog = LoginDialog(None)
+    login_dialog.ShowModal()
+    app.MainLoop()
+
+
+if __name__ == "__main__":
+    if "--check" in sys.argv[1:]:
+        check_database()
+        print_versions()
+        sys.exit()
+    try:
+        run_app()
+    except Exception as e:
+        print("Error occurred:", str(e))
+        print("\nFull traceback:")
+        traceback.print_exc()
+
+        # Check database connection
+        check_database()
+
+        # Check Python and wxPython versions
+        print_versions()
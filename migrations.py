@@ -0,0 +1,646 @@
+import sqlite3
+import sys
+
+from blocks import split_markdown
+from order_keys import spread_keys
+from search import SEARCH_TRIGGERS, create_packed_search_index, create_search_index, fold_case
+from wiki_links import linked_texts, update_links
+
+# Schema migrations keyed on PRAGMA user_version.
+#
+# Every step runs in its own transaction together with the version bump, so
+# a database is always at exactly one version. Steps are written to be
+# idempotent (IF NOT EXISTS, column checks) so re-running one against a
+# database that was partially upgraded by hand is harmless.
+
+MIGRATIONS = []
+
+
+def migration(version, description):
+    def register(step):
+        MIGRATIONS.append((version, description, step))
+        MIGRATIONS.sort(key=lambda entry: entry[0])
+        return step
+    return register
+
+
+def column_names(cursor, table):
+    cursor.execute(f"PRAGMA table_info({table})")
+    return {row[1] for row in cursor.fetchall()}
+
+
+def add_column(cursor, table, column, declaration):
+    if column not in column_names(cursor, table):
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+
+
+@migration(1, "base schema")
+def create_base_schema(cursor):
+    # Users table with security question
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL UNIQUE,
+            password TEXT NOT NULL,
+            security_question TEXT NOT NULL,
+            security_answer TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Pages table (like Notion pages)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS pages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            title TEXT NOT NULL,
+            content TEXT,
+            icon TEXT,
+            cover_image TEXT,
+            color TEXT DEFAULT '#ffffff',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            parent_id INTEGER,
+            FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE,
+            FOREIGN KEY(parent_id) REFERENCES pages(id) ON DELETE SET NULL
+        )
+    ''')
+    # Databases created by early versions have pages without these columns
+    add_column(cursor, "pages", "content", "TEXT")
+    add_column(cursor, "pages", "color", "TEXT DEFAULT '#ffffff'")
+
+    # Sticky notes table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sticky_notes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            page_id INTEGER,
+            content TEXT,
+            color TEXT DEFAULT '#ffff00',
+            position_x INTEGER DEFAULT 0,
+            position_y INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(page_id) REFERENCES pages(id) ON DELETE CASCADE
+        )
+    ''')
+
+    # Blocks table (for page content)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS blocks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            page_id INTEGER,
+            type TEXT NOT NULL,  -- text, heading, list, code, etc.
+            content TEXT,
+            properties TEXT,  -- JSON string for additional properties
+            position INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(page_id) REFERENCES pages(id) ON DELETE CASCADE
+        )
+    ''')
+
+    # Tags table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS tags (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            color TEXT,
+            user_id INTEGER,
+            FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    ''')
+
+    # Page-Tag relationship
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS page_tags (
+            page_id INTEGER,
+            tag_id INTEGER,
+            PRIMARY KEY(page_id, tag_id),
+            FOREIGN KEY(page_id) REFERENCES pages(id) ON DELETE CASCADE,
+            FOREIGN KEY(tag_id) REFERENCES tags(id) ON DELETE CASCADE
+        )
+    ''')
+
+    # User settings
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS settings (
+            user_id INTEGER PRIMARY KEY,
+            dark_mode INTEGER DEFAULT 0,
+            font_size INTEGER DEFAULT 16,
+            theme TEXT DEFAULT 'default',
+            FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    ''')
+
+
+@migration(2, "full-text search index")
+def create_full_text_search(cursor):
+    create_search_index(cursor)
+
+
+@migration(3, "indexes for the hot queries")
+def create_indexes(cursor):
+    # Page tree: children of one parent in creation order, covering id and title
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_pages_user_parent_created
+        ON pages(user_id, parent_id, created_at, title)
+    """)
+    # Child lookups by parent alone, also used by ON DELETE SET NULL
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_pages_parent ON pages(parent_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_pages_user_title ON pages(user_id, title)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sticky_notes_page ON sticky_notes(page_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_blocks_page_position ON blocks(page_id, position)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tags_user ON tags(user_id, name)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_page_tags_tag ON page_tags(tag_id, page_id)")
+
+
+@migration(4, "split page content into blocks")
+def split_content_into_blocks(cursor):
+    # Pages that already have blocks were written by the block editor
+    cursor.execute("""
+        SELECT id, content FROM pages
+        WHERE content IS NOT NULL AND content != ''
+          AND NOT EXISTS (SELECT 1 FROM blocks b WHERE b.page_id = pages.id)
+    """)
+    for page_id, content in cursor.fetchall():
+        # Blocks were ordered by position until migration 11
+        cursor.executemany("""
+            INSERT INTO blocks (page_id, type, content, position, created_at, updated_at)
+            VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+        """, [(page_id, kind, text, position) for position, (kind, text) in enumerate(split_markdown(content))])
+    cursor.execute("UPDATE pages SET content=NULL WHERE content IS NOT NULL")
+
+
+@migration(5, "import bookkeeping")
+def create_import_tables(cursor):
+    # Files and folders already brought in by the Markdown importer, so an
+    # interrupted import can pick up where it stopped
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS imported_files (
+            user_id INTEGER NOT NULL,
+            source TEXT NOT NULL,
+            path TEXT NOT NULL,
+            page_id INTEGER,
+            imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY(user_id, source, path),
+            FOREIGN KEY(page_id) REFERENCES pages(id) ON DELETE CASCADE
+        )
+    """)
+
+
+@migration(6, "export markers")
+def create_export_markers(cursor):
+    # When each named export last ran, for incremental exports
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS export_markers (
+            user_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            exported_at TIMESTAMP NOT NULL,
+            PRIMARY KEY(user_id, name),
+            FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    """)
+
+
+@migration(7, "session state")
+def create_sessions(cursor):
+    # Window layout and one-time setup flags, restored on the next launch
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sessions (
+            user_id INTEGER PRIMARY KEY,
+            last_page_id INTEGER,
+            sash_position INTEGER,
+            editor_sash_position INTEGER,
+            expanded TEXT,  -- JSON list of expanded page ids, parents first
+            welcome_created INTEGER DEFAULT 0,
+            FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE,
+            FOREIGN KEY(last_page_id) REFERENCES pages(id) ON DELETE SET NULL
+        )
+    """)
+    # Users from before the flag already got their welcome page
+    cursor.execute("""
+        INSERT OR IGNORE INTO sessions (user_id, welcome_created)
+        SELECT DISTINCT user_id, 1 FROM pages
+        WHERE title='Welcome to TwelveB' AND user_id IS NOT NULL
+    """)
+
+
+@migration(8, "page versions")
+def create_page_versions(cursor):
+    # Text of a page at each autosave; see twelveb/core/version_store.py
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS page_versions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            page_id INTEGER NOT NULL,
+            created_at TIMESTAMP,
+            kind TEXT NOT NULL,  -- 'key': compressed text, 'diff': compressed line diff
+            data BLOB NOT NULL,
+            size INTEGER NOT NULL,  -- length of the text
+            FOREIGN KEY(page_id) REFERENCES pages(id) ON DELETE CASCADE
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_page_versions_page ON page_versions(page_id, id)")
+
+
+@migration(9, "packed page bodies")
+def create_page_bodies(cursor):
+    # Pages stored as one body instead of blocks; see page_bodies.py
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS page_bodies (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            page_id INTEGER NOT NULL UNIQUE,
+            tier TEXT NOT NULL,  -- 'packed': data is here, 'cold': in the archive database
+            data BLOB,
+            size INTEGER NOT NULL,  -- length of the text
+            packed_at TIMESTAMP,
+            FOREIGN KEY(page_id) REFERENCES pages(id) ON DELETE CASCADE
+        )
+    """)
+    create_packed_search_index(cursor)
+
+
+@migration(10, "delete subtrees with their page")
+def create_subtree_delete_trigger(cursor):
+    # parent_id is ON DELETE SET NULL, which would move the children of a
+    # deleted page to the top level. Deleting a page takes its whole subtree
+    # along instead, in one statement.
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS pages_delete_subtree BEFORE DELETE ON pages BEGIN
+            DELETE FROM pages WHERE id IN (
+                WITH RECURSIVE subtree(id, user_id) AS (
+                    SELECT id, user_id FROM pages WHERE parent_id = old.id
+                    UNION ALL
+                    SELECT p.id, p.user_id FROM subtree
+                    CROSS JOIN pages p ON p.user_id IS subtree.user_id AND p.parent_id = subtree.id
+                )
+                SELECT id FROM subtree
+            );
+        END
+    """)
+
+
+def create_order_indexes(cursor):
+    # Siblings and blocks in user order; these replace the indexes on
+    # created_at and position, which nothing sorts by any more
+    cursor.execute("DROP INDEX IF EXISTS idx_pages_user_parent_created")
+    cursor.execute("DROP INDEX IF EXISTS idx_blocks_page_position")
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_pages_user_parent_order
+        ON pages(user_id, parent_id, order_key, title)
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_blocks_page_order ON blocks(page_id, order_key)")
+
+
+@migration(11, "order keys for pages and blocks")
+def create_order_keys(cursor):
+    # Existing siblings keep their creation order, blocks their position
+    add_column(cursor, "pages", "order_key", "TEXT")
+    add_column(cursor, "blocks", "order_key", "TEXT")
+    cursor.execute("""
+        SELECT id, user_id, parent_id FROM pages
+        ORDER BY user_id, parent_id, created_at, id
+    """)
+    groups = {}
+    for page_id, user_id, parent_id in cursor.fetchall():
+        groups.setdefault((user_id, parent_id), []).append(page_id)
+    for page_ids in groups.values():
+        cursor.executemany("UPDATE pages SET order_key=? WHERE id=?", zip(spread_keys(len(page_ids)), page_ids))
+    cursor.execute("SELECT id, page_id FROM blocks ORDER BY page_id, position, id")
+    groups = {}
+    for block_id, page_id in cursor.fetchall():
+        groups.setdefault(page_id, []).append(block_id)
+    for block_ids in groups.values():
+        cursor.executemany("UPDATE blocks SET order_key=? WHERE id=?", zip(spread_keys(len(block_ids)), block_ids))
+    create_order_indexes(cursor)
+
+
+@migration(12, "tag page counts")
+def create_tag_counts(cursor):
+    # Kept by triggers so the tag panel never counts page_tags. revision
+    # changes with every page tagged or untagged, and the user's page
+    # revision with every page created or deleted; the in-memory tag
+    # filter (tag_index.py) reloads what changed.
+    add_column(cursor, "tags", "page_count", "INTEGER NOT NULL DEFAULT 0")
+    add_column(cursor, "tags", "revision", "INTEGER NOT NULL DEFAULT 0")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS user_page_revisions (
+            user_id INTEGER PRIMARY KEY,
+            revision INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    cursor.execute("""
+        UPDATE tags SET page_count = (SELECT count(*) FROM page_tags WHERE tag_id = tags.id)
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS page_tags_count_insert AFTER INSERT ON page_tags BEGIN
+            UPDATE tags SET page_count = page_count + 1, revision = revision + 1 WHERE id = new.tag_id;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS page_tags_count_delete AFTER DELETE ON page_tags BEGIN
+            UPDATE tags SET page_count = page_count - 1, revision = revision + 1 WHERE id = old.tag_id;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS page_tags_count_update AFTER UPDATE OF tag_id ON page_tags BEGIN
+            UPDATE tags SET page_count = page_count - 1, revision = revision + 1 WHERE id = old.tag_id;
+            UPDATE tags SET page_count = page_count + 1, revision = revision + 1 WHERE id = new.tag_id;
+        END
+    """)
+    for event, row in (("INSERT", "new"), ("DELETE", "old")):
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS pages_revision_{event.lower()} AFTER {event} ON pages
+            WHEN {row}.user_id IS NOT NULL BEGIN
+                INSERT INTO user_page_revisions (user_id, revision) VALUES ({row}.user_id, 1)
+                ON CONFLICT(user_id) DO UPDATE SET revision = revision + 1;
+            END
+        """)
+
+
+def create_database_indexes(cursor):
+    # Page text skips the rows of database pages, and the rows of a database
+    # are read without its text blocks. The partial indexes only match
+    # queries that spell out the same type condition.
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_blocks_page_text
+        ON blocks(page_id, order_key) WHERE type != 'row'
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_blocks_page_rows
+        ON blocks(page_id, type, order_key) WHERE type = 'row'
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_row_values_column ON row_values(column_id, value, block_id)")
+
+
+@migration(13, "database pages")
+def create_database_tables(cursor):
+    # Typed columns of database pages. Rows are blocks of type 'row' whose
+    # properties hold {column key: value}; row_values indexes those values
+    # so filters and sorts never parse the JSON. See
+    # twelveb/core/database_store.py.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS database_columns (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            page_id INTEGER NOT NULL,
+            key TEXT NOT NULL,  -- name of the value in blocks.properties
+            name TEXT NOT NULL,
+            type TEXT NOT NULL,  -- text, number, date, select or checkbox
+            options TEXT,  -- JSON list of the choices of a select column
+            order_key TEXT,
+            UNIQUE(page_id, key),
+            FOREIGN KEY(page_id) REFERENCES pages(id) ON DELETE CASCADE
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS row_values (
+            block_id INTEGER NOT NULL,
+            column_id INTEGER NOT NULL,
+            value,  -- lowercased text, number, ISO date, option or 1
+            PRIMARY KEY(block_id, column_id),
+            FOREIGN KEY(block_id) REFERENCES blocks(id) ON DELETE CASCADE,
+            FOREIGN KEY(column_id) REFERENCES database_columns(id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_database_columns_page ON database_columns(page_id, order_key)")
+    create_database_indexes(cursor)
+
+
+@migration(14, "page links")
+def create_page_links(cursor):
+    # [[Page Title]] links, kept by every save (see wiki_links.py). The
+    # triggers point links at the right page when titles come and go;
+    # resolving a title uses the NOCASE index on pages.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS page_links (
+            source_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            target_title TEXT NOT NULL COLLATE NOCASE,  -- as written in the first link
+            target_id INTEGER,  -- NULL while no page has the title
+            PRIMARY KEY(source_id, target_title),
+            FOREIGN KEY(source_id) REFERENCES pages(id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_page_links_target ON page_links(target_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_page_links_title ON page_links(user_id, target_title)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_pages_user_title_nocase ON pages(user_id, title COLLATE NOCASE)")
+    resolve = """
+        SELECT p.id FROM pages p
+        WHERE p.user_id = page_links.user_id AND p.title = page_links.target_title COLLATE NOCASE
+        ORDER BY p.id LIMIT 1
+    """
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS pages_links_insert AFTER INSERT ON pages BEGIN
+            UPDATE page_links SET target_id = new.id
+            WHERE user_id = new.user_id AND target_title = new.title
+              AND (target_id IS NULL OR target_id > new.id);
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS pages_links_title AFTER UPDATE OF title ON pages
+        WHEN new.title IS NOT old.title BEGIN
+            UPDATE page_links SET target_id = ({resolve}) WHERE target_id = new.id;
+            UPDATE page_links SET target_id = new.id
+            WHERE user_id = new.user_id AND target_title = new.title
+              AND (target_id IS NULL OR target_id > new.id);
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS pages_links_delete AFTER DELETE ON pages BEGIN
+            UPDATE page_links SET target_id = ({resolve}) WHERE target_id = old.id;
+        END
+    """)
+    # Cold bodies are read if the archive happens to be attached; otherwise
+    # their links come back when they are edited, or with
+    # python -m twelveb.core.link_store --rebuild
+    for page_id, text in linked_texts(cursor).items():
+        update_links(cursor, page_id, text)
+
+
+@migration(15, "Unicode case folding of database text values")
+def fold_row_values(cursor):
+    # Text values were lowercased by SQLite, which leaves anything beyond
+    # ASCII as it is; fold_case gives the same result for the lowered value
+    # as for the original
+    cursor.execute("""
+        SELECT r.block_id, r.column_id, r.value FROM row_values r
+        JOIN database_columns c ON c.id = r.column_id
+        WHERE c.type = 'text' AND typeof(r.value) = 'text'
+    """)
+    cursor.executemany("UPDATE row_values SET value=? WHERE block_id=? AND column_id=?",
+                       [(fold_case(value), block_id, column_id)
+                        for block_id, column_id, value in cursor.fetchall() if fold_case(value) != value])
+
+
+# Indexes a bulk import drops while it loads (see twelveb/core/importer.py)
+DEFERRED_INDEXES = ("idx_blocks_page_order", "idx_blocks_page_text", "idx_page_tags_tag")
+
+
+def restore_bulk_load_schema(cursor):
+    # Puts back the search triggers and deferred indexes and rebuilds the
+    # search index from the rows
+    create_indexes(cursor)
+    create_order_indexes(cursor)
+    create_database_indexes(cursor)
+    create_search_index(cursor)
+
+
+def bulk_load_schema_missing(cursor):
+    # An import that was interrupted before it finished leaves them dropped
+    names = SEARCH_TRIGGERS + DEFERRED_INDEXES
+    cursor.execute(f"""
+        SELECT count(*) FROM sqlite_master
+        WHERE type IN ('trigger', 'index') AND name IN ({",".join("?" * len(names))})
+    """, names)
+    return cursor.fetchone()[0] < len(names)
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    # Applies every pending step in order and returns the versions applied
+    if conn.in_transaction:
+        conn.commit()
+    current = schema_version(conn)
+    applied = []
+    for version, description, step in MIGRATIONS:
+        if version <= current:
+            continue
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            step(cursor)
+            cursor.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(version)
+    repaired = False
+    if schema_version(conn) >= MIGRATIONS[-1][0]:
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            repaired = bulk_load_schema_missing(cursor)
+            if repaired:
+                restore_bulk_load_schema(cursor)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    if applied or repaired:
+        # Give the planner fresh statistics for the new indexes
+        conn.execute("ANALYZE")
+        conn.commit()
+    return applied
+
+
+# Queries that run on every click or keystroke. None of them may scan a table.
+HOT_QUERIES = {
+    "top level pages": ("""
+        SELECT p.id, p.title, EXISTS(SELECT 1 FROM pages c WHERE c.parent_id = p.id)
+        FROM pages p WHERE p.user_id=? AND p.parent_id IS ? ORDER BY p.order_key
+    """, (1, None)),
+    "child pages": ("""
+        SELECT p.id, p.title, EXISTS(SELECT 1 FROM pages c WHERE c.parent_id = p.id)
+        FROM pages p WHERE p.user_id=? AND p.parent_id IS ? ORDER BY p.order_key
+    """, (1, 1)),
+    "page by title": ("SELECT id FROM pages WHERE title=? AND user_id=?", ("Welcome to TwelveB", 1)),
+    "page content": ("SELECT title, content, color FROM pages WHERE id=?", (1,)),
+    "sticky notes of page": ("""
+        SELECT id, content, color, position_x, position_y FROM sticky_notes
+        WHERE page_id=? AND id>? ORDER BY id LIMIT ?
+    """, (1, 0, 500)),
+    "blocks of page": ("""
+        SELECT id, content FROM blocks WHERE page_id=? AND type != 'row' ORDER BY order_key, id
+    """, (1,)),
+    "rows of database": ("SELECT id FROM blocks WHERE page_id=? AND type = 'row' ORDER BY order_key", (1,)),
+    "columns of database": ("""
+        SELECT id, key, name, type, options FROM database_columns WHERE page_id=? ORDER BY order_key
+    """, (1,)),
+    "rows by value": ("""
+        SELECT s.block_id FROM row_values s
+        WHERE s.column_id = ? AND EXISTS (SELECT 1 FROM row_values f WHERE f.block_id = s.block_id
+                                          AND f.column_id = ? AND f.value >= ?)
+        ORDER BY s.value, s.block_id
+    """, (1, 2, 0)),
+    "rows without value": ("""
+        SELECT b.id FROM blocks b
+        WHERE b.page_id = ? AND b.type = 'row'
+          AND NOT EXISTS (SELECT 1 FROM row_values s WHERE s.block_id = b.id AND s.column_id = ?)
+        ORDER BY b.order_key
+    """, (1, 1)),
+    "row values of column": ("SELECT block_id, value FROM row_values WHERE column_id=?", (1,)),
+    "links of page": ("SELECT target_title FROM page_links WHERE source_id=?", (1,)),
+    "resolve link": ("SELECT id FROM pages WHERE user_id = ? AND title = ? COLLATE NOCASE ORDER BY id LIMIT 1",
+                     (1, "a")),
+    "backlinks": ("""
+        SELECT l.source_id, (SELECT title FROM pages WHERE id = l.source_id) AS title FROM page_links l
+        WHERE l.target_id = ? AND l.source_id != l.target_id ORDER BY title
+    """, (1,)),
+    "outgoing links": ("""
+        SELECT l.target_id, coalesce((SELECT title FROM pages WHERE id = l.target_id), l.target_title) AS title
+        FROM page_links l WHERE l.source_id = ? ORDER BY title COLLATE NOCASE
+    """, (1,)),
+    "orphan pages": ("""
+        SELECT p.id, p.title FROM pages p
+        WHERE p.user_id = ?
+          AND NOT EXISTS (SELECT 1 FROM page_links l WHERE l.target_id = p.id AND l.source_id != p.id)
+          AND NOT EXISTS (SELECT 1 FROM page_links l WHERE l.source_id = p.id AND l.target_id IS NOT NULL
+                          AND l.target_id != p.id)
+        ORDER BY p.title
+    """, (1,)),
+    "tags of user": ("SELECT id, name, color, page_count FROM tags WHERE user_id=? ORDER BY name", (1,)),
+    "tag revisions": ("SELECT id, name, revision FROM tags WHERE user_id=? ORDER BY name", (1,)),
+    "pages of tag": ("SELECT page_id FROM page_tags WHERE tag_id=?", (1,)),
+    "tags of page": ("""
+        SELECT t.name FROM page_tags pt JOIN tags t ON t.id = pt.tag_id WHERE pt.page_id=? ORDER BY t.name
+    """, (1,)),
+    "search pages": ("""
+        SELECT p.id FROM pages_fts CROSS JOIN pages p ON p.id = pages_fts.rowid
+        WHERE pages_fts MATCH ? AND p.user_id = ?
+    """, ('"x"*', 1)),
+    "page body": ("SELECT tier, data FROM page_bodies WHERE page_id=?", (1,)),
+    "search blocks": ("""
+        SELECT p.id FROM blocks_fts
+        CROSS JOIN blocks b ON b.id = blocks_fts.rowid
+        JOIN pages p ON p.id = b.page_id
+        WHERE blocks_fts MATCH ? AND p.user_id = ?
+    """, ('"x"*', 1)),
+    "settings": ("SELECT dark_mode, font_size, theme FROM settings WHERE user_id=?", (1,)),
+    "session": ("""
+        SELECT last_page_id, sash_position, editor_sash_position, expanded, welcome_created
+        FROM sessions WHERE user_id=?
+    """, (1,)),
+    "page versions": ("SELECT id, created_at, size FROM page_versions WHERE page_id=? ORDER BY id DESC", (1,)),
+    "page keyframe": ("SELECT max(id) FROM page_versions WHERE page_id=? AND kind='key' AND id <= ?", (1, 1)),
+    "login": ("SELECT id FROM users WHERE username=? AND password=?", ("a", "b")),
+}
+
+
+def full_scans(conn, queries=None):
+    # Returns (query name, plan detail) for every plan step that scans a table
+    offenders = []
+    for name, (sql, params) in (queries or HOT_QUERIES).items():
+        for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params):
+            detail = row[-1]
+            if detail.startswith("SCAN ") and "VIRTUAL TABLE" not in detail:
+                offenders.append((name, detail))
+    return offenders
+
+
+def check_query_plans(conn, queries=None):
+    offenders = full_scans(conn, queries)
+    assert not offenders, "Full scans in hot queries: " + "; ".join(
+        f"{name}: {detail}" for name, detail in offenders)
+
+
+if __name__ == "__main__":
+    db_name = sys.argv[1] if len(sys.argv) > 1 else "twelveb.db"
+    conn = sqlite3.connect(db_name)
+    applied = migrate(conn)
+    print(f"{db_name}: schema version {schema_version(conn)}, applied {applied or 'nothing'}")
+    check_query_plans(conn)
+    print("No full scans in hot queries.")
+    conn.close()
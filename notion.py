@@ -1,13 +1,21 @@
-import sqlite3
 import wx
+from twelveb.core import ChecklistStore, DatabaseManager, SettingsStore, UserStore
+
+# The checklist app keeps its own database with a different schema
+NOTES_DB = "registered.db"
 
 class NotionApp(wx.Frame):
     def __init__(self, user_id, *args, **kwargs):
         super(NotionApp, self).__init__(*args, **kwargs)
         self.dark_mode = self.load_dark_mode_state()
         self.init_ui()
-        self.conn = sqlite3.connect("registered.db")
-        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.db = DatabaseManager.shared(NOTES_DB, migrate_schema=False)
+        self.notes = ChecklistStore(self.db, *ChecklistStore.PERSONAL)
+        self.notes2 = ChecklistStore(self.db, *ChecklistStore.CAREER)
+        self.settings = SettingsStore(self.db, key_column="id")
+        # Ids of the items shown in each list, by row, so rows map to records
+        self.note_ids = []
+        self.note2_ids = []
         self.user_id = user_id  # Oturum açmış kullanıcı ID'si burada saklanıyor
 
     def init_ui(self):
@@ -73,7 +81,8 @@ class NotionApp(wx.Frame):
         vbox.Add(dark_mode_button, flag=wx.EXPAND | wx.ALL, border=10)
 
         panel.SetSizer(vbox)
-        self.Bind(wx.EVT_CHECKLISTBOX, self.on_check)
+        self.listbox.Bind(wx.EVT_CHECKLISTBOX, self.on_check)
+        self.todo_listbox.Bind(wx.EVT_CHECKLISTBOX, self.on_check2)
         self.Layout()
 
     def get_current_user_id(self):
@@ -96,36 +105,23 @@ class NotionApp(wx.Frame):
             self.text_ctrl.Clear()
 
     def add_note(self, user_id, note):
-        cursor = self.conn.cursor()
-        cursor.execute("INSERT INTO notes (user_id, note) VALUES (?, ?)", (user_id, note))
-        self.conn.commit()
+        self.notes.add(user_id, note)
         print("Not kaydedildi:", note)
 
     def add_note2(self, user_id, note2):
-        cursor = self.conn.cursor()
-        cursor.execute("INSERT INTO notes2 (user_id, note2) VALUES (?, ?)", (user_id, note2))
-        self.conn.commit()
+        self.notes2.add(user_id, note2)
         print("Not kaydedildi:", note2)
 
     def show_notes(self):
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT note, checked FROM notes WHERE user_id=?", (self.user_id,))
-        notes = cursor.fetchall()
-
-        self.listbox.Clear()
-        for note, checked in notes:
-            self.listbox.Append(note)
-            if checked:
-                self.listbox.Check(self.listbox.GetCount() - 1)
+        self.note_ids = self.fill_listbox(self.listbox, self.notes.items(self.user_id))
 
     def show_notes2(self):
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT note2 FROM notes2 WHERE user_id=?", (self.user_id,))
-        notes2 = cursor.fetchall()
+        self.note2_ids = self.fill_listbox(self.todo_listbox, self.notes2.items(self.user_id))
 
-        self.todo_listbox.Clear()
-        for note2 in notes2:
-            self.todo_listbox.Append(note2[0])
+    def fill_listbox(self, listbox, items):
+        listbox.Set([text for item_id, text, checked in items])
+        listbox.SetCheckedItems([row for row, (item_id, text, checked) in enumerate(items) if checked])
+        return [item_id for item_id, text, checked in items]
 
     def on_edit(self, event):
         selection = self.listbox.GetSelection()
@@ -136,7 +132,7 @@ class NotionApp(wx.Frame):
             if dialog.ShowModal() == wx.ID_OK:
                 new_note = dialog.GetValue()
                 if new_note and new_note != current_note:
-                    self.edit_note(current_note, new_note)
+                    self.edit_note(self.note_ids[selection], new_note)
                     self.show_notes()
             dialog.Destroy()
 
@@ -149,43 +145,33 @@ class NotionApp(wx.Frame):
             if dialog.ShowModal() == wx.ID_OK:
                 new_note2 = dialog.GetValue()
                 if new_note2 and new_note2 != current_note2:
-                    self.edit_note2(current_note2, new_note2)
+                    self.edit_note2(self.note2_ids[selection], new_note2)
                     self.show_notes2()
             dialog.Destroy()
 
-    def edit_note2(self, current_note2, new_note2):
-        cursor = self.conn.cursor()
-        cursor.execute("UPDATE notes2 SET note2=? WHERE user_id=? AND note2=?", (new_note2, self.user_id, current_note2))
-        self.conn.commit()
+    def edit_note2(self, note2_id, new_note2):
+        self.notes2.rename(note2_id, new_note2)
 
-    def edit_note(self, current_note, new_note):
-        cursor = self.conn.cursor()
-        cursor.execute("UPDATE notes SET note=? WHERE user_id=? AND note=?", (new_note, self.user_id, current_note))
-        self.conn.commit()
+    def edit_note(self, note_id, new_note):
+        self.notes.rename(note_id, new_note)
 
     def on_delete(self, event):
         selection = self.listbox.GetSelection()
         if selection != wx.NOT_FOUND:
-            note = self.listbox.GetString(selection)
-            self.delete_note(note)
+            self.delete_note(self.note_ids[selection])
             self.show_notes()
 
     def on_delete2(self, event):
         selection = self.todo_listbox.GetSelection()
         if selection != wx.NOT_FOUND:
-            note2 = self.todo_listbox.GetString(selection)
-            self.delete_note2(note2)
+            self.delete_note2(self.note2_ids[selection])
             self.show_notes2()
 
-    def delete_note(self, note):
-        cursor = self.conn.cursor()
-        cursor.execute("DELETE FROM notes WHERE user_id=? AND note=?", (self.user_id, note))
-        self.conn.commit()
+    def delete_note(self, note_id):
+        self.notes.delete(note_id)
 
-    def delete_note2(self, note2):
-        cursor = self.conn.cursor()
-        cursor.execute("DELETE FROM notes2 WHERE user_id=? AND note2=?", (self.user_id, note2))
-        self.conn.commit()
+    def delete_note2(self, note2_id):
+        self.notes2.delete(note2_id)
 
     def on_exit(self, event):
         self.Close(True)  # Uygulamayı kapat
@@ -195,44 +181,21 @@ class NotionApp(wx.Frame):
 
     def on_check(self, event):
         index = event.GetInt()
-        if index < 0 or index >= self.listbox.GetCount():
+        if index < 0 or index >= len(self.note_ids):
             print(f"Geçersiz indeks: {index}")
             return
-
-        note = self.listbox.GetString(index)
         checked = self.listbox.IsChecked(index)
-
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM notes WHERE user_id=? AND note=?", (self.user_id, note))
-        result = cursor.fetchone()
-
-        if result and result[0] > 0:
-            cursor.execute("UPDATE notes SET checked=? WHERE user_id=? AND note=?", (int(checked), self.user_id, note))
-            self.conn.commit()
-            print(f"Updated note '{note}' to {'checked' if checked else 'unchecked'}.")
-        else:
-            print(f"Note '{note}' not found for user_id {self.user_id}")
+        self.notes.set_checked(self.note_ids[index], checked)
+        print(f"Updated note '{self.listbox.GetString(index)}' to {'checked' if checked else 'unchecked'}.")
 
     def on_check2(self, event):
         index = event.GetInt()
-        if index < 0 or index >= self.todo_listbox.GetCount():
+        if index < 0 or index >= len(self.note2_ids):
             print(f"Geçersiz indeks: {index}")
             return
-
-        note2 = self.todo_listbox.GetString(index)
         checked = self.todo_listbox.IsChecked(index)
-
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM notes2 WHERE user_id=? AND note2=?", (self.user_id, note2))
-        result = cursor.fetchone()
-
-        if result and result[0] > 0:
-            cursor.execute("UPDATE notes2 SET checked=? WHERE user_id=? AND note2=?",
-                           (int(checked), self.user_id, note2))
-            self.conn.commit()
-            print(f"Updated note '{note2}' to {'checked' if checked else 'unchecked'}.")
-        else:
-            print(f"Note '{note2}' not found for user_id {self.user_id}")
+        self.notes2.set_checked(self.note2_ids[index], checked)
+        print(f"Updated note '{self.todo_listbox.GetString(index)}' to {'checked' if checked else 'unchecked'}.")
 
     def load_dark_mode_state(self):
         try:
@@ -247,9 +210,7 @@ class NotionApp(wx.Frame):
         self.save_dark_mode_state_to_db()
 
     def save_dark_mode_state_to_db(self):
-        cursor = self.conn.cursor()
-        cursor.execute("UPDATE settings SET dark_mode = ? WHERE id = 1", (int(self.dark_mode),))
-        self.conn.commit()
+        self.settings.set_dark_mode(1, self.dark_mode)
 
     def apply_dark_mode(self):
         # Dark mode aktifse arayüz renklerini değiştir
@@ -316,12 +277,9 @@ class LoginDialog(wx.Dialog):
     def on_forgot_password(self, event):
         username = wx.GetTextFromUser("Lütfen kullanıcı adınızı girin:", "Şifremi Unuttum")
         if username:
-            conn = sqlite3.connect("registered.db")
-            cursor = conn.cursor()
-            cursor.execute("SELECT password FROM users WHERE username=?", (username,))
-            user = cursor.fetchone()
-            if user:
-                wx.MessageBox(f"Şifreniz: {user[0]}", "Şifreniz", wx.OK | wx.ICON_INFORMATION)
+            password = UserStore(DatabaseManager.shared(NOTES_DB, migrate_schema=False)).password(username)
+            if password is not None:
+                wx.MessageBox(f"Şifreniz: {password}", "Şifreniz", wx.OK | wx.ICON_INFORMATION)
             else:
                 wx.MessageBox("Kullanıcı adı bulunamadı!", "Hata", wx.OK | wx.ICON_ERROR)
 
@@ -331,21 +289,9 @@ class LoginDialog(wx.Dialog):
             wx.MessageBox("Kayıt başarıyla tamamlandı! Lütfen giriş yapın.", "Başarılı", wx.OK | wx.ICON_INFORMATION)
 
     def on_login(self, event):
-        def login(username, password):
-            conn = sqlite3.connect("registered.db")
-            cursor = conn.cursor()
-            cursor.execute("SELECT id FROM users WHERE username=? AND password=?", (username, password))
-            user = cursor.fetchone()
-            conn.close()
-
-            if user:
-                return user[0]
-            else:
-                return None
-
         username = self.username_textctrl.GetValue()
         password = self.password_textctrl.GetValue()
-        user_id = login(username, password)
+        user_id = UserStore(DatabaseManager.shared(NOTES_DB, migrate_schema=False)).authenticate(username, password)
         if user_id is not None:
             app = wx.GetApp()
             app.frame = NotionApp(user_id, None)
@@ -391,11 +337,7 @@ class RegisterDialog(wx.Dialog):
         username = self.username_textctrl.GetValue()
         password = self.password_textctrl.GetValue()
         if username and password:
-            conn = sqlite3.connect("registered.db")  # Veritabanı burada açılıyor
-            cursor = conn.cursor()
-            cursor.execute("INSERT INTO users (username, password) VALUES (?, ?)", (username, password))
-            conn.commit()
-            conn.close()  # Veritabanı burada kapanıyor
+            UserStore(DatabaseManager.shared(NOTES_DB, migrate_schema=False)).register(username, password)
             self.EndModal(wx.ID_OK)
         else:
             wx.MessageBox("Kullanıcı adı ve şifre boş bırakılamaz!", "Hata", wx.OK | wx.ICON_ERROR)
@@ -0,0 +1,174 @@
+# Order keys: strings that sort in the order of the rows they belong to, so
+# putting a row between two others only writes that one row.
+#
+# A key is an integer part followed by an optional fraction, in base 62
+# digits that sort the same way as text. The first character of the integer
+# part gives its length ("a" is two characters, "b" three, ..., "A" 27 and
+# "Z" two again for the negative integers), so appending after the last key
+# just counts up: a0, a1, ..., az, b00, ... The fraction is what makes room
+# between neighbours; it never ends in "0", so there is always a key between
+# two others. Keys only get long when many rows are put into the same gap,
+# which is what rebalance() is for.
+#
+# Based on "Implementing Fractional Indexing" by David Greenspan.
+
+DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+SMALLEST_INTEGER = "A" + "0" * 26
+# Keys longer than this are worth a rebalance of their siblings
+MAX_KEY_LENGTH = 16
+
+
+def integer_length(head):
+    if "a" <= head <= "z":
+        return ord(head) - ord("a") + 2
+    if "A" <= head <= "Z":
+        return ord("Z") - ord(head) + 2
+    raise ValueError(f"invalid order key head {head!r}")
+
+
+def split_key(key):
+    length = integer_length(key[0])
+    if len(key) < length:
+        raise ValueError(f"invalid order key {key!r}")
+    return key[:length], key[length:]
+
+
+def midpoint(a, b):
+    # A fraction strictly between a and b (b None means no upper bound)
+    if b is not None and a >= b:
+        raise ValueError(f"{a!r} is not below {b!r}")
+    if b is not None:
+        # Skip the digits a and b have in common, a padded with zeros
+        n = 0
+        while n < len(b) and (a[n] if n < len(a) else "0") == b[n]:
+            n += 1
+        if n:
+            return b[:n] + midpoint(a[n:], b[n:])
+    digit_a = DIGITS.index(a[0]) if a else 0
+    digit_b = DIGITS.index(b[0]) if b is not None else len(DIGITS)
+    if digit_b - digit_a > 1:
+        return DIGITS[(digit_a + digit_b + 1) // 2]
+    # Consecutive digits: keep a's digit and go one place further
+    if b is not None and len(b) > 1:
+        return b[:1]
+    return DIGITS[digit_a] + midpoint(a[1:], None)
+
+
+def increment_integer(integer):
+    head, digits = integer[0], list(integer[1:])
+    carry = True
+    for i in reversed(range(len(digits))):
+        index = DIGITS.index(digits[i]) + 1
+        if index == len(DIGITS):
+            digits[i] = "0"
+        else:
+            digits[i] = DIGITS[index]
+            carry = False
+            break
+    if not carry:
+        return head + "".join(digits)
+    if head == "Z":
+        return "a0"
+    if head == "z":
+        return None
+    head = chr(ord(head) + 1)
+    if head > "a":
+        digits.append("0")
+    else:
+        digits.pop()
+    return head + "".join(digits)
+
+
+def decrement_integer(integer):
+    head, digits = integer[0], list(integer[1:])
+    borrow = True
+    for i in reversed(range(len(digits))):
+        index = DIGITS.index(digits[i]) - 1
+        if index == -1:
+            digits[i] = DIGITS[-1]
+        else:
+            digits[i] = DIGITS[index]
+            borrow = False
+            break
+    if not borrow:
+        return head + "".join(digits)
+    if head == "a":
+        return "Z" + DIGITS[-1]
+    if head == "A":
+        return None
+    head = chr(ord(head) - 1)
+    if head < "Z":
+        digits.append(DIGITS[-1])
+    else:
+        digits.pop()
+    return head + "".join(digits)
+
+
+def key_between(a, b):
+    # A key that sorts after a and before b; None stands for either end
+    if a is not None and b is not None and a >= b:
+        raise ValueError(f"{a!r} is not below {b!r}")
+    if a is None and b is None:
+        return "a0"
+    if a is None:
+        integer, fraction = split_key(b)
+        if integer == SMALLEST_INTEGER:
+            return integer + midpoint("", fraction)
+        if integer < b:
+            return integer
+        return decrement_integer(integer)
+    if b is None:
+        integer, fraction = split_key(a)
+        following = increment_integer(integer)
+        return integer + midpoint(fraction, None) if following is None else following
+    integer_a, fraction_a = split_key(a)
+    integer_b, fraction_b = split_key(b)
+    if integer_a == integer_b:
+        return integer_a + midpoint(fraction_a, fraction_b)
+    following = increment_integer(integer_a)
+    if following is not None and following < b:
+        return following
+    return integer_a + midpoint(fraction_a, None)
+
+
+def keys_between(a, b, count):
+    # count keys in order between a and b, as short as they can be
+    if count <= 0:
+        return []
+    if b is None:
+        keys = []
+        key = a
+        for _ in range(count):
+            key = key_between(key, None)
+            keys.append(key)
+        return keys
+    if a is None:
+        keys = []
+        key = b
+        for _ in range(count):
+            key = key_between(None, key)
+            keys.append(key)
+        return keys[::-1]
+    middle = count // 2
+    key = key_between(a, b)
+    return keys_between(a, key, middle) + [key] + keys_between(key, b, count - middle - 1)
+
+
+def spread_keys(count):
+    # Fresh, evenly spaced keys for count rows, used when rebalancing
+    if count <= 0:
+        return []
+    width = 1
+    while len(DIGITS) ** width < count + 1:
+        width += 1
+    step = len(DIGITS) ** width // (count + 1)
+    head = "abcdefghijklmnopqrstuvwxyz"[width - 1]
+    keys = []
+    for i in range(1, count + 1):
+        value = i * step
+        digits = []
+        for _ in range(width):
+            value, digit = divmod(value, len(DIGITS))
+            digits.append(DIGITS[digit])
+        keys.append(head + "".join(reversed(digits)))
+    return keys
@@ -0,0 +1,103 @@
+import os
+import zlib
+
+# Page bodies kept out of the blocks table.
+#
+# Pages nobody has edited for a while do not need to be editable block by
+# block. Their text is stored as one body instead: in page_bodies in the
+# main database ("packed"), or in the archive database next to it ("cold"),
+# which keeps the main file small. Every body starts with a one-byte format
+# marker; bodies above COMPRESS_MIN_BYTES are zlib-compressed. Editing such
+# a page splits it back into blocks (see twelveb/core/storage_tiers.py).
+
+ARCHIVE = "archive"
+RAW = b"t"
+ZLIB = b"z"
+COMPRESS_MIN_BYTES = 1024
+
+
+def encode_body(text):
+    data = text.encode("utf-8")
+    if len(data) >= COMPRESS_MIN_BYTES:
+        compressed = zlib.compress(data, 6)
+        if len(compressed) < len(data):
+            return ZLIB + compressed
+    return RAW + data
+
+
+def decode_body(data):
+    data = bytes(data)
+    marker, payload = data[:1], data[1:]
+    if marker == ZLIB:
+        payload = zlib.decompress(payload)
+    elif marker != RAW:
+        raise ValueError(f"Unknown page body format {marker!r}")
+    return payload.decode("utf-8")
+
+
+def archive_path(db_name):
+    # twelveb.db keeps its cold pages in twelveb.archive.db
+    root, ext = os.path.splitext(db_name)
+    return root + ".archive" + (ext or ".db")
+
+
+def archive_attached(conn):
+    return any(row[1] == ARCHIVE for row in conn.execute("PRAGMA database_list"))
+
+
+def attach_archive(conn, path, read_only=False):
+    # read_only connections must have been opened with uri=True
+    if archive_attached(conn):
+        return True
+    if read_only:
+        if not os.path.exists(path):
+            return False
+        conn.execute(f"ATTACH DATABASE ? AS {ARCHIVE}", ("file:" + os.path.abspath(path) + "?mode=ro",))
+        return True
+    # Creates the file if it does not exist yet
+    conn.execute(f"ATTACH DATABASE ? AS {ARCHIVE}", (path,))
+    conn.execute(f"PRAGMA {ARCHIVE}.journal_mode = WAL")
+    conn.execute(f"PRAGMA {ARCHIVE}.synchronous = NORMAL")
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {ARCHIVE}.page_bodies (
+            page_id INTEGER PRIMARY KEY,
+            data BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            archived_at TIMESTAMP
+        )
+    """)
+    return True
+
+
+def ensure_archive(conn):
+    # Connections not made by DatabaseManager (worker processes, scripts)
+    # attach the archive the first time they read a cold page
+    if archive_attached(conn):
+        return True
+    if conn.in_transaction:
+        return False
+    main_file = next((row[2] for row in conn.execute("PRAGMA database_list") if row[1] == "main"), "")
+    path = archive_path(main_file) if main_file else None
+    if not path or not os.path.exists(path):
+        return False
+    conn.execute(f"ATTACH DATABASE ? AS {ARCHIVE}", (path,))
+    return True
+
+
+def read_body(conn, page_id):
+    # The stored body of a packed or cold page, or None
+    cursor = conn.cursor()
+    cursor.execute("SELECT tier, data FROM page_bodies WHERE page_id=?", (page_id,))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    tier, data = row
+    if data is None:
+        if not ensure_archive(conn):
+            return None
+        cursor.execute(f"SELECT data FROM {ARCHIVE}.page_bodies WHERE page_id=?", (page_id,))
+        archived = cursor.fetchone()
+        if archived is None:
+            return None
+        data = archived[0]
+    return decode_body(data)
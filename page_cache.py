@@ -0,0 +1,70 @@
+import sys
+from collections import OrderedDict
+
+
+class PageState:
+    __slots__ = ("title", "content", "color", "sticky_notes", "notes_complete")
+
+    def __init__(self, title, content, color, sticky_notes, notes_complete=True):
+        self.title = title
+        self.content = content
+        self.color = color
+        self.sticky_notes = sticky_notes
+        # False while later batches of a large board are still being fetched
+        self.notes_complete = notes_complete
+
+    def size(self):
+        # Rough footprint in bytes, dominated by the page body
+        total = sys.getsizeof(self.title) + sys.getsizeof(self.content or "")
+        for note in self.sticky_notes:
+            total += sum(sys.getsizeof(field) for field in note)
+        return total
+
+
+class PageCache:
+    # LRU of decoded page state, bounded by an estimate of its memory use.
+    # Entries are only kept coherent with writes made through the app's own
+    # update paths, which must call update() or invalidate().
+    MAX_BYTES = 64 * 1024 * 1024
+
+    def __init__(self, max_bytes=None):
+        self.max_bytes = max_bytes or self.MAX_BYTES
+        self.entries = OrderedDict()
+        self.sizes = {}
+        self.total_bytes = 0
+
+    def get(self, page_id):
+        state = self.entries.get(page_id)
+        if state is not None:
+            self.entries.move_to_end(page_id)
+        return state
+
+    def put(self, page_id, state):
+        self.invalidate(page_id)
+        size = state.size()
+        if size > self.max_bytes:
+            return
+        self.entries[page_id] = state
+        self.sizes[page_id] = size
+        self.total_bytes += size
+        while self.total_bytes > self.max_bytes:
+            oldest, _ = self.entries.popitem(last=False)
+            self.total_bytes -= self.sizes.pop(oldest)
+
+    def update(self, page_id, **fields):
+        # Write-through for a cached page; unknown pages are simply not cached
+        state = self.entries.get(page_id)
+        if state is None:
+            return
+        for name, value in fields.items():
+            setattr(state, name, value)
+        self.put(page_id, state)
+
+    def invalidate(self, page_id):
+        if self.entries.pop(page_id, None) is not None:
+            self.total_bytes -= self.sizes.pop(page_id)
+
+    def clear(self):
+        self.entries.clear()
+        self.sizes.clear()
+        self.total_bytes = 0
@@ -0,0 +1,206 @@
+import wx
+
+
+class PageTree:
+    # Lazily populated view of the page hierarchy on top of a wx.TreeCtrl.
+    # Only the top level is read up front; children are fetched the first
+    # time their parent is expanded. Creating, renaming and moving a page
+    # patch the one affected node instead of rebuilding the control.
+    # All reads run on the DatabaseWorker and fill the tree when they return.
+    LOADING_LABEL = "Loading…"
+
+    def __init__(self, tree, worker, pages, user_id):
+        self.tree = tree
+        self.worker = worker
+        self.pages = pages
+        self.user_id = user_id
+        self.items = {}
+        self.loaded = set()
+        self.loading = {}
+        self.showing_results = False
+        self.root = None
+        self.generation = 0
+        self.tree.Bind(wx.EVT_TREE_ITEM_EXPANDING, self.on_expanding)
+
+    def reset(self, label):
+        # Results of loads started before a reset belong to items that are gone
+        self.generation += 1
+        self.tree.DeleteAllItems()
+        self.root = self.tree.AddRoot(label)
+        self.items = {None: self.root}
+        self.loaded = set()
+        self.loading = {}
+
+    def load_top_level(self, on_loaded=None):
+        self.showing_results = False
+        self.reset("My Pages")
+        self.request_children(None, on_loaded)
+        self.tree.Expand(self.root)
+
+    def restore(self, children, expanded):
+        # Startup: children is {parent_id: rows} read in one job, for the top
+        # level and the pages that were expanded when the app was closed
+        self.showing_results = False
+        self.reset("My Pages")
+        for parent_id in [None] + list(expanded):
+            if parent_id in self.items and parent_id in children:
+                self.on_children_loaded(self.generation, parent_id, children[parent_id])
+                if parent_id is not None:
+                    self.tree.Expand(self.items[parent_id])
+        self.tree.Expand(self.root)
+
+    def expanded_page_ids(self):
+        # Parents come before their children, the order restore() needs
+        expanded = []
+        stack = [self.root]
+        while stack:
+            item = stack.pop()
+            children = []
+            child, cookie = self.tree.GetFirstChild(item)
+            while child.IsOk():
+                children.append(child)
+                child, cookie = self.tree.GetNextChild(item, cookie)
+            for child in reversed(children):
+                page_id = self.tree.GetItemData(child)
+                if page_id is not None and page_id in self.loaded and self.tree.IsExpanded(child):
+                    expanded.append(page_id)
+                    stack.append(child)
+        return expanded
+
+    def show_loading(self, label):
+        self.showing_results = True
+        self.reset(label)
+        self.tree.AppendItem(self.root, self.LOADING_LABEL)
+        self.tree.Expand(self.root)
+
+    def show_results(self, label, rows):
+        # rows are (page_id, label) pairs shown as a flat list
+        self.showing_results = True
+        self.reset(label)
+        for page_id, text in rows:
+            item = self.tree.AppendItem(self.root, text)
+            self.tree.SetItemData(item, page_id)
+            self.items[page_id] = item
+        self.tree.Expand(self.root)
+
+    def request_children(self, parent_id, on_loaded=None):
+        if parent_id in self.loaded or parent_id in self.loading:
+            return
+        parent_item = self.items[parent_id]
+        # Placeholder item, plus pages added while the load is in flight
+        self.loading[parent_id] = (self.tree.AppendItem(parent_item, self.LOADING_LABEL), [])
+        generation = self.generation
+        user_id = self.user_id
+        self.worker.submit(
+            lambda db: self.pages.children(user_id, parent_id),
+            lambda rows: self.on_children_loaded(generation, parent_id, rows, on_loaded),
+            key=("children", parent_id),
+            after_writes=True,
+        )
+
+    def on_children_loaded(self, generation, parent_id, rows, on_loaded=None):
+        if generation != self.generation or parent_id not in self.items:
+            return
+        placeholder, added = self.loading.pop(parent_id, (None, []))
+        if placeholder is not None and placeholder.IsOk():
+            self.tree.Delete(placeholder)
+        parent_item = self.items[parent_id]
+        for page_id, title, has_children in list(rows) + added:
+            if page_id not in self.items:
+                self.append_node(parent_item, page_id, title, has_children)
+        self.loaded.add(parent_id)
+        if parent_item != self.root and not rows and not added:
+            self.tree.SetItemHasChildren(parent_item, False)
+        if on_loaded is not None:
+            on_loaded()
+
+    def append_node(self, parent_item, page_id, title, has_children=False, before_id=None):
+        # Last child of parent_item, or just before the child before_id
+        before = self.items.get(before_id) if before_id is not None else None
+        if before is not None and self.tree.GetItemParent(before) == parent_item:
+            previous = self.tree.GetPrevSibling(before)
+            if previous.IsOk():
+                item = self.tree.InsertItem(parent_item, previous, title)
+            else:
+                item = self.tree.PrependItem(parent_item, title)
+        else:
+            item = self.tree.AppendItem(parent_item, title)
+        self.tree.SetItemData(item, page_id)
+        self.tree.SetItemHasChildren(item, bool(has_children))
+        self.items[page_id] = item
+        return item
+
+    def page_id_of(self, item):
+        if not item or not item.IsOk() or item == self.root:
+            return None
+        return self.tree.GetItemData(item)
+
+    def on_expanding(self, event):
+        page_id = self.page_id_of(event.GetItem())
+        if page_id is not None and not self.showing_results:
+            self.request_children(page_id)
+
+    def is_ancestor(self, ancestor_id, page_id):
+        # Walks up the loaded tree; every ancestor of a visible node is loaded
+        item = self.items.get(page_id)
+        while item and item.IsOk() and item != self.root:
+            if self.tree.GetItemData(item) == ancestor_id:
+                return True
+            item = self.tree.GetItemParent(item)
+        return False
+
+    def add_page(self, page_id, title, parent_id=None, has_children=False, before_id=None):
+        if self.showing_results:
+            return None
+        parent_item = self.items.get(parent_id)
+        if parent_item is None:
+            # Parent is collapsed somewhere below an unloaded node
+            return None
+        if parent_id in self.loaded:
+            return self.append_node(parent_item, page_id, title, has_children, before_id)
+        if parent_id in self.loading:
+            # The load may have read the table before this page was written
+            self.loading[parent_id][1].append((page_id, title, has_children))
+            return None
+        # Not loaded yet: expanding the parent will fetch the page
+        self.tree.SetItemHasChildren(parent_item, True)
+        return None
+
+    def rename_page(self, page_id, title):
+        item = self.items.get(page_id)
+        if item is not None and not self.showing_results:
+            self.tree.SetItemText(item, title)
+
+    def remove_page(self, page_id):
+        item = self.items.get(page_id)
+        if item is None:
+            return
+        parent_item = self.tree.GetItemParent(item)
+        self.forget_subtree(item)
+        self.tree.Delete(item)
+        if parent_item.IsOk() and parent_item != self.root and not self.tree.GetChildrenCount(parent_item, False):
+            self.tree.SetItemHasChildren(parent_item, False)
+
+    def move_page(self, page_id, title, new_parent_id, before_id=None):
+        # The moved page keeps its children in the database; they load lazily again
+        item = self.items.get(page_id)
+        has_children = item is not None and self.tree.ItemHasChildren(item)
+        self.remove_page(page_id)
+        return self.add_page(page_id, title, new_parent_id, has_children, before_id)
+
+    def next_sibling_id(self, page_id):
+        item = self.items.get(page_id)
+        if item is None:
+            return None
+        return self.page_id_of(self.tree.GetNextSibling(item))
+
+    def forget_subtree(self, item):
+        page_id = self.tree.GetItemData(item)
+        if page_id is not None:
+            self.items.pop(page_id, None)
+            self.loaded.discard(page_id)
+            self.loading.pop(page_id, None)
+        child, cookie = self.tree.GetFirstChild(item)
+        while child.IsOk():
+            self.forget_subtree(child)
+            child, cookie = self.tree.GetNextChild(item, cookie)
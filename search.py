@@ -0,0 +1,216 @@
+import re
+import unicodedata
+
+from page_bodies import read_body
+
+# Full-text search over page titles, page bodies and blocks, backed by FTS5.
+#
+# unicode61 does not know Turkish casing: it keeps "İ" as is and never maps
+# the dotless "ı" to "i". Both sides are therefore folded the same way before
+# tokenizing, in SQL for the index and in Python for the query, so
+# "IŞIK", "ışık" and "isik" all match each other.
+
+TOKENIZER = "unicode61 remove_diacritics 2"
+SNIPPET_OPEN = "«"
+SNIPPET_CLOSE = "»"
+SNIPPET_TOKENS = 10
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def fold_sql(expr):
+    return f"replace(replace(coalesce({expr}, ''), 'İ', 'i'), 'ı', 'i')"
+
+
+def fold_text(text):
+    return text.replace("İ", "i").replace("ı", "i")
+
+
+def fold_case(text):
+    # For exact comparisons: folded, then lowercase in all of Unicode
+    return fold_text(text).lower()
+
+
+def plain_text(text):
+    # Roughly what the tokenizer compares: folded, lowercase, no diacritics
+    decomposed = unicodedata.normalize("NFD", fold_text(text).lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def build_match_query(text):
+    # Every word must match, the last one as a prefix so results follow typing
+    terms = _TERM_RE.findall(fold_text(text or ""))
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+SEARCH_SCHEMA = [
+    f"""
+    CREATE VIEW IF NOT EXISTS pages_search_source AS
+    SELECT id, {fold_sql('title')} AS title, {fold_sql('content')} AS content
+    FROM pages
+    """,
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(
+        title, content,
+        content='pages_search_source', content_rowid='id',
+        tokenize='{TOKENIZER}', prefix='2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS pages_fts_insert AFTER INSERT ON pages BEGIN
+        INSERT INTO pages_fts(rowid, title, content)
+        VALUES (new.id, {fold_sql('new.title')}, {fold_sql('new.content')});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS pages_fts_delete AFTER DELETE ON pages BEGIN
+        INSERT INTO pages_fts(pages_fts, rowid, title, content)
+        VALUES ('delete', old.id, {fold_sql('old.title')}, {fold_sql('old.content')});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS pages_fts_update AFTER UPDATE OF title, content ON pages BEGIN
+        INSERT INTO pages_fts(pages_fts, rowid, title, content)
+        VALUES ('delete', old.id, {fold_sql('old.title')}, {fold_sql('old.content')});
+        INSERT INTO pages_fts(rowid, title, content)
+        VALUES (new.id, {fold_sql('new.title')}, {fold_sql('new.content')});
+    END
+    """,
+    f"""
+    CREATE VIEW IF NOT EXISTS blocks_search_source AS
+    SELECT id, {fold_sql('content')} AS content
+    FROM blocks
+    """,
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS blocks_fts USING fts5(
+        content,
+        content='blocks_search_source', content_rowid='id',
+        tokenize='{TOKENIZER}', prefix='2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS blocks_fts_insert AFTER INSERT ON blocks BEGIN
+        INSERT INTO blocks_fts(rowid, content) VALUES (new.id, {fold_sql('new.content')});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS blocks_fts_delete AFTER DELETE ON blocks BEGIN
+        INSERT INTO blocks_fts(blocks_fts, rowid, content)
+        VALUES ('delete', old.id, {fold_sql('old.content')});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS blocks_fts_update AFTER UPDATE OF content ON blocks BEGIN
+        INSERT INTO blocks_fts(blocks_fts, rowid, content)
+        VALUES ('delete', old.id, {fold_sql('old.content')});
+        INSERT INTO blocks_fts(rowid, content) VALUES (new.id, {fold_sql('new.content')});
+    END
+    """,
+]
+
+
+SEARCH_TRIGGERS = (
+    "pages_fts_insert", "pages_fts_delete", "pages_fts_update",
+    "blocks_fts_insert", "blocks_fts_delete", "blocks_fts_update",
+)
+
+
+def drop_search_triggers(cursor):
+    # For bulk loads; create_search_index puts them back and rebuilds
+    for trigger in SEARCH_TRIGGERS:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+
+
+def create_search_index(cursor):
+    # Creates the index and backfills it from the rows already in the database
+    for statement in SEARCH_SCHEMA:
+        cursor.execute(statement)
+    cursor.execute("INSERT INTO pages_fts(pages_fts) VALUES ('rebuild')")
+    cursor.execute("INSERT INTO blocks_fts(blocks_fts) VALUES ('rebuild')")
+
+
+def create_packed_search_index(cursor):
+    # Packed and cold page bodies are compressed, so the index cannot read
+    # them back: it is contentless and keyed by page_bodies.id, which is never
+    # reused. Rows are added and removed in storage_tiers.py with the folded
+    # text; an entry whose body is gone no longer joins and is ignored.
+    cursor.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS packed_fts USING fts5(
+            content, content='', tokenize='{TOKENIZER}', prefix='2 3'
+        )
+    """)
+
+
+def text_snippet(text, match):
+    # The first matching term of the text with a few words around it, like
+    # snippet() but over the original text
+    terms = [plain_text(term.strip('"*')) for term in match.split()]
+    words = list(_TERM_RE.finditer(text))
+    for index, word in enumerate(words):
+        plain = plain_text(word.group())
+        if any(plain.startswith(term) for term in terms):
+            start = max(0, index - SNIPPET_TOKENS // 2)
+            end = min(len(words), start + SNIPPET_TOKENS)
+            # Punctuation between the words is kept; line breaks are not
+            snippet = (text[words[start].start():word.start()] + SNIPPET_OPEN + word.group() + SNIPPET_CLOSE
+                       + text[word.end():words[end - 1].end()])
+            return ("…" if start else "") + " ".join(snippet.split()) + ("…" if end < len(words) else "")
+    return ""
+
+
+def search_pages(conn, user_id, text, limit=50):
+    # Returns (page_id, title, snippet) tuples, best bm25 match first.
+    # Title hits weigh more than body hits; a page matching both in its
+    # body and in one of its blocks is reported once with its best rank.
+    match = build_match_query(text)
+    if match is None:
+        return []
+    cursor = conn.cursor()
+    # The index holds folded text, so snippets are cut from the text as the
+    # user wrote it rather than with snippet()
+    cursor.execute("""
+        SELECT p.id, p.title, p.content, bm25(pages_fts, 10.0, 1.0) AS rank
+        FROM pages_fts
+        CROSS JOIN pages p ON p.id = pages_fts.rowid
+        WHERE pages_fts MATCH ? AND p.user_id = ?
+        ORDER BY rank
+        LIMIT ?
+    """, (match, user_id, limit))
+    best = {}
+    for page_id, title, content, rank in cursor.fetchall():
+        best[page_id] = (rank, title, text_snippet(content or "", match) or text_snippet(title, match))
+
+    cursor.execute("""
+        SELECT p.id, p.title, b.content, bm25(blocks_fts) AS rank
+        FROM blocks_fts
+        CROSS JOIN blocks b ON b.id = blocks_fts.rowid
+        JOIN pages p ON p.id = b.page_id
+        WHERE blocks_fts MATCH ? AND p.user_id = ?
+        ORDER BY rank
+        LIMIT ?
+    """, (match, user_id, limit))
+    for page_id, title, content, rank in cursor.fetchall():
+        if page_id not in best or rank < best[page_id][0]:
+            best[page_id] = (rank, title, text_snippet(content or "", match))
+
+    cursor.execute("""
+        SELECT p.id, p.title, bm25(packed_fts) AS rank
+        FROM packed_fts
+        CROSS JOIN page_bodies pb ON pb.id = packed_fts.rowid
+        JOIN pages p ON p.id = pb.page_id
+        WHERE packed_fts MATCH ? AND p.user_id = ?
+        ORDER BY rank
+        LIMIT ?
+    """, (match, user_id, limit))
+    for page_id, title, rank in cursor.fetchall():
+        if page_id not in best or rank < best[page_id][0]:
+            # Only the bodies that made the cut are decompressed
+            best[page_id] = (rank, title, None)
+
+    ranked = sorted(best.items(), key=lambda item: item[1][0])[:limit]
+    return [(page_id, title, text_snippet(read_body(conn, page_id) or "", match) if snippet is None else snippet)
+            for page_id, (rank, title, snippet) in ranked]
@@ -0,0 +1,350 @@
+import wx
+
+from sticky_notes import NOTE_HEIGHT, NOTE_WIDTH, StickyBoard
+
+
+class StickyCanvas(wx.Panel):
+    # One custom-painted window for all sticky notes of a page. Notes are
+    # board coordinates in a StickyBoard; the canvas only maps them to the
+    # screen through pan and zoom and paints the ones inside the damaged area.
+    #
+    # Drag a note to move it, Ctrl or Shift+click to add notes to the
+    # selection and drag any of them to move them together (Ctrl+A selects
+    # all, Escape clears). Drag empty space (or use the middle button) to
+    # pan, scroll to pan vertically (Shift for horizontally) and Ctrl+scroll
+    # to zoom around the cursor.
+    #
+    # Mouse motion only records where the pointer is; the notes are moved
+    # and repainted at most once per frame, however fast the events arrive.
+    MIN_ZOOM = 0.1
+    MAX_ZOOM = 4.0
+    ZOOM_STEP = 1.1
+    SCROLL_STEP = 60
+    PADDING = 10
+    CORNER_RADIUS = 6
+    LINE_SPACING = 2
+    FRAME_MS = 16
+
+    def __init__(self, parent, on_notes_moved=None, on_notes_deleted=None):
+        super(StickyCanvas, self).__init__(parent, style=wx.WANTS_CHARS)
+        self.SetBackgroundStyle(wx.BG_STYLE_PAINT)
+        self.board = StickyBoard()
+        # Called with [(note_id, x, y), ...] and the positions the notes
+        # started from, in the same form, once a drag is dropped
+        self.on_notes_moved = on_notes_moved
+        # Called with the [StickyNote] removed by the Delete key
+        self.on_notes_deleted = on_notes_deleted
+        self.zoom = 1.0
+        self.pan_x = 0.0
+        self.pan_y = 0.0
+        self.selection = set()
+        # Positions of the dragged notes when the drag started, by note id
+        self.drag_starts = {}
+        self.drag_anchor = None
+        self.pan_anchor = None
+        # Latest pointer position not applied yet
+        self.pending_motion = None
+        self.frame_timer = wx.Timer(self)
+        # Wrapped text per note id, measured once in board units
+        self.wrapped = {}
+
+        self.Bind(wx.EVT_PAINT, self.on_paint)
+        self.Bind(wx.EVT_LEFT_DOWN, self.on_left_down)
+        self.Bind(wx.EVT_LEFT_UP, self.on_left_up)
+        self.Bind(wx.EVT_MIDDLE_DOWN, self.on_middle_down)
+        self.Bind(wx.EVT_MIDDLE_UP, self.on_middle_up)
+        self.Bind(wx.EVT_MOTION, self.on_motion)
+        self.Bind(wx.EVT_MOUSEWHEEL, self.on_wheel)
+        self.Bind(wx.EVT_MOUSE_CAPTURE_LOST, self.on_capture_lost)
+        self.Bind(wx.EVT_KEY_DOWN, self.on_key_down)
+        self.Bind(wx.EVT_TIMER, self.on_frame, self.frame_timer)
+
+    def set_notes(self, notes):
+        self.end_drag(save=False)
+        self.selection = set()
+        self.board.load(notes)
+        self.wrapped = {}
+        self.Refresh()
+
+    def add_notes(self, notes):
+        self.board.extend(notes)
+        for note in notes:
+            self.wrapped.pop(note.id, None)
+        self.Refresh(eraseBackground=False)
+
+    def add_note(self, note_id, content, color, x, y):
+        self.board.add(note_id, content, color, x, y)
+        self.wrapped.pop(note_id, None)
+        self.refresh_note(note_id)
+
+    def remove_note(self, note_id):
+        if note_id not in self.board.store:
+            return
+        self.refresh_note(note_id)
+        self.board.remove(note_id)
+        self.wrapped.pop(note_id, None)
+        self.selection.discard(note_id)
+        self.drag_starts.pop(note_id, None)
+
+    def move_note(self, note_id, x, y):
+        if note_id not in self.board.store:
+            return
+        self.refresh_note(note_id)
+        self.board.move(note_id, x, y)
+        self.refresh_note(note_id)
+
+    def delete_selection(self):
+        store = self.board.store
+        notes = [store.note(store.slots[note_id]) for note_id in sorted(self.selection) if note_id in store]
+        for note in notes:
+            self.remove_note(note.id)
+        if notes and self.on_notes_deleted:
+            self.on_notes_deleted(notes)
+
+    def to_board(self, x, y):
+        return x / self.zoom + self.pan_x, y / self.zoom + self.pan_y
+
+    def to_screen_rect(self, x0, y0, x1, y1):
+        zoom = self.zoom
+        left = int((x0 - self.pan_x) * zoom)
+        top = int((y0 - self.pan_y) * zoom)
+        return wx.Rect(left, top, int((x1 - x0) * zoom) + 2, int((y1 - y0) * zoom) + 2)
+
+    def refresh_note(self, note_id):
+        if note_id in self.board.store:
+            rect = self.to_screen_rect(*self.board.store.bounds(note_id))
+            rect.Inflate(2, 2)
+            self.RefreshRect(rect, eraseBackground=False)
+
+    def on_paint(self, event):
+        dc = wx.AutoBufferedPaintDC(self)
+        dc.SetBackground(wx.Brush(self.GetBackgroundColour()))
+        dc.Clear()
+        gc = wx.GraphicsContext.Create(dc)
+        if gc is None:
+            return
+        # Only notes inside the damaged part of the window are drawn
+        box = self.GetUpdateRegion().GetBox()
+        if box.IsEmpty():
+            box = self.GetClientRect()
+        x0, y0 = self.to_board(box.x, box.y)
+        x1, y1 = self.to_board(box.x + box.width, box.y + box.height)
+        slots = self.board.visible(x0, y0, x1, y1)
+        if not slots:
+            return
+
+        gc.Scale(self.zoom, self.zoom)
+        gc.Translate(-self.pan_x, -self.pan_y)
+        gc.SetFont(self.GetFont(), wx.BLACK)
+        border = gc.CreatePen(wx.Pen(wx.Colour(0, 0, 0, 60)))
+        selected = gc.CreatePen(wx.Pen(wx.Colour(30, 110, 230), 3))
+        brushes = {}
+        store = self.board.store
+        for slot in slots:
+            note_id, content, color, x, y = store.note(slot)
+            brush = brushes.get(color)
+            if brush is None:
+                brush = brushes[color] = gc.CreateBrush(wx.Brush(wx.Colour(color)))
+            gc.SetBrush(brush)
+            gc.SetPen(selected if note_id in self.selection else border)
+            gc.DrawRoundedRectangle(x, y, NOTE_WIDTH, NOTE_HEIGHT, self.CORNER_RADIUS)
+            lines = self.wrapped.get(note_id)
+            if lines is None:
+                lines = self.wrapped[note_id] = self.wrap(gc, content)
+            text_y = y + self.PADDING
+            for line, height in lines:
+                if text_y + height > y + NOTE_HEIGHT - self.PADDING:
+                    break
+                gc.DrawText(line, x + self.PADDING, text_y)
+                text_y += height + self.LINE_SPACING
+
+    def wrap(self, gc, content):
+        # Greedy word wrap to the note width; returns (line, height) pairs
+        width = NOTE_WIDTH - 2 * self.PADDING
+        lines = []
+        for paragraph in content.split("\n"):
+            line = ""
+            for word in paragraph.split(" "):
+                candidate = word if not line else line + " " + word
+                w, h = gc.GetTextExtent(candidate)
+                if w <= width or not line:
+                    line = candidate
+                else:
+                    lines.append((line, gc.GetTextExtent(line)[1]))
+                    line = word
+            lines.append((line, gc.GetTextExtent(line or " ")[1]))
+        return lines
+
+    def on_left_down(self, event):
+        self.SetFocus()
+        x, y = self.to_board(*event.GetPosition())
+        note_id = self.board.hit(x, y)
+        if note_id is None:
+            if not (event.ControlDown() or event.ShiftDown()):
+                self.select(set())
+            self.start_pan(event)
+            return
+        if event.ControlDown() or event.ShiftDown():
+            selection = set(self.selection)
+            if note_id in selection:
+                selection.discard(note_id)
+                self.select(selection)
+                return
+            selection.add(note_id)
+            self.select(selection)
+        elif note_id not in self.selection:
+            self.select({note_id})
+        store = self.board.store
+        store.raise_to_top(note_id)
+        self.drag_starts = {selected: store.position(selected) for selected in self.selection}
+        self.drag_anchor = (x, y)
+        self.refresh_note(note_id)
+        if not self.HasCapture():
+            self.CaptureMouse()
+
+    def select(self, selection):
+        changed = self.selection ^ selection
+        self.selection = selection
+        self.refresh_notes(changed)
+
+    def refresh_notes(self, note_ids):
+        # One repaint of the box around the given notes
+        store = self.board.store
+        box = None
+        for note_id in note_ids:
+            if note_id in store:
+                rect = self.to_screen_rect(*store.bounds(note_id))
+                box = rect if box is None else box.Union(rect)
+        if box is not None:
+            box.Inflate(3, 3)
+            self.RefreshRect(box, eraseBackground=False)
+
+    def on_left_up(self, event):
+        if self.drag_anchor is not None:
+            self.end_drag(save=True)
+        else:
+            self.end_pan()
+
+    def on_middle_down(self, event):
+        self.start_pan(event)
+
+    def on_middle_up(self, event):
+        self.end_pan()
+
+    def start_pan(self, event):
+        self.pan_anchor = event.GetPosition()
+        if not self.HasCapture():
+            self.CaptureMouse()
+
+    def end_pan(self):
+        self.apply_motion()
+        self.pan_anchor = None
+        if self.HasCapture():
+            self.ReleaseMouse()
+
+    def on_motion(self, event):
+        if not event.Dragging():
+            return
+        if self.drag_anchor is None and self.pan_anchor is None:
+            return
+        self.pending_motion = event.GetPosition()
+        if not self.frame_timer.IsRunning():
+            self.frame_timer.StartOnce(self.FRAME_MS)
+
+    def on_frame(self, event):
+        self.apply_motion()
+
+    def apply_motion(self):
+        position = self.pending_motion
+        self.pending_motion = None
+        if position is None:
+            return
+        if self.drag_anchor is not None:
+            x, y = self.to_board(position.x, position.y)
+            self.move_selection(x - self.drag_anchor[0], y - self.drag_anchor[1])
+        elif self.pan_anchor is not None:
+            self.pan_by((self.pan_anchor.x - position.x) / self.zoom,
+                        (self.pan_anchor.y - position.y) / self.zoom)
+            self.pan_anchor = position
+
+    def move_selection(self, dx, dy):
+        # Repaints the old and the new place of the moved notes only
+        note_ids = [note_id for note_id in self.drag_starts if note_id in self.board.store]
+        self.refresh_notes(note_ids)
+        for note_id in note_ids:
+            x, y = self.drag_starts[note_id]
+            self.board.move(note_id, x + dx, y + dy)
+        self.refresh_notes(note_ids)
+
+    def end_drag(self, save=True):
+        self.frame_timer.Stop()
+        if save:
+            self.apply_motion()
+        self.pending_motion = None
+        starts = self.drag_starts
+        self.drag_starts = {}
+        self.drag_anchor = None
+        if self.HasCapture():
+            self.ReleaseMouse()
+        if not save or not self.on_notes_moved:
+            return
+        store = self.board.store
+        moves = []
+        origins = []
+        for note_id, (start_x, start_y) in starts.items():
+            if note_id not in store:
+                continue
+            x, y = (int(round(value)) for value in store.position(note_id))
+            start = (int(round(start_x)), int(round(start_y)))
+            if (x, y) != start:
+                moves.append((note_id, x, y))
+                origins.append((note_id,) + start)
+        if moves:
+            self.on_notes_moved(moves, origins)
+
+    def on_capture_lost(self, event):
+        # Keep where the notes were dropped; the drag just ends early
+        if self.drag_anchor is not None:
+            self.end_drag(save=True)
+        self.pan_anchor = None
+        self.pending_motion = None
+
+    def on_key_down(self, event):
+        key = event.GetKeyCode()
+        if key == wx.WXK_ESCAPE:
+            self.select(set())
+        elif event.ControlDown() and key == ord("A"):
+            self.select(set(self.board.store.slots))
+        elif key in (wx.WXK_DELETE, wx.WXK_BACK) and self.selection and self.drag_anchor is None:
+            self.delete_selection()
+        else:
+            event.Skip()
+
+    def pan_by(self, dx, dy):
+        self.pan_x += dx
+        self.pan_y += dy
+        self.Refresh(eraseBackground=False)
+
+    def on_wheel(self, event):
+        steps = event.GetWheelRotation() / (event.GetWheelDelta() or 120)
+        if event.ControlDown():
+            self.zoom_at(event.GetPosition(), self.ZOOM_STEP ** steps)
+        elif event.ShiftDown() or event.GetWheelAxis() == wx.MOUSE_WHEEL_HORIZONTAL:
+            self.pan_by(-steps * self.SCROLL_STEP / self.zoom, 0)
+        else:
+            self.pan_by(0, -steps * self.SCROLL_STEP / self.zoom)
+
+    def zoom_at(self, position, factor):
+        # The board point under the cursor stays put
+        zoom = min(self.MAX_ZOOM, max(self.MIN_ZOOM, self.zoom * factor))
+        x, y = self.to_board(position.x, position.y)
+        self.zoom = zoom
+        self.pan_x = x - position.x / zoom
+        self.pan_y = y - position.y / zoom
+        self.Refresh(eraseBackground=False)
+
+    def reset_view(self):
+        self.zoom = 1.0
+        self.pan_x = 0.0
+        self.pan_y = 0.0
+        self.Refresh(eraseBackground=False)
@@ -0,0 +1,208 @@
+from array import array
+
+# Sticky notes of the open page, kept out of wx so the board logic can run
+# headless. Notes live in column arrays (one slot per note, slots are also
+# the paint order) and a uniform grid maps areas of the board to the notes
+# overlapping them, so painting and hit-testing only look at nearby notes.
+
+NOTE_WIDTH = 200
+NOTE_HEIGHT = 150
+
+
+class StickyNote:
+    __slots__ = ("id", "content", "color", "x", "y")
+
+    def __init__(self, note_id, content, color, x, y):
+        self.id = note_id
+        self.content = content
+        self.color = color
+        self.x = x
+        self.y = y
+
+    def __iter__(self):
+        return iter((self.id, self.content, self.color, self.x, self.y))
+
+
+class NoteStore:
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.ids = array("q")
+        self.xs = array("d")
+        self.ys = array("d")
+        self.contents = []
+        self.colors = []
+        self.slots = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, note_id):
+        return note_id in self.slots
+
+    def add(self, note_id, content, color, x, y):
+        slot = len(self.ids)
+        self.ids.append(note_id)
+        self.xs.append(x)
+        self.ys.append(y)
+        self.contents.append(content)
+        self.colors.append(color)
+        self.slots[note_id] = slot
+        return slot
+
+    def remove(self, note_id):
+        # Fills the hole with the last note, which changes its paint order
+        slot = self.slots.pop(note_id)
+        last = len(self.ids) - 1
+        if slot != last:
+            self.ids[slot] = self.ids[last]
+            self.xs[slot] = self.xs[last]
+            self.ys[slot] = self.ys[last]
+            self.contents[slot] = self.contents[last]
+            self.colors[slot] = self.colors[last]
+            self.slots[self.ids[slot]] = slot
+        del self.ids[last]
+        del self.xs[last]
+        del self.ys[last]
+        del self.contents[last]
+        del self.colors[last]
+
+    def raise_to_top(self, note_id):
+        slot = self.slots[note_id]
+        if slot == len(self.ids) - 1:
+            return
+        # Shift instead of swapping so the other notes keep their order
+        note = self.note(slot)
+        del self.ids[slot]
+        del self.xs[slot]
+        del self.ys[slot]
+        del self.contents[slot]
+        del self.colors[slot]
+        for other in range(slot, len(self.ids)):
+            self.slots[self.ids[other]] = other
+        self.add(*note)
+
+    def note(self, slot):
+        return self.ids[slot], self.contents[slot], self.colors[slot], self.xs[slot], self.ys[slot]
+
+    def position(self, note_id):
+        slot = self.slots[note_id]
+        return self.xs[slot], self.ys[slot]
+
+    def move(self, note_id, x, y):
+        slot = self.slots[note_id]
+        self.xs[slot] = x
+        self.ys[slot] = y
+
+    def bounds(self, note_id):
+        slot = self.slots[note_id]
+        x, y = self.xs[slot], self.ys[slot]
+        return x, y, x + NOTE_WIDTH, y + NOTE_HEIGHT
+
+
+class GridIndex:
+    CELL_SIZE = 256
+
+    def __init__(self, cell_size=None):
+        self.cell_size = cell_size or self.CELL_SIZE
+        self.cells = {}
+        self.keys = {}
+
+    def clear(self):
+        self.cells = {}
+        self.keys = {}
+
+    def cells_for(self, x0, y0, x1, y1):
+        size = self.cell_size
+        return [(cx, cy)
+                for cx in range(int(x0 // size), int(x1 // size) + 1)
+                for cy in range(int(y0 // size), int(y1 // size) + 1)]
+
+    def insert(self, note_id, bounds):
+        keys = self.cells_for(*bounds)
+        for key in keys:
+            self.cells.setdefault(key, set()).add(note_id)
+        self.keys[note_id] = keys
+
+    def remove(self, note_id):
+        for key in self.keys.pop(note_id, ()):
+            cell = self.cells.get(key)
+            if cell is not None:
+                cell.discard(note_id)
+                if not cell:
+                    del self.cells[key]
+
+    def move(self, note_id, bounds):
+        if self.keys.get(note_id) == self.cells_for(*bounds):
+            return
+        self.remove(note_id)
+        self.insert(note_id, bounds)
+
+    def query(self, x0, y0, x1, y1):
+        # Candidates only; callers check the exact bounds
+        found = set()
+        for key in self.cells_for(x0, y0, x1, y1):
+            cell = self.cells.get(key)
+            if cell:
+                found.update(cell)
+        return found
+
+
+class StickyBoard:
+    def __init__(self):
+        self.store = NoteStore()
+        self.index = GridIndex()
+
+    def __len__(self):
+        return len(self.store)
+
+    def clear(self):
+        self.store.clear()
+        self.index.clear()
+
+    def load(self, notes):
+        # notes are StickyNote objects or (id, content, color, x, y) rows
+        self.clear()
+        self.extend(notes)
+
+    def extend(self, notes):
+        for note in notes:
+            self.add(*note)
+
+    def add(self, note_id, content, color, x, y):
+        if note_id in self.store:
+            self.remove(note_id)
+        self.store.add(note_id, content, color, x, y)
+        self.index.insert(note_id, self.store.bounds(note_id))
+
+    def remove(self, note_id):
+        self.index.remove(note_id)
+        self.store.remove(note_id)
+
+    def move(self, note_id, x, y):
+        self.store.move(note_id, x, y)
+        self.index.move(note_id, self.store.bounds(note_id))
+
+    def visible(self, x0, y0, x1, y1):
+        # Slots of the notes overlapping the rectangle, in paint order
+        store = self.store
+        slots = []
+        for note_id in self.index.query(x0, y0, x1, y1):
+            nx0, ny0, nx1, ny1 = store.bounds(note_id)
+            if nx0 < x1 and nx1 > x0 and ny0 < y1 and ny1 > y0:
+                slots.append(store.slots[note_id])
+        slots.sort()
+        return slots
+
+    def hit(self, x, y):
+        # The topmost note under the point, or None
+        store = self.store
+        best = None
+        for note_id in self.index.query(x, y, x, y):
+            nx0, ny0, nx1, ny1 = store.bounds(note_id)
+            if nx0 <= x < nx1 and ny0 <= y < ny1:
+                slot = store.slots[note_id]
+                if best is None or slot > best:
+                    best = slot
+        return None if best is None else store.ids[best]
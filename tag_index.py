@@ -0,0 +1,181 @@
+import re
+import threading
+
+# Tag filters over the page tree, e.g. "work AND (urgent OR soon) NOT done".
+#
+# Every tag of a user is kept in memory as a bitset of its page ids (a Python
+# int with bit n set for page n), so a filter is a handful of &, | and ~ on
+# those ints instead of a GROUP BY over page_tags. The bitsets are rebuilt
+# lazily: triggers bump tags.revision whenever a page is tagged or untagged,
+# and user_page_revisions.revision whenever a page is created or deleted
+# (which is what NOT is relative to). refresh() only reloads what changed.
+
+_TOKEN_RE = re.compile(r'\s*(?:(\()|(\))|"([^"]*)"|([^\s()"]+))')
+OPERATORS = ("AND", "OR", "NOT")
+
+
+def bitset(ids):
+    ids = list(ids)
+    if not ids:
+        return 0
+    bits = bytearray(max(ids) // 8 + 1)
+    for page_id in ids:
+        bits[page_id >> 3] |= 1 << (page_id & 7)
+    return int.from_bytes(bits, "little")
+
+
+def members(bits):
+    # The page ids in a bitset, ascending
+    return [page_id for page_id, bit in enumerate(bin(bits)[:1:-1]) if bit == "1"]
+
+
+def tokenize(text):
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = _TOKEN_RE.match(text, position)
+        if match is None:
+            raise ValueError(f"unexpected {text[position:].strip()[:1]!r} in tag filter")
+        position = match.end()
+        opening, closing, quoted, word = match.groups()
+        if opening or closing:
+            tokens.append(opening or closing)
+        elif quoted is not None:
+            tokens.append(("tag", quoted))
+        elif word.upper() in OPERATORS:
+            tokens.append(word.upper())
+        else:
+            tokens.append(("tag", word.lstrip("#")))
+    return tokens
+
+
+def filter_term(name):
+    # name as it is written in a filter
+    if re.fullmatch(r'[^\s()"#][^\s()"]*', name) and name.upper() not in OPERATORS:
+        return name
+    return '"' + name.replace('"', "") + '"'
+
+
+def parse_filter(text):
+    # ("tag", name), ("not", node), ("and", [nodes]) or ("or", [nodes]);
+    # tags next to each other are ANDed, and NOT binds tighter than both
+    tokens = tokenize(text)
+    if not tokens:
+        return None
+    node, position = _parse_or(tokens, 0)
+    if position < len(tokens):
+        raise ValueError(f"unexpected {tokens[position]!r} in tag filter")
+    return node
+
+
+def _parse_or(tokens, position):
+    nodes = []
+    while True:
+        node, position = _parse_and(tokens, position)
+        nodes.append(node)
+        if position < len(tokens) and tokens[position] == "OR":
+            position += 1
+            continue
+        return (nodes[0] if len(nodes) == 1 else ("or", nodes)), position
+
+
+def _parse_and(tokens, position):
+    nodes = []
+    while True:
+        node, position = _parse_not(tokens, position)
+        nodes.append(node)
+        if position < len(tokens) and tokens[position] == "AND":
+            position += 1
+        elif position >= len(tokens) or tokens[position] in ("OR", ")"):
+            return (nodes[0] if len(nodes) == 1 else ("and", nodes)), position
+
+
+def _parse_not(tokens, position):
+    if position >= len(tokens):
+        raise ValueError("tag filter ends too early")
+    token = tokens[position]
+    if token == "NOT":
+        node, position = _parse_not(tokens, position + 1)
+        return ("not", node), position
+    if token == "(":
+        node, position = _parse_or(tokens, position + 1)
+        if position >= len(tokens) or tokens[position] != ")":
+            raise ValueError("missing ) in tag filter")
+        return node, position + 1
+    if isinstance(token, tuple):
+        return token, position + 1
+    raise ValueError(f"unexpected {token!r} in tag filter")
+
+
+class TagIndex:
+    # Bitsets of one user's tags. refresh() and match() may be called from
+    # any thread; a lock keeps a refresh from racing another.
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.lock = threading.Lock()
+        # tag id -> (revision, bits); tag names are matched case-insensitively
+        self.tags = {}
+        self.names = {}
+        self.pages_revision = None
+        self.pages = None
+
+    def refresh(self, conn):
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, name, revision FROM tags WHERE user_id=? ORDER BY name", (self.user_id,))
+        rows = cursor.fetchall()
+        tags = {}
+        names = {}
+        for tag_id, name, revision in rows:
+            cached = self.tags.get(tag_id)
+            if cached is None or cached[0] != revision:
+                cursor.execute("SELECT page_id FROM page_tags WHERE tag_id=?", (tag_id,))
+                cached = (revision, bitset(row[0] for row in cursor))
+            tags[tag_id] = cached
+            names.setdefault(name.lower(), []).append(tag_id)
+        self.tags = tags
+        self.names = names
+        cursor.execute("SELECT revision FROM user_page_revisions WHERE user_id=?", (self.user_id,))
+        row = cursor.fetchone()
+        revision = row[0] if row else 0
+        if revision != self.pages_revision:
+            # Loaded again on the next NOT
+            self.pages_revision = revision
+            self.pages = None
+
+    def all_pages(self, conn):
+        if self.pages is None:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id FROM pages WHERE user_id=?", (self.user_id,))
+            self.pages = bitset(row[0] for row in cursor)
+        return self.pages
+
+    def evaluate(self, conn, node):
+        kind = node[0]
+        if kind == "tag":
+            bits = 0
+            for tag_id in self.names.get(node[1].lower(), ()):
+                bits |= self.tags[tag_id][1]
+            return bits
+        if kind == "not":
+            return self.all_pages(conn) & ~self.evaluate(conn, node[1])
+        if kind == "and":
+            # Negated terms only narrow down the others, no need for every page
+            positive = [child for child in node[1] if child[0] != "not"]
+            negative = [child[1] for child in node[1] if child[0] == "not"]
+            bits = self.all_pages(conn) if not positive else self.evaluate(conn, positive[0])
+            for child in positive[1:]:
+                bits &= self.evaluate(conn, child)
+            for child in negative:
+                bits &= ~self.evaluate(conn, child)
+            return bits
+        bits = 0
+        for child in node[1]:
+            bits |= self.evaluate(conn, child)
+        return bits
+
+    def match(self, conn, node):
+        # Bitset of the pages matching a parsed filter
+        with self.lock:
+            self.refresh(conn)
+            return self.evaluate(conn, node)
@@ -0,0 +1,36 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+# The modules live at the top of the repository, next to this directory
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from createTables import DatabaseManager  # noqa: E402
+from twelveb.core import UserStore  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path):
+    # A fresh database file per test, brought up to the current schema
+    db = DatabaseManager(str(tmp_path / "twelveb.db"))
+    db.migrate()
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def user_id(db):
+    return UserStore(db).register("ayşe", "secret", "Favourite colour?", "mavi")
+
+
+@pytest.fixture
+def checklist_db(tmp_path):
+    # The checklist app's own schema, from a copy of its database
+    path = tmp_path / "registered.db"
+    shutil.copy(os.path.join(ROOT, "registered.db"), path)
+    db = DatabaseManager(str(path))
+    yield db
+    db.close()
@@ -0,0 +1,80 @@
+import random
+
+from blocks import BlockDocument, BlockStore, fetch_page_text, split_markdown
+from order_keys import key_between, keys_between, spread_keys
+from twelveb.core import PageStore
+
+TEXT = "# Başlık\n\nİlk paragraf.\n\n- bir\n- iki\n\n```\nkod\n\nblok\n```\n\nSon paragraf.\n"
+
+
+def test_split_markdown_keeps_the_text():
+    blocks = split_markdown(TEXT)
+    assert "".join(content for kind, content in blocks) == TEXT
+    assert [kind for kind, content in blocks][0] != "code"
+    # The blank line inside the fence does not split the code block
+    assert any(content.startswith("```") and content.rstrip().endswith("```") for kind, content in blocks)
+
+
+def test_order_keys_sort_between_neighbours():
+    rng = random.Random(3)
+    keys = spread_keys(20)
+    assert keys == sorted(keys)
+    for _ in range(200):
+        i = rng.randrange(len(keys) + 1)
+        before = keys[i - 1] if i else None
+        after = keys[i] if i < len(keys) else None
+        key = key_between(before, after)
+        assert (before is None or before < key) and (after is None or key < after)
+        keys.insert(i, key)
+    assert keys == sorted(keys)
+    run = keys_between(keys[0], keys[1], 5)
+    assert keys[0] < run[0] and run == sorted(run) and run[-1] < keys[1]
+
+
+def block_rows(conn, page_id):
+    return conn.execute("""
+        SELECT id, content, order_key FROM blocks WHERE page_id=? ORDER BY order_key, id
+    """, (page_id,)).fetchall()
+
+
+def test_block_document_save_writes_only_changes(db, user_id):
+    page_id = PageStore(db).create(user_id, "Page")
+    with db.writing() as conn:
+        document = BlockDocument.load(conn, page_id)
+        assert document.save(conn.cursor(), TEXT) == len(split_markdown(TEXT))
+    with db.reader() as conn:
+        before = block_rows(conn, page_id)
+    edited = TEXT.replace("İlk paragraf.", "İlk paragraf, düzeltildi.") + "Ek satır.\n"
+    with db.writing() as conn:
+        # One block edited, the last one edited to take the new line
+        assert document.save(conn.cursor(), edited) == 2
+    with db.reader() as conn:
+        after = block_rows(conn, page_id)
+        assert fetch_page_text(conn, page_id) == edited
+        assert BlockDocument.load(conn, page_id).text() == edited
+    # Untouched blocks keep their rows and keys
+    assert [row[0] for row in after] == [row[0] for row in before]
+    assert [row[2] for row in after] == [row[2] for row in before]
+
+
+def test_block_document_save_inserts_between_kept_blocks(db, user_id):
+    page_id = PageStore(db).create(user_id, "Page")
+    store = BlockStore()
+    store.save(db, page_id, "A\n\nC\n")
+    with db.reader() as conn:
+        kept = {content: row_id for row_id, content, key in block_rows(conn, page_id)}
+    assert store.save(db, page_id, "A\n\nB\n\nC\n") == 1
+    with db.reader() as conn:
+        rows = block_rows(conn, page_id)
+    assert [content for row_id, content, key in rows] == ["A\n\n", "B\n\n", "C\n"]
+    assert (rows[0][0], rows[2][0]) == (kept["A\n\n"], kept["C\n"])
+    assert store.save(db, page_id, "A\n\nB\n\nC\n") == 0
+
+
+def test_block_store_rebuilds_a_page_it_has_not_seen(db, user_id):
+    pages = PageStore(db)
+    page_id = pages.create(user_id, "Page", content="one\n\ntwo\n")
+    # A second store knows nothing of the first one's layout; "two" gains
+    # its blank line and "three" is new
+    assert BlockStore().save(db, page_id, "one\n\ntwo\n\nthree\n") == 2
+    assert pages.get(page_id).content == "one\n\ntwo\n\nthree\n"
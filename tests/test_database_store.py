@@ -0,0 +1,86 @@
+import pytest
+
+from twelveb.core import DatabaseStore, PageStore
+
+ROWS = [
+    {"title": "Çay al", "c2": 3, "c3": "2024-05-01", "c4": "Yapılacak", "c5": True},
+    {"title": "ılık su iç", "c2": 1, "c3": "2024-03-10", "c4": "Bitti"},
+    {"title": "İzmir bileti", "c2": 2, "c4": "Yapılacak"},
+    {"title": "apple", "c2": 10, "c3": "2024-01-01", "c5": "yes"},
+    {"title": "Şeker"},
+]
+
+
+@pytest.fixture
+def table(db, user_id):
+    page_id = PageStore(db).create(user_id, "Liste")
+    store = DatabaseStore(db)
+    store.ensure(page_id)
+    keys = [store.add_column(page_id, name, kind).key for name, kind in
+            (("Öncelik", "number"), ("Tarih", "date"), ("Durum", "select"), ("Bitti mi", "checkbox"))]
+    assert keys == ["c2", "c3", "c4", "c5"]
+    ids = store.add_rows(page_id, ROWS)
+    return store, page_id, dict(zip([row["title"] for row in ROWS], ids))
+
+
+def titles(store, view):
+    rows = store.rows(view.row_ids)
+    return [rows[row_id].get("title") for row_id in view.row_ids]
+
+
+def test_text_filters_fold_turkish_case(table):
+    store, page_id, ids = table
+    for value in ("Çay al", "çay al", "ÇAY AL"):
+        assert titles(store, store.view(page_id, [("title", "=", value)])) == ["Çay al"], value
+    assert titles(store, store.view(page_id, [("title", "=", "ILIK SU İÇ")])) == ["ılık su iç"]
+    assert titles(store, store.view(page_id, [("title", "=", "izmir bileti")])) == ["İzmir bileti"]
+    assert "Çay al" not in titles(store, store.view(page_id, [("title", "!=", "ÇAY AL")]))
+    assert titles(store, store.view(page_id, [("title", "contains", "ŞEK")])) == ["Şeker"]
+    assert titles(store, store.view(page_id, [("title", "contains", "su İ")])) == ["ılık su iç"]
+
+
+def test_comparisons_and_sorts_agree(table):
+    store, page_id, ids = table
+    ordered = titles(store, store.view(page_id, sort=("title", False)))
+    # Everything sorted before a value is exactly what < that value finds
+    for index, title in enumerate(ordered):
+        below = titles(store, store.view(page_id, [("title", "<", title.upper())], sort=("title", False)))
+        assert below == ordered[:index], title
+
+
+def test_typed_filters(table):
+    store, page_id, ids = table
+    assert titles(store, store.view(page_id, [("c2", ">=", "3")])) == ["Çay al", "apple"]
+    assert titles(store, store.view(page_id, [("c3", "<", "2024-04-01")], sort=("c3", False))) == \
+        ["apple", "ılık su iç"]
+    assert titles(store, store.view(page_id, [("c5", "=", "x")])) == ["Çay al", "apple"]
+    assert titles(store, store.view(page_id, [("c5", "!=", "x")])) == ["ılık su iç", "İzmir bileti", "Şeker"]
+    assert titles(store, store.view(page_id, [("c3", "is empty", None)])) == ["İzmir bileti", "Şeker"]
+    assert titles(store, store.view(page_id, [("c4", "=", "Yapılacak"), ("c2", "<", 3)])) == ["İzmir bileti"]
+    with pytest.raises(ValueError):
+        store.view(page_id, [("c2", "=", "not a number")])
+    with pytest.raises(ValueError):
+        store.view(page_id, [("c2", "~", "1")])
+
+
+def test_sort_puts_rows_without_a_value_last(table):
+    store, page_id, ids = table
+    assert titles(store, store.view(page_id, sort=("c2", True))) == \
+        ["apple", "Çay al", "İzmir bileti", "ılık su iç", "Şeker"]
+
+
+def test_group_by_select_follows_the_choices(table):
+    store, page_id, ids = table
+    view = store.view(page_id, group_by="c4")
+    assert [(label, count) for label, start, count in view.groups] == [("Yapılacak", 2), ("Bitti", 1), (None, 2)]
+    assert titles(store, view)[:2] == ["Çay al", "İzmir bileti"]
+
+
+def test_updates_are_reindexed(table):
+    store, page_id, ids = table
+    store.update_row(ids["Şeker"], {"title": "ŞEKER AL", "c2": "", "c5": True})
+    assert titles(store, store.view(page_id, [("title", "=", "şeker al")])) == ["ŞEKER AL"]
+    store.delete_rows([ids["apple"]])
+    assert titles(store, store.view(page_id, [("c5", "=", "x")])) == ["Çay al", "ŞEKER AL"]
+    store.reindex(page_id)
+    assert titles(store, store.view(page_id, [("title", "contains", "al")])) == ["Çay al", "ŞEKER AL"]
@@ -0,0 +1,88 @@
+import pytest
+
+from migrations import bulk_load_schema_missing, full_scans
+from search import drop_search_triggers, search_pages
+from twelveb.core import LinkStore, PageStore, TagStore
+from twelveb.core.importer import MarkdownImporter, parse_markdown
+
+
+@pytest.fixture
+def vault(tmp_path):
+    root = tmp_path / "Kasa"
+    (root / "Dersler").mkdir(parents=True)
+    (root / ".obsidian").mkdir()
+    (root / "Günlük.md").write_text("---\ntitle: Bugün\ntags: [günlük, iş]\n---\nIşık [[Matematik]] #ödev\n",
+                                    encoding="utf-8")
+    (root / "Dersler" / "mat.md").write_text("# Matematik\n\nTürev ve integral.\n", encoding="utf-8")
+    for i in range(10):
+        (root / "Dersler" / f"not{i}.md").write_text(f"Not {i}\n", encoding="utf-8")
+    (root / ".obsidian" / "gizli.md").write_text("skip\n", encoding="utf-8")
+    (root / "resim.png").write_bytes(b"\x89PNG")
+    return root
+
+
+def test_parse_markdown_titles_and_tags():
+    title, blocks, tags = parse_markdown("x.md", "---\ntags:\n  - a\n  - '#b'\n---\n# Heading\n\n#c and #A\n")
+    assert title == "Heading"
+    assert tags == ["a", "b", "c"]
+    assert "".join(content for kind, content in blocks).startswith("---")
+    assert parse_markdown("Adı.md", "no heading\n")[0] == "Adı"
+    # Tags in code are not tags
+    assert parse_markdown("x.md", "```\n#include\n```\n")[2] == []
+
+
+def test_import_builds_the_tree(db, user_id, vault):
+    progress = []
+    count = MarkdownImporter(db, user_id, vault, workers=0, batch_size=4,
+                             progress=lambda imported, skipped: progress.append(imported)).run()
+    assert count == 12
+    assert progress and progress[-1] == 12
+    pages = PageStore(db)
+    (root_id, root_title, has_children), = pages.children(user_id, None)
+    assert root_title == "Kasa"
+    children = [title for page_id, title, has in pages.children(user_id, root_id)]
+    # Files of a folder come before its subfolders
+    assert children == ["Bugün", "Dersler"]
+    today = pages.find(user_id, "Bugün")
+    assert sorted(TagStore(db).page_tags(today)) == ["günlük", "iş", "ödev"]
+    assert LinkStore(db).outgoing(today) == [(pages.find(user_id, "Matematik"), "Matematik")]
+    with db.reader() as conn:
+        assert [row[1] for row in search_pages(conn, user_id, "integral")] == ["Matematik"]
+        assert not bulk_load_schema_missing(conn.cursor())
+    # Running it again finds everything done
+    assert MarkdownImporter(db, user_id, vault, workers=0).run() == 0
+
+
+def test_interrupted_import_restores_search_and_indexes(db, user_id, vault):
+    importer = MarkdownImporter(db, user_id, vault, workers=0, batch_size=4)
+    write = importer.write
+
+    def interrupted(batch):
+        write(batch)
+        raise KeyboardInterrupt
+
+    importer.write = interrupted
+    with pytest.raises(KeyboardInterrupt):
+        importer.run()
+    with db.reader() as conn:
+        assert not bulk_load_schema_missing(conn.cursor())
+    page_id = PageStore(db).create(user_id, "Zebra", content="zebra stripes\n")
+    with db.reader() as conn:
+        assert [row[0] for row in search_pages(conn, user_id, "zebra stripes")] == [page_id]
+    # The rest is imported by the next run
+    assert importer.imported + MarkdownImporter(db, user_id, vault, workers=0).run() == 12
+
+
+def test_migrate_repairs_a_killed_import(db, user_id):
+    with db.writing() as conn:
+        cursor = conn.cursor()
+        drop_search_triggers(cursor)
+        cursor.execute("DROP INDEX idx_page_tags_tag")
+        cursor.execute("DROP INDEX idx_blocks_page_text")
+    page_id = PageStore(db).create(user_id, "Sonra", content="gece yazıldı\n")
+    assert db.migrate() == []
+    with db.reader() as conn:
+        assert not bulk_load_schema_missing(conn.cursor())
+        assert full_scans(conn) == []
+        # Rows written while the triggers were gone are indexed too
+        assert [row[0] for row in search_pages(conn, user_id, "yazıldı")] == [page_id]
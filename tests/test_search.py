@@ -0,0 +1,54 @@
+from search import build_match_query, fold_case, plain_text, search_pages, text_snippet
+from twelveb.core import PageStore, UserStore
+
+
+def search(db, user_id, text):
+    with db.reader() as conn:
+        return search_pages(conn, user_id, text)
+
+
+def test_turkish_casing_is_folded():
+    assert fold_case("IŞIK") == fold_case("ışık") == "işik"
+    assert fold_case("İSTANBUL") == "istanbul"
+    assert plain_text("Çay Şeker") == "cay seker"
+    assert build_match_query("  ") is None
+    assert build_match_query("ılık su") == '"ilik" "su"*'
+
+
+def test_search_matches_any_casing(db, user_id):
+    pages = PageStore(db)
+    page_id = pages.create(user_id, "Günlük", content="Bugün ışık çok güzeldi, İSTANBUL aydınlıktı.\n")
+    for text in ("ışık", "IŞIK", "isik", "istanbul", "İstanbul", "aydın", "gunluk"):
+        assert [row[0] for row in search(db, user_id, text)] == [page_id], text
+    assert search(db, user_id, "ankara") == []
+
+
+def test_snippets_show_the_original_text(db, user_id):
+    pages = PageStore(db)
+    pages.create(user_id, "Notlar", content="Hava: ılık, ışık yumuşak.\n")
+    ((page_id, title, snippet),) = search(db, user_id, "ISIK")
+    assert snippet == "Hava: ılık, «ışık» yumuşak"
+    ((page_id, title, snippet),) = search(db, user_id, "ilik")
+    assert "«ılık»" in snippet
+
+
+def test_title_hits_rank_first_and_are_reported_once(db, user_id):
+    pages = PageStore(db)
+    body, titled = pages.create_many(user_id, [("Başka", None, "Kedi ve köpek.\n", None),
+                                               ("Kedi", None, "Kedi maması.\n", None)])
+    results = search(db, user_id, "kedi")
+    assert [row[0] for row in results] == [titled, body]
+    assert results[0][1] == "Kedi"
+
+
+def test_search_is_per_user(db, user_id):
+    other = UserStore(db).register("ali", "pw", "Şehir?", "İzmir")
+    PageStore(db).create(other, "Gizli", content="ışık\n")
+    assert search(db, user_id, "ışık") == []
+
+
+def test_text_snippet_marks_the_first_hit():
+    words = " ".join(f"w{i}" for i in range(30))
+    snippet = text_snippet(words + " Işıl", build_match_query("ışıl"))
+    assert snippet.startswith("…") and snippet.endswith("«Işıl»")
+    assert text_snippet("nothing here", build_match_query("zebra")) == ""
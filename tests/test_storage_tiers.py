@@ -0,0 +1,75 @@
+import os
+from datetime import datetime, timedelta
+
+from createTables import DatabaseManager
+from page_bodies import archive_path, decode_body, encode_body, read_body
+from search import search_pages
+from twelveb.core import PageStore
+from twelveb.core.storage_tiers import TieredStorage
+
+LARGE = "# Büyük sayfa\n\n" + "Uzun bir paragraf, ışıklı ve ılık kelimelerle dolu.\n\n" * 60
+SMALL = "Kısa not.\n"
+
+
+def tiers_of(db):
+    with db.reader() as conn:
+        return dict(conn.execute("SELECT page_id, tier FROM page_bodies").fetchall())
+
+
+def test_body_encoding_round_trip():
+    for text in ("", SMALL, LARGE):
+        assert decode_body(encode_body(text)) == text
+    assert len(encode_body(LARGE)) < len(LARGE.encode("utf-8"))
+
+
+def test_maintain_packs_then_archives(db, user_id):
+    pages = PageStore(db)
+    large, small = pages.create_many(user_id, [("Large", None, LARGE, None), ("Small", None, SMALL, None)])
+    tiers = pages.tiers
+    now = datetime.now()
+
+    # Old and large enough to pack; the small page waits for the archive
+    assert tiers.maintain(now + timedelta(days=10)) == 1
+    assert tiers_of(db) == {large: "packed"}
+    assert not os.path.exists(archive_path(db.db_name))
+    assert pages.get(large).content == LARGE
+
+    assert tiers.maintain(now + timedelta(days=100)) == 2
+    assert tiers_of(db) == {large: "cold", small: "cold"}
+    assert os.path.exists(archive_path(db.db_name))
+    with db.reader() as conn:
+        assert conn.execute("SELECT count(*) FROM blocks WHERE page_id IN (?, ?)", (large, small)).fetchone() == (0,)
+        assert read_body(conn, small) == SMALL
+        # Cold pages are still found, with snippets of their text
+        results = search_pages(conn, user_id, "ışıklı")
+    assert [row[0] for row in results] == [large]
+    assert "«ışıklı»" in results[0][2]
+    assert pages.get(large).content == LARGE
+    assert tiers.maintain(now + timedelta(days=100)) == 0
+
+
+def test_editing_a_cold_page_brings_it_back(db, user_id):
+    pages = PageStore(db)
+    page_id = pages.create(user_id, "Page", content=LARGE)
+    pages.tiers.maintain(datetime.now() + timedelta(days=100))
+    pages.save_content(page_id, LARGE + "Yeni satır.\n")
+    assert tiers_of(db) == {}
+    assert pages.get(page_id).content == LARGE + "Yeni satır.\n"
+    # The archive copy of the unpacked page is left for the next sweep
+    assert pages.tiers.sweep() == 1
+    assert pages.tiers.sweep() == 0
+    with db.reader() as conn:
+        assert search_pages(conn, user_id, "yeni satır")[0][0] == page_id
+
+
+def test_archive_survives_a_restart(db, user_id):
+    pages = PageStore(db)
+    page_id = pages.create(user_id, "Page", content=LARGE)
+    pages.tiers.maintain(datetime.now() + timedelta(days=100))
+    db.close()
+    reopened = DatabaseManager(db.db_name)
+    try:
+        assert PageStore(reopened).get(page_id).content == LARGE
+        assert TieredStorage(reopened).stats()["cold"][0] == 1
+    finally:
+        reopened.close()
@@ -0,0 +1,120 @@
+import sqlite3
+
+import pytest
+
+from twelveb.core import ChecklistStore, PageStore, SettingsStore, StickyNoteStore, UserStore
+
+
+def test_users_register_and_authenticate(db):
+    users = UserStore(db)
+    user_id = users.register("mehmet", "pw", "Pet?", "Tekir")
+    assert users.authenticate("mehmet", "pw") == user_id
+    assert users.authenticate("mehmet", "wrong") is None
+    assert users.recovery("mehmet") == ("Pet?", "Tekir", "pw")
+    assert users.password("nobody") is None
+    assert users.get_many([user_id, user_id + 100]) == {user_id: "mehmet"}
+    with pytest.raises(sqlite3.IntegrityError):
+        users.register("mehmet", "other", "Pet?", "Pamuk")
+
+
+def test_create_many_keeps_sibling_order(db, user_id):
+    pages = PageStore(db)
+    parent = pages.create(user_id, "Parent")
+    ids = pages.create_many(user_id, [("B", parent, None, None), ("A", parent, "# A\n\nText", "#ff0000"),
+                                      ("Top", None, None, None)])
+    assert [row[1] for row in pages.children(user_id, parent)] == ["B", "A"]
+    children = pages.children_many(user_id, [None, parent])
+    assert [row[0] for row in children[parent]] == ids[:2]
+    assert (parent, "Parent", 1) in children[None]
+    states = pages.get_many([ids[1], ids[0], 10 ** 6])
+    assert set(states) == {ids[0], ids[1]}
+    assert states[ids[1]].content == "# A\n\nText"
+    assert states[ids[1]].color == "#ff0000"
+
+
+def test_create_many_records_links(db, user_id):
+    pages = PageStore(db)
+    target, source = pages.create_many(user_id, [("Hedef", None, None, None),
+                                                 ("Kaynak", None, "see [[hedef]]", None)])
+    assert pages.links.backlinks(target) == [(source, "Kaynak")]
+
+
+def test_move_many_orders_and_rejects_cycles(db, user_id):
+    pages = PageStore(db)
+    a, b, c = pages.create_many(user_id, [(title, None, None, None) for title in "ABC"])
+    pages.move_many([(c, None, a), (b, a)])
+    assert [row[1] for row in pages.children(user_id, None)] == ["C", "A"]
+    assert pages.ancestors(b) == [(a, "A"), (b, "B")]
+    with pytest.raises(ValueError):
+        pages.move_many([(c, b), (a, b)])
+    # Nothing of a rejected batch is applied
+    assert [row[1] for row in pages.children(user_id, None)] == ["C", "A"]
+
+
+def test_duplicate_and_delete_subtree(db, user_id):
+    pages = PageStore(db)
+    notes = StickyNoteStore(db)
+    root = pages.create(user_id, "Root", content="Kök metni")
+    child = pages.create(user_id, "Child", parent_id=root, content="Alt sayfa")
+    notes.add(child, "not", "#ffff00", 5, 6)
+    copies = pages.duplicate_subtree(root)
+    assert set(copies) == {root, child}
+    assert [row[1] for row in pages.children(user_id, None)] == ["Root", "Root (copy)"]
+    copied = pages.get(copies[child])
+    assert copied.content == "Alt sayfa"
+    assert [(n.content, n.x, n.y) for n in notes.all(copies[child])] == [("not", 5, 6)]
+    assert sorted(pages.delete_subtree(root)) == sorted([root, child])
+    assert pages.get(child) is None
+    assert notes.all(child) == []
+    assert pages.get(copies[root]).content == "Kök metni"
+
+
+def test_sticky_notes_batches(db, user_id):
+    page_id = PageStore(db).create(user_id, "Board")
+    notes = StickyNoteStore(db)
+    ids = notes.add_many(page_id, [(f"note {i}", "#ffff00", i, i) for i in range(5)])
+    assert [note.id for note in notes.page(page_id, limit=2)] == ids[:2]
+    assert [note.id for note in notes.page(page_id, after_id=ids[1], limit=2)] == ids[2:4]
+    notes.move_many([(ids[0], 100, 200), (ids[1], 300, 400)])
+    moved = {note.id: (note.x, note.y) for note in notes.all(page_id)}
+    assert moved[ids[0]] == (100, 200) and moved[ids[1]] == (300, 400)
+    deleted = [(note.id, note.content, note.color, note.x, note.y) for note in notes.all(page_id)[:2]]
+    notes.delete_many(ids[:2])
+    assert [note.id for note in notes.all(page_id)] == ids[2:]
+    notes.restore_many(page_id, deleted)
+    assert notes.get_many([page_id])[page_id][0].id == ids[0]
+
+
+def test_sticky_notes_all_reads_past_one_batch(db, user_id, monkeypatch):
+    monkeypatch.setattr(StickyNoteStore, "BATCH", 3)
+    page_id = PageStore(db).create(user_id, "Board")
+    notes = StickyNoteStore(db)
+    ids = notes.add_many(page_id, [("n", "#fff", 0, 0)] * 7)
+    assert [note.id for note in notes.all(page_id)] == ids
+
+
+def test_settings(db, user_id):
+    settings = SettingsStore(db)
+    assert settings.get(user_id) is None
+    assert settings.toggle_dark_mode(user_id) is True
+    assert settings.dark_mode(user_id)
+    assert settings.toggle_dark_mode(user_id) is False
+    settings.update(user_id, 18, "Dark")
+    assert settings.get_many([user_id, user_id + 1]) == {user_id: (0, 18, "Dark")}
+
+
+def test_checklists(checklist_db):
+    user_id = UserStore(checklist_db).register("test-user", "pw")
+    personal = ChecklistStore(checklist_db, *ChecklistStore.PERSONAL)
+    career = ChecklistStore(checklist_db, *ChecklistStore.CAREER)
+    ids = personal.add_many(user_id, ["süt al", "ödev"])
+    career.add(user_id, "CV")
+    personal.set_checked_many([(ids[0], True)])
+    personal.rename(ids[1], "ödevi bitir")
+    assert personal.items(user_id) == [(ids[0], "süt al", True), (ids[1], "ödevi bitir", False)]
+    personal.delete_many(ids)
+    assert personal.items(user_id) == []
+    assert [text for item_id, text, checked in career.items(user_id)] == ["CV"]
+    settings = SettingsStore(checklist_db, key_column="id")
+    settings.set_dark_mode(99, True)
+    assert settings.dark_mode(99)
@@ -0,0 +1,47 @@
+import pytest
+
+from tag_index import bitset, filter_term, members, parse_filter
+from twelveb.core import PageStore, TagStore
+
+
+def test_parse_filter_precedence():
+    assert parse_filter("a b OR c") == ("or", [("and", [("tag", "a"), ("tag", "b")]), ("tag", "c")])
+    assert parse_filter("work AND (urgent OR soon) NOT done") == (
+        "and", [("tag", "work"), ("or", [("tag", "urgent"), ("tag", "soon")]), ("not", ("tag", "done"))])
+    assert parse_filter('"iş planı" #ödev') == ("and", [("tag", "iş planı"), ("tag", "ödev")])
+    assert parse_filter("   ") is None
+    for broken in ("(a", "a )", "AND", "a OR", '"open'):
+        with pytest.raises(ValueError):
+            parse_filter(broken)
+
+
+def test_filter_term_round_trips():
+    for name in ("iş", "iş planı", "and", "a(b"):
+        assert parse_filter(filter_term(name)) == ("tag", name.replace('"', ""))
+
+
+def test_bitsets():
+    assert members(bitset([0, 3, 64, 1000])) == [0, 3, 64, 1000]
+    assert bitset([]) == 0
+
+
+def test_tag_filters_follow_writes(db, user_id):
+    pages = PageStore(db)
+    tags = TagStore(db)
+    a, b, c = pages.create_many(user_id, [(title, None, None, None) for title in ("A", "B", "C")])
+    tags.set_page_tags(user_id, a, ["iş", "Acil"])
+    tags.set_page_tags(user_id, b, ["Proje", "iş"])
+    assert tags.set_page_tags(user_id, c, ["#acil", "ACIL"]) == ["acil"]
+    assert tags.filter(user_id, "iş") == (2, [(a, "A"), (b, "B")])
+    assert tags.filter(user_id, "iş AND NOT proje") == (1, [(a, "A")])
+    assert tags.filter(user_id, "acil NOT iş") == (1, [(c, "C")])
+    assert tags.filter(user_id, "NOT acil")[0] == 1
+    assert {name: count for tag_id, name, color, count in tags.tags(user_id)} == {"iş": 2, "Proje": 1, "Acil": 2}
+    # Cached bitsets are refreshed after tags change
+    tags.set_page_tags(user_id, a, [])
+    assert tags.filter(user_id, "acil") == (1, [(c, "C")])
+    d = pages.create(user_id, "D")
+    assert tags.filter(user_id, "NOT acil")[0] == 3
+    pages.delete_subtree(d)
+    assert tags.filter(user_id, "NOT acil")[0] == 2
+    assert tags.page_tags(c) == ["Acil"]
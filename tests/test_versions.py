@@ -0,0 +1,79 @@
+import random
+from datetime import datetime, timedelta
+
+from twelveb.core import PageStore, VersionStore
+from twelveb.core.version_store import KEYFRAME_EVERY, apply_line_diff, line_diff
+
+
+def edits(count, seed=5):
+    # count texts, each a small edit of the one before
+    rng = random.Random(seed)
+    lines = [f"satır {i} ılık şey\n" for i in range(40)]
+    texts = []
+    for n in range(count):
+        i = rng.randrange(len(lines))
+        choice = rng.random()
+        if choice < 0.4:
+            lines[i] = f"değişti {n} İ\n"
+        elif choice < 0.7:
+            lines.insert(i, f"yeni {n}\n")
+        elif len(lines) > 1:
+            del lines[i]
+        texts.append("".join(lines))
+    return texts
+
+
+def test_line_diff_round_trip():
+    texts = edits(30)
+    for old, new in zip(texts, texts[1:]):
+        assert apply_line_diff(old, line_diff(old, new)) == new
+    assert apply_line_diff("", line_diff("", "a\nb")) == "a\nb"
+    assert apply_line_diff("a\nb\n", line_diff("a\nb\n", "")) == ""
+
+
+def test_every_version_is_rebuilt(db, user_id):
+    page_id = PageStore(db).create(user_id, "Page")
+    versions = VersionStore(db)
+    texts = edits(KEYFRAME_EVERY * 2 + 5)
+    ids = [versions.record(page_id, text) for text in texts]
+    assert versions.record(page_id, texts[-1]) is None
+    # A fresh store reads everything back from the rows alone
+    fresh = VersionStore(db)
+    for version_id, text in zip(ids, texts):
+        assert fresh.text(version_id) == text
+    with db.reader() as conn:
+        kinds = [row[0] for row in conn.execute("SELECT kind FROM page_versions WHERE page_id=? ORDER BY id",
+                                                (page_id,))]
+    assert kinds[0] == "key" and "diff" in kinds and kinds.count("key") >= 2
+    count, stored, full = versions.storage(page_id)
+    assert count == len(texts) and stored < full
+
+
+def test_thin_keeps_the_survivors_readable(db, user_id):
+    page_id = PageStore(db).create(user_id, "Page")
+    versions = VersionStore(db)
+    now = datetime.now()
+    texts = edits(60, seed=9)
+    # One version every 3 hours over a week, oldest first. New keyframes
+    # already thin the chain while recording.
+    ids = [versions.record(page_id, text, now - timedelta(hours=3 * (len(texts) - i)))
+           for i, text in enumerate(texts)]
+    versions.thin(page_id, now)
+    left = {row[0] for row in versions.versions(page_id)}
+    assert ids[-1] in left and len(left) < len(texts)
+    assert versions.thin(page_id, now) == 0
+    fresh = VersionStore(db)
+    for version_id, text in zip(ids, texts):
+        if version_id in left:
+            assert fresh.text(version_id) == text
+    # Appending after a thin continues the chain
+    new_id = versions.record(page_id, texts[-1] + "son\n", now)
+    assert VersionStore(db).text(new_id) == texts[-1] + "son\n"
+
+
+def test_save_content_keeps_the_first_text_as_a_version(db, user_id):
+    pages = PageStore(db)
+    page_id = pages.create(user_id, "Page", content="önce\n")
+    pages.save_content(page_id, "sonra\n")
+    rows = pages.versions.versions(page_id)
+    assert [pages.versions.text(row[0]) for row in reversed(rows)] == ["önce\n", "sonra\n"]
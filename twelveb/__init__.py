@@ -0,0 +1,10 @@
+# The wx views live in twelveb.app and are only imported when one of them is
+# asked for, so `import twelveb` and `twelveb.core` work without wx.
+GUI_NAMES = ("TwelveBApp", "SettingsDialog", "LoginDialog", "RegisterDialog", "ForgotPasswordDialog")
+
+
+def __getattr__(name):
+    if name in GUI_NAMES:
+        from twelveb import app
+        return getattr(app, name)
+    raise AttributeError(f"module 'twelveb' has no attribute {name!r}")
@@ -0,0 +1,9 @@
+import wx
+
+from twelveb.app import LoginDialog
+
+if __name__ == "__main__":
+    app = wx.App()
+    login_dialog = LoginDialog(None)
+    login_dialog.ShowModal()
+    app.MainLoop()
@@ -0,0 +1,1270 @@
+import wx
+import sqlite3
+import json
+import os
+import time
+from autosave import AutosaveBuffer
+from database_view import DatabaseDialog
+from db_worker import DatabaseWorker
+from page_tree import PageTree
+from page_cache import PageCache
+from sticky_canvas import StickyCanvas
+from tag_index import filter_term
+from undo import TREE, UndoHistory
+from version_history import VersionHistoryDialog
+from wiki_links import rewrite_links
+from twelveb.core import DatabaseManager, DatabaseStore, PageStore, SessionStore, SettingsStore, StickyNoteStore, TagStore, UserStore
+
+WELCOME_TEXT = """
+# Welcome to TwelveB! 🎉
+
+## Core Features:
+
+### 1. Page Management
+- Create unlimited pages
+- Organize pages in a hierarchical structure
+- Drag and drop pages to reorganize
+- Search through all your pages
+
+### 2. Rich Text Editing
+- Format text (bold, italic, underline)
+- Create headings and lists
+- Add code blocks
+- Insert images and links
+
+### 3. Sticky Notes
+- Add colorful sticky notes to any page
+- Drag and position notes anywhere
+- Choose from multiple colors
+- Group related notes together
+
+### 4. Organization
+- Tag pages for better organization
+- Color-code pages and notes
+- Create custom categories
+- Quick search and filter
+
+### 5. Customization
+- Dark/Light mode
+- Customizable font sizes
+- Multiple themes
+- Personal workspace layout
+
+### 6. Security
+- Secure login system
+- Password recovery with security questions
+- User-specific data isolation
+- Automatic data saving
+
+### 7. Additional Features
+- Export pages to different formats
+- Import content from other sources
+- Keyboard shortcuts
+- Auto-save functionality
+
+## Getting Started:
+1. Create a new page using the "+" button
+2. Add content using the rich text editor
+3. Organize your pages using drag and drop
+4. Add sticky notes for quick reminders
+5. Customize your workspace in Settings
+
+## Tips:
+- Use tags to organize related pages
+- Create a hierarchy of pages for better organization
+- Use sticky notes for temporary information
+- Try different themes to find your perfect workspace
+
+Happy organizing! 🚀
+            """
+
+# Old pages are moved to compressed and archive storage in the background,
+# starting a while after launch
+STORAGE_MAINTENANCE_DELAY_MS = 30000
+STORAGE_MAINTENANCE_PAUSE_MS = 500
+STORAGE_MAINTENANCE_BATCH = 20
+
+class TwelveBApp(wx.Frame):
+    def __init__(self, user_id, *args, **kwargs):
+        super(TwelveBApp, self).__init__(*args, **kwargs)
+        self.started_at = time.perf_counter()
+        self.user_id = user_id
+        self.db = DatabaseManager.shared()
+        # All page data is read and written on the worker, never in event handlers
+        self.worker = DatabaseWorker(self.db, wx.CallAfter)
+        self.current_page = None
+        self.autosave = AutosaveBuffer(self.save_page_content)
+        self.history = UndoHistory()
+        self.shown_title = None
+        self.page_cache = PageCache()
+        # save_content is only called from the worker's writer thread
+        self.pages = PageStore(self.db)
+        self.sticky_notes = StickyNoteStore(self.db)
+        self.tags = TagStore(self.db)
+        self.databases = DatabaseStore(self.db)
+        self.settings = SettingsStore(self.db)
+        self.sessions = SessionStore(self.db)
+        # One small row, read up front so the layout is right on the first paint
+        self.session = self.sessions.get(user_id)
+        self.last_content_length = 0
+        self.dragged_page = None
+        # (page_id, title) of the pages linking to the open page
+        self.backlinks = []
+        self.init_ui()
+        self.load_settings()
+        # Runs once the frame is on screen; page data is loaded in the background
+        wx.CallAfter(self.start)
+
+    def start(self):
+        self.shown_at = time.perf_counter()
+        self.SetStatusText("Loading pages…")
+        # Only the first launch of a user has anything to write
+        submit = self.worker.submit if self.session.welcome_created else self.worker.submit_write
+        submit(self.load_startup, self.on_startup_loaded, on_error=self.on_startup_failed)
+        self.load_tags()
+        wx.CallLater(STORAGE_MAINTENANCE_DELAY_MS, self.run_storage_maintenance)
+
+    def load_startup(self, db):
+        # Runs on the worker: one-time setup, the tree as it was left and the last page
+        user_id = self.user_id
+        session = self.session
+        page_id = session.last_page_id
+        if not session.welcome_created:
+            welcome_id = self.create_welcome_page()
+            self.sessions.mark_welcome_created(user_id)
+            page_id = page_id or welcome_id
+        children = self.pages.children_many(user_id, [None] + session.expanded)
+        state = self.pages.get(page_id) if page_id is not None else None
+        return children, page_id, state
+
+    def create_welcome_page(self):
+        # Only created if the user does not have it yet
+        return self.pages.ensure(self.user_id, "Welcome to TwelveB", WELCOME_TEXT, "#f0f8ff")
+
+    def on_startup_loaded(self, result):
+        children, page_id, state = result
+        self.session.welcome_created = True
+        if self.page_tree.showing_results:
+            # The user started searching first; clearing the search loads the tree
+            self.report_startup()
+            return
+        self.page_tree.restore(children, self.session.expanded)
+        if state is not None and self.current_page is None:
+            self.page_cache.put(page_id, state)
+            self.show_page(page_id, state)
+            item = self.page_tree.items.get(page_id)
+            if item is not None:
+                self.pages_tree.SelectItem(item)
+        self.report_startup()
+
+    def on_startup_failed(self, error):
+        print(f"Error loading pages: {error}")
+        self.load_pages()
+        self.report_startup()
+
+    def run_storage_maintenance(self):
+        # Packs and archives pages not edited for a while, a small batch per
+        # write so saves queued meanwhile are not held up. Order keys that
+        # grew long since the last run are respaced first.
+        def maintain(db):
+            self.pages.rebalance()
+            return self.pages.tiers.maintain(limit=STORAGE_MAINTENANCE_BATCH)
+
+        self.worker.submit_write(
+            maintain,
+            self.on_storage_maintenance_done, key="storage maintenance",
+            on_error=lambda error: print(f"Error moving pages to archive storage: {error}"))
+
+    def on_storage_maintenance_done(self, moved):
+        if moved == STORAGE_MAINTENANCE_BATCH:
+            wx.CallLater(STORAGE_MAINTENANCE_PAUSE_MS, self.run_storage_maintenance)
+
+    def report_startup(self):
+        # Time to interactive: from building the frame until the tree and the
+        # last page are on screen
+        shown_ms = (self.shown_at - self.started_at) * 1000
+        ready_ms = (time.perf_counter() - self.started_at) * 1000
+        print(f"Startup: frame shown after {shown_ms:.0f} ms, interactive after {ready_ms:.0f} ms")
+        self.SetStatusText(f"Ready in {ready_ms:.0f} ms")
+
+    def init_ui(self):
+        self.SetTitle("TwelveB")
+        self.SetSize((1200, 800))
+
+        # Create main splitter window
+        self.splitter = wx.SplitterWindow(self)
+        
+        # Left sidebar for pages
+        self.sidebar = wx.Panel(self.splitter)
+        sidebar_sizer = wx.BoxSizer(wx.VERTICAL)
+        
+        # Search box
+        self.search_ctrl = wx.SearchCtrl(self.sidebar, style=wx.TE_PROCESS_ENTER)
+        self.search_ctrl.Bind(wx.EVT_TEXT_ENTER, self.on_search)
+        self.search_ctrl.Bind(wx.EVT_TEXT, self.on_search)
+        sidebar_sizer.Add(self.search_ctrl, 0, wx.EXPAND | wx.ALL, 5)
+        
+        # New page button
+        new_page_btn = wx.Button(self.sidebar, label="+ New Page")
+        new_page_btn.Bind(wx.EVT_BUTTON, self.on_new_page)
+        sidebar_sizer.Add(new_page_btn, 0, wx.EXPAND | wx.ALL, 5)
+        
+        # Pages tree
+        self.pages_tree = wx.TreeCtrl(self.sidebar, style=wx.TR_DEFAULT_STYLE | wx.TR_MULTIPLE | wx.TR_FULL_ROW_HIGHLIGHT)
+        self.page_tree = PageTree(self.pages_tree, self.worker, self.pages, self.user_id)
+        self.pages_tree.Bind(wx.EVT_TREE_SEL_CHANGED, self.on_page_select)
+        self.pages_tree.Bind(wx.EVT_TREE_BEGIN_DRAG, self.on_page_drag_begin)
+        self.pages_tree.Bind(wx.EVT_TREE_END_DRAG, self.on_page_drag_end)
+        self.pages_tree.Bind(wx.EVT_TREE_ITEM_MENU, self.on_page_menu)
+        sidebar_sizer.Add(self.pages_tree, 1, wx.EXPAND | wx.ALL, 5)
+        
+        # Tags with their page counts; selecting tags or typing a filter such
+        # as "work AND NOT done" narrows the tree down to the matching pages
+        sidebar_sizer.Add(wx.StaticText(self.sidebar, label="Tags"), 0, wx.LEFT | wx.RIGHT, 5)
+        self.tag_filter = wx.SearchCtrl(self.sidebar, style=wx.TE_PROCESS_ENTER)
+        self.tag_filter.SetDescriptiveText("work AND NOT done")
+        self.tag_filter.Bind(wx.EVT_TEXT_ENTER, self.on_tag_filter)
+        self.tag_filter.Bind(wx.EVT_TEXT, self.on_tag_filter)
+        sidebar_sizer.Add(self.tag_filter, 0, wx.EXPAND | wx.ALL, 5)
+        self.tag_list = wx.ListBox(self.sidebar, size=(-1, 150), style=wx.LB_EXTENDED)
+        self.tag_list.Bind(wx.EVT_LISTBOX, self.on_tag_select)
+        self.tag_list.Bind(wx.EVT_CONTEXT_MENU, self.on_tag_menu)
+        self.tag_rows = []
+        sidebar_sizer.Add(self.tag_list, 0, wx.EXPAND | wx.LEFT | wx.RIGHT | wx.BOTTOM, 5)
+        
+        self.sidebar.SetSizer(sidebar_sizer)
+        
+        # Main content area
+        self.content = wx.Panel(self.splitter)
+        content_sizer = wx.BoxSizer(wx.VERTICAL)
+        
+        # Path of the open page, filled in once the page is shown
+        self.breadcrumb = wx.StaticText(self.content, label="", style=wx.ST_ELLIPSIZE_START)
+        content_sizer.Add(self.breadcrumb, 0, wx.EXPAND | wx.LEFT | wx.RIGHT | wx.TOP, 5)
+        
+        # Page title and toolbar
+        toolbar = wx.Panel(self.content)
+        toolbar_sizer = wx.BoxSizer(wx.HORIZONTAL)
+        
+        self.page_title = wx.TextCtrl(toolbar, style=wx.TE_PROCESS_ENTER)
+        self.page_title.Bind(wx.EVT_TEXT_ENTER, self.on_title_change)
+        toolbar_sizer.Add(self.page_title, 1, wx.EXPAND | wx.RIGHT, 5)
+        
+        # Formatting buttons
+        bold_btn = wx.Button(toolbar, label="B")
+        bold_btn.SetFont(wx.Font(10, wx.FONTFAMILY_DEFAULT, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_BOLD))
+        toolbar_sizer.Add(bold_btn, 0, wx.RIGHT, 2)
+        
+        italic_btn = wx.Button(toolbar, label="I")
+        italic_btn.SetFont(wx.Font(10, wx.FONTFAMILY_DEFAULT, wx.FONTSTYLE_ITALIC, wx.FONTWEIGHT_NORMAL))
+        toolbar_sizer.Add(italic_btn, 0, wx.RIGHT, 2)
+        
+        # Add sticky note button to toolbar
+        sticky_note_btn = wx.Button(toolbar, label="📝")
+        sticky_note_btn.Bind(wx.EVT_BUTTON, self.on_add_sticky_note)
+        toolbar_sizer.Add(sticky_note_btn, 0, wx.RIGHT, 2)
+        
+        toolbar.SetSizer(toolbar_sizer)
+        content_sizer.Add(toolbar, 0, wx.EXPAND | wx.ALL, 5)
+        
+        # Page content above the sticky note board, which is built on first use
+        self.editor_splitter = wx.SplitterWindow(self.content, style=wx.SP_LIVE_UPDATE)
+        self.content_text = wx.TextCtrl(self.editor_splitter, style=wx.TE_MULTILINE | wx.TE_RICH2)
+        self.content_text.Bind(wx.EVT_TEXT, self.on_content_change)
+        self.sticky_canvas = None
+        self.editor_splitter.Initialize(self.content_text)
+        self.editor_splitter.SetMinimumPaneSize(80)
+        self.editor_splitter.SetSashGravity(1.0)
+        content_sizer.Add(self.editor_splitter, 1, wx.EXPAND | wx.ALL, 5)
+        
+        # Pages whose text links to the open page; double-click opens one
+        self.backlinks_label = wx.StaticText(self.content, label="")
+        content_sizer.Add(self.backlinks_label, 0, wx.LEFT | wx.RIGHT, 5)
+        self.backlink_list = wx.ListBox(self.content, size=(-1, 70), style=wx.LB_SINGLE)
+        self.backlink_list.Bind(wx.EVT_LISTBOX_DCLICK, self.on_backlink_open)
+        content_sizer.Add(self.backlink_list, 0, wx.EXPAND | wx.LEFT | wx.RIGHT | wx.BOTTOM, 5)
+        
+        self.content.SetSizer(content_sizer)
+        
+        # Set up splitter
+        self.splitter.SplitVertically(self.sidebar, self.content)
+        self.splitter.SetMinimumPaneSize(200)
+        self.splitter.SetSashPosition(self.session.sash_position or 250)
+        
+        # Create menu bar
+        menubar = wx.MenuBar()
+        
+        # File menu
+        file_menu = wx.Menu()
+        new_page = file_menu.Append(wx.ID_ANY, "New Page", "Create a new page")
+        page_history = file_menu.Append(wx.ID_ANY, "Page History...", "Compare and restore saved versions of this page")
+        file_menu.AppendSeparator()
+        settings = file_menu.Append(wx.ID_ANY, "Settings", "Open settings")
+        file_menu.AppendSeparator()
+        exit_item = file_menu.Append(wx.ID_EXIT, "Exit", "Exit the application")
+        menubar.Append(file_menu, "File")
+        
+        # Edit menu
+        edit_menu = wx.Menu()
+        edit_menu.Append(wx.ID_UNDO, "Undo\tCtrl+Z", "Undo last action")
+        edit_menu.Append(wx.ID_REDO, "Redo\tCtrl+Y", "Redo last action")
+        menubar.Append(edit_menu, "Edit")
+        
+        # View menu
+        view_menu = wx.Menu()
+        dark_mode = view_menu.Append(wx.ID_ANY, "Dark Mode", "Toggle dark mode", kind=wx.ITEM_CHECK)
+        menubar.Append(view_menu, "View")
+        
+        self.SetMenuBar(menubar)
+        
+        # Bind events
+        self.Bind(wx.EVT_MENU, self.on_new_page, new_page)
+        self.Bind(wx.EVT_MENU, self.on_page_history, page_history)
+        self.Bind(wx.EVT_UPDATE_UI, self.on_update_page_history, page_history)
+        self.Bind(wx.EVT_MENU, self.on_settings, settings)
+        self.Bind(wx.EVT_MENU, self.on_exit, exit_item)
+        self.Bind(wx.EVT_MENU, self.on_dark_mode, dark_mode)
+        self.Bind(wx.EVT_MENU, self.on_undo, id=wx.ID_UNDO)
+        self.Bind(wx.EVT_MENU, self.on_redo, id=wx.ID_REDO)
+        self.Bind(wx.EVT_UPDATE_UI, self.on_update_undo, id=wx.ID_UNDO)
+        self.Bind(wx.EVT_UPDATE_UI, self.on_update_redo, id=wx.ID_REDO)
+        
+        # Autosave timer, restarted on every edit so it fires once typing pauses
+        self.autosave_timer = wx.Timer(self)
+        self.Bind(wx.EVT_TIMER, self.on_autosave_timer, self.autosave_timer)
+        self.Bind(wx.EVT_CLOSE, self.on_close)
+        
+        # Loading state for work running on the database worker
+        self.CreateStatusBar()
+        
+        self.Layout()
+
+    def ensure_sticky_canvas(self):
+        if self.sticky_canvas is None:
+            self.sticky_canvas = StickyCanvas(self.editor_splitter, self.on_sticky_notes_moved,
+                                              self.on_sticky_notes_deleted)
+            self.editor_splitter.SplitHorizontally(self.content_text, self.sticky_canvas,
+                                                   self.session.editor_sash_position or -250)
+        return self.sticky_canvas
+
+    def load_settings(self):
+        user_id = self.user_id
+        self.worker.submit(lambda db: self.settings.get(user_id), self.on_settings_loaded,
+                           key="settings", after_writes=True)
+
+    def on_settings_loaded(self, settings):
+        if settings:
+            dark_mode, font_size, theme = settings
+            if dark_mode:
+                self.apply_dark_mode(True)
+            self.apply_font_size(font_size)
+
+    def apply_font_size(self, font_size):
+        self.content_text.SetFont(wx.Font(font_size, wx.FONTFAMILY_DEFAULT, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_NORMAL))
+
+    def load_pages(self):
+        try:
+            # Only the top level; children are loaded when their parent is expanded
+            self.page_tree.load_top_level()
+        except Exception as e:
+            print(f"Error loading pages: {str(e)}")
+            wx.MessageBox(f"Error loading pages: {str(e)}", "Error", wx.OK | wx.ICON_ERROR)
+
+    def on_new_page(self, event):
+        dialog = wx.TextEntryDialog(self, "Enter page title:", "New Page")
+        if dialog.ShowModal() == wx.ID_OK:
+            title = dialog.GetValue()
+            if title:
+                user_id = self.user_id
+                self.worker.submit_write(
+                    lambda db: self.pages.create(user_id, title),
+                    lambda page_id: self.page_tree.add_page(page_id, title))
+        dialog.Destroy()
+
+    def on_page_drag_begin(self, event):
+        self.dragged_page = self.page_tree.page_id_of(event.GetItem())
+        if self.dragged_page is not None:
+            event.Allow()
+
+    def on_page_drag_end(self, event):
+        page_id = self.dragged_page
+        self.dragged_page = None
+        target = event.GetItem()
+        if page_id is None or not target or not target.IsOk() or self.page_tree.showing_results:
+            return
+        new_parent = self.page_tree.page_id_of(target)
+        # Dropping a page onto itself or one of its descendants would create a cycle
+        if new_parent == page_id or (new_parent is not None and self.page_tree.is_ancestor(page_id, new_parent)):
+            return
+        item = self.page_tree.items[page_id]
+        old_parent = self.page_tree.page_id_of(self.pages_tree.GetItemParent(item))
+        title = self.pages_tree.GetItemText(item)
+        if new_parent != old_parent:
+            old_before = self.page_tree.next_sibling_id(page_id)
+            self.history.record(TREE, "page_move", (page_id, title, old_parent, new_parent, old_before, None))
+            self.move_page(page_id, title, new_parent)
+
+    def move_page(self, page_id, title, new_parent, before_id=None):
+        # Puts the page under new_parent, just before the page before_id or last
+        if new_parent is not None and (new_parent == page_id or self.page_tree.is_ancestor(page_id, new_parent)):
+            return
+        self.worker.submit_write(lambda db: self.pages.move(page_id, new_parent, before_id))
+        item = self.page_tree.move_page(page_id, title, new_parent, before_id)
+        if item is not None and page_id == self.current_page:
+            self.pages_tree.SelectItem(item)
+
+    def reorder_page(self, page_id, step):
+        # Move Up (step -1) and Move Down (step 1) among the page's siblings
+        item = self.page_tree.items[page_id]
+        parent_id = self.page_tree.page_id_of(self.pages_tree.GetItemParent(item))
+        title = self.pages_tree.GetItemText(item)
+        if step < 0:
+            sibling = self.pages_tree.GetPrevSibling(item)
+            if not sibling.IsOk():
+                return
+            before_id = self.page_tree.page_id_of(sibling)
+        else:
+            sibling = self.pages_tree.GetNextSibling(item)
+            if not sibling.IsOk():
+                return
+            before_id = self.page_tree.next_sibling_id(self.page_tree.page_id_of(sibling))
+        old_before = self.page_tree.next_sibling_id(page_id)
+        self.history.record(TREE, "page_move", (page_id, title, parent_id, parent_id, old_before, before_id))
+        self.move_page(page_id, title, parent_id, before_id)
+
+    def on_page_menu(self, event):
+        item = event.GetItem()
+        page_id = self.page_tree.page_id_of(item)
+        if page_id is None or self.page_tree.showing_results:
+            return
+        menu = wx.Menu()
+        move_up = menu.Append(wx.ID_ANY, "Move Up")
+        move_down = menu.Append(wx.ID_ANY, "Move Down")
+        move_up.Enable(self.pages_tree.GetPrevSibling(item).IsOk())
+        move_down.Enable(self.pages_tree.GetNextSibling(item).IsOk())
+        menu.AppendSeparator()
+        tags = menu.Append(wx.ID_ANY, "Tags...")
+        database = menu.Append(wx.ID_ANY, "Database View...")
+        duplicate = menu.Append(wx.ID_ANY, "Duplicate")
+        delete = menu.Append(wx.ID_ANY, "Delete...")
+        self.Bind(wx.EVT_MENU, lambda e: self.edit_page_tags(page_id), tags)
+        self.Bind(wx.EVT_MENU, lambda e: self.show_database(page_id), database)
+        self.Bind(wx.EVT_MENU, lambda e: self.reorder_page(page_id, -1), move_up)
+        self.Bind(wx.EVT_MENU, lambda e: self.reorder_page(page_id, 1), move_down)
+        self.Bind(wx.EVT_MENU, lambda e: self.duplicate_page(page_id), duplicate)
+        self.Bind(wx.EVT_MENU, lambda e: self.delete_page(page_id), delete)
+        self.pages_tree.PopupMenu(menu)
+        menu.Destroy()
+
+    def duplicate_page(self, page_id):
+        # The copy goes next to the original, with everything below it
+        item = self.page_tree.items[page_id]
+        parent_id = self.page_tree.page_id_of(self.pages_tree.GetItemParent(item))
+        title = self.pages_tree.GetItemText(item) + " (copy)"
+        has_children = self.pages_tree.ItemHasChildren(item)
+        before_id = self.page_tree.next_sibling_id(page_id)
+        self.flush_autosave()
+        self.worker.submit_write(
+            lambda db: self.pages.duplicate_subtree(page_id, parent_id, title),
+            lambda copies: self.page_tree.add_page(copies[page_id], title, parent_id, has_children, before_id))
+        # The copies carry the tags of the originals
+        self.load_tags()
+
+    def delete_page(self, page_id):
+        title = self.pages_tree.GetItemText(self.page_tree.items[page_id])
+        answer = wx.MessageBox(f'Delete "{title}" and all pages below it?', "Delete Page",
+                               wx.YES_NO | wx.NO_DEFAULT | wx.ICON_WARNING, self)
+        if answer != wx.YES:
+            return
+        self.flush_autosave()
+        self.worker.submit_write(lambda db: self.pages.delete_subtree(page_id), self.on_pages_deleted)
+
+    def on_pages_deleted(self, page_ids):
+        if not page_ids:
+            return
+        self.page_tree.remove_page(page_ids[0])
+        self.load_tags()
+        for page_id in page_ids:
+            self.page_cache.invalidate(page_id)
+            self.history.forget(page_id)
+        if self.current_page in page_ids:
+            self.current_page = None
+            self.autosave.begin(None, "")
+            self.history.begin(None, "")
+            self.page_title.ChangeValue("")
+            self.content_text.ChangeValue("")
+            self.breadcrumb.SetLabel("")
+            self.backlinks = []
+            self.backlinks_label.SetLabel("")
+            self.backlink_list.Clear()
+            if self.sticky_canvas is not None:
+                self.sticky_canvas.set_notes([])
+
+    def load_breadcrumb(self, page_id):
+        self.worker.submit(lambda db: self.pages.ancestors(page_id),
+                           lambda chain: self.on_breadcrumb_loaded(page_id, chain),
+                           key="breadcrumb", after_writes=True)
+
+    def on_breadcrumb_loaded(self, page_id, chain):
+        if page_id == self.current_page:
+            self.breadcrumb.SetLabel(" › ".join(title for ancestor_id, title in chain))
+
+    def on_page_select(self, event):
+        # Tree items carry their page id, so duplicate titles are not a problem
+        page_id = self.page_tree.page_id_of(event.GetItem())
+        if page_id is not None and page_id != self.current_page:
+            self.load_page_content(page_id)
+
+    def load_page_content(self, page_id):
+        # Never lose pending edits of the page we are leaving
+        self.flush_autosave()
+        state = self.page_cache.get(page_id)
+        if state is not None:
+            self.worker.cancel("page")
+            self.show_page(page_id, state)
+            return
+        # A newer selection cancels this load, so only the last click is shown
+        self.SetStatusText("Loading page…")
+        self.worker.submit(
+            lambda db: self.pages.get(page_id),
+            lambda loaded: self.on_page_state_loaded(page_id, loaded),
+            key="page", after_writes=True)
+
+    def on_page_state_loaded(self, page_id, state):
+        self.SetStatusText("")
+        if state is None:
+            return
+        # Edits made while the load was in flight are already in the cache
+        cached = self.page_cache.get(page_id)
+        if cached is None:
+            self.page_cache.put(page_id, state)
+        else:
+            state = cached
+        self.show_page(page_id, state)
+
+    def show_page(self, page_id, state):
+        # The user may have kept typing while the page was loading
+        self.flush_autosave()
+        self.current_page = page_id
+        
+        # Set page title and content
+        # ChangeValue does not emit EVT_TEXT, so opening a page does not rewrite it
+        self.page_title.ChangeValue(state.title)
+        self.shown_title = state.title
+        self.content_text.ChangeValue(state.content)
+        self.last_content_length = self.content_text.GetLastPosition()
+        self.autosave.begin(page_id, state.content)
+        self.history.begin(page_id, state.content)
+        
+        # Set page color
+        self.ensure_sticky_canvas()
+        if state.color:
+            self.content.SetBackgroundColour(wx.Colour(state.color))
+            self.sticky_canvas.SetBackgroundColour(wx.Colour(state.color))
+        
+        # Load sticky notes, clearing the ones of the previous page
+        self.load_sticky_notes(page_id, state)
+        self.load_breadcrumb(page_id)
+        self.load_backlinks(page_id)
+        
+        self.Refresh()
+
+    def on_title_change(self, event):
+        if self.current_page:
+            new_title = self.page_title.GetValue()
+            page_id = self.current_page
+            if new_title != self.shown_title:
+                self.history.record(page_id, "title", (page_id, self.shown_title, new_title))
+                self.set_page_title(page_id, new_title, self.shown_title)
+
+    def set_page_title(self, page_id, title, old_title):
+        # Links to the page are rewritten along with the title; pending
+        # edits go first, as the open page may be one of the linking pages
+        self.flush_autosave()
+        self.worker.submit_write(lambda db: self.pages.rename(page_id, title),
+                                 lambda page_ids: self.on_links_rewritten(page_ids, old_title, title))
+        self.page_cache.update(page_id, title=title)
+        self.page_tree.rename_page(page_id, title)
+        if page_id == self.current_page:
+            self.page_title.ChangeValue(title)
+            self.shown_title = title
+
+    def on_links_rewritten(self, page_ids, old_title, new_title):
+        for page_id in page_ids:
+            if page_id != self.current_page:
+                self.page_cache.invalidate(page_id)
+                continue
+            # The same rewrite in the editor, as an edit Undo can take back
+            text = self.content_text.GetValue()
+            rewritten = rewrite_links(text, old_title, new_title)
+            if rewritten != text:
+                self.restore_text(rewritten)
+
+    def load_backlinks(self, page_id):
+        self.worker.submit(lambda db: self.pages.links.backlinks(page_id),
+                           lambda rows: self.on_backlinks_loaded(page_id, rows),
+                           key="backlinks", after_writes=True)
+
+    def on_backlinks_loaded(self, page_id, rows):
+        if page_id != self.current_page:
+            return
+        self.backlinks = rows
+        self.backlinks_label.SetLabel(f"Linked from {len(rows)} pages" if rows else "No pages link here")
+        self.backlink_list.Set([title for source_id, title in rows])
+
+    def on_backlink_open(self, event):
+        index = event.GetSelection()
+        if 0 <= index < len(self.backlinks):
+            self.load_page_content(self.backlinks[index][0])
+
+    def on_content_change(self, event):
+        if self.current_page:
+            # Only bookkeeping here; the text itself is read when the buffer is flushed
+            length = self.content_text.GetLastPosition()
+            size_hint = abs(length - self.last_content_length)
+            self.last_content_length = length
+            if self.autosave.note_edit(size_hint):
+                self.flush_autosave()
+            else:
+                self.autosave_timer.StartOnce(self.autosave.idle_interval_ms)
+
+    def on_autosave_timer(self, event):
+        self.flush_autosave()
+
+    def flush_autosave(self):
+        self.autosave_timer.Stop()
+        self.autosave.flush(self.checkpoint_text)
+
+    def checkpoint_text(self):
+        # Read once per flush; the same read records the undo step
+        text = self.content_text.GetValue()
+        self.history.record_text(text)
+        return text
+
+    def undo_scope(self):
+        # Page moves are undone from the tree, everything else on the open page
+        if wx.Window.FindFocus() is self.pages_tree:
+            return TREE
+        return self.current_page
+
+    def on_undo(self, event):
+        self.step_history(undo=True)
+
+    def on_redo(self, event):
+        self.step_history(undo=False)
+
+    def on_update_undo(self, event):
+        scope = self.undo_scope()
+        event.Enable(self.history.can_undo(scope) or (scope == self.current_page and self.autosave.dirty))
+
+    def on_update_redo(self, event):
+        event.Enable(self.history.can_redo(self.undo_scope()))
+
+    def step_history(self, undo):
+        # Typing since the last checkpoint becomes a step of its own first
+        self.flush_autosave()
+        scope = self.undo_scope()
+        if scope is None:
+            return
+        step = self.history.undo(scope) if undo else self.history.redo(scope)
+        if step is not None:
+            self.apply_step(step, reverse=undo)
+
+    def apply_step(self, step, reverse):
+        if step.kind == "text":
+            change = self.history.apply_text(step, reverse)
+            if change is not None:
+                # Only the changed range is replaced; autosave picks it up as an edit
+                start, end, text = change
+                self.content_text.Replace(start, end, text)
+                self.content_text.SetInsertionPoint(start + len(text))
+        elif step.kind == "title":
+            page_id, old_title, new_title = step.data
+            if reverse:
+                self.set_page_title(page_id, old_title, new_title)
+            else:
+                self.set_page_title(page_id, new_title, old_title)
+        elif step.kind in ("sticky_create", "sticky_delete"):
+            page_id, notes = step.data
+            if reverse == (step.kind == "sticky_create"):
+                self.delete_sticky_notes(page_id, notes)
+            else:
+                self.restore_sticky_notes(page_id, notes)
+        elif step.kind == "sticky_move":
+            page_id, moves, origins = step.data
+            self.move_sticky_notes(page_id, origins if reverse else moves)
+        elif step.kind == "page_move":
+            page_id, title, old_parent, new_parent, old_before, new_before = step.data
+            if reverse:
+                self.move_page(page_id, title, old_parent, old_before)
+            else:
+                self.move_page(page_id, title, new_parent, new_before)
+
+    def save_page_content(self, page_id, content):
+        # A queued save of the same page is superseded, it holds older content
+        self.page_cache.update(page_id, content=content)
+        self.worker.submit_write(
+            lambda db: self.pages.save_content(page_id, content),
+            key=("save", page_id))
+
+    def on_search(self, event):
+        search_term = self.search_ctrl.GetValue().strip()
+        if not search_term:
+            self.worker.cancel("search")
+            self.SetStatusText("")
+            if self.tag_filter.GetValue().strip():
+                self.on_tag_filter(None)
+            elif self.page_tree.showing_results:
+                self.load_pages()
+            return
+        
+        # Each keystroke supersedes the search started by the previous one
+        self.SetStatusText("Searching…")
+        user_id = self.user_id
+        self.worker.submit(
+            lambda db: self.pages.search(user_id, search_term),
+            self.on_search_results, key="search")
+
+    def on_search_results(self, results):
+        self.SetStatusText("")
+        rows = []
+        for page_id, title, snippet in results:
+            label = f"{title}  —  {snippet}" if snippet and snippet != title else title
+            rows.append((page_id, label))
+        self.page_tree.show_results("Search Results", rows)
+
+    def load_tags(self):
+        # Counts are kept by triggers, so this is one small read
+        user_id = self.user_id
+        self.worker.submit(lambda db: self.tags.tags(user_id), self.on_tags_loaded,
+                           key="tags", after_writes=True)
+
+    def on_tags_loaded(self, rows):
+        selected = {self.tag_rows[index][1] for index in self.tag_list.GetSelections()}
+        self.tag_rows = rows
+        self.tag_list.Set([f"{name} ({count})" for tag_id, name, color, count in rows])
+        for index, (tag_id, name, color, count) in enumerate(rows):
+            if name in selected:
+                self.tag_list.SetSelection(index)
+
+    def on_tag_select(self, event):
+        # Selected tags make an AND filter, which can be edited further
+        names = [self.tag_rows[index][1] for index in self.tag_list.GetSelections()]
+        self.tag_filter.SetValue(" AND ".join(filter_term(name) for name in names))
+
+    def on_tag_filter(self, event):
+        expression = self.tag_filter.GetValue().strip()
+        if not expression:
+            self.worker.cancel("tag filter")
+            self.SetStatusText("")
+            if self.search_ctrl.GetValue().strip():
+                self.on_search(None)
+            elif self.page_tree.showing_results:
+                self.load_pages()
+            return
+        # Each keystroke supersedes the filter started by the previous one
+        user_id = self.user_id
+        self.worker.submit(
+            lambda db: self.tags.filter(user_id, expression),
+            lambda result: self.on_tag_filter_results(expression, result),
+            key="tag filter", after_writes=True,
+            on_error=lambda error: self.SetStatusText(f"Tag filter: {error}"))
+
+    def on_tag_filter_results(self, expression, result):
+        count, rows = result
+        if count > len(rows):
+            self.SetStatusText(f"{count} pages tagged {expression}, showing the first {len(rows)}")
+        else:
+            self.SetStatusText(f"{count} pages tagged {expression}")
+        self.page_tree.show_results("Tagged Pages", rows)
+
+    def on_tag_menu(self, event):
+        selections = self.tag_list.GetSelections()
+        if not selections:
+            return
+        menu = wx.Menu()
+        delete = menu.Append(wx.ID_ANY, "Delete Tag..." if len(selections) == 1 else "Delete Tags...")
+        self.Bind(wx.EVT_MENU, lambda e: self.delete_tags([self.tag_rows[index] for index in selections]), delete)
+        self.tag_list.PopupMenu(menu)
+        menu.Destroy()
+
+    def delete_tags(self, rows):
+        names = ", ".join(name for tag_id, name, color, count in rows)
+        answer = wx.MessageBox(f"Remove {names} from every page?", "Delete Tags",
+                               wx.YES_NO | wx.NO_DEFAULT | wx.ICON_WARNING, self)
+        if answer != wx.YES:
+            return
+        self.tag_list.SetSelection(wx.NOT_FOUND)
+        for tag_id, name, color, count in rows:
+            self.worker.submit_write(lambda db, tag_id=tag_id: self.tags.delete(tag_id))
+        self.on_page_tags_saved()
+
+    def edit_page_tags(self, page_id):
+        title = self.pages_tree.GetItemText(self.page_tree.items[page_id])
+        self.worker.submit(lambda db: self.tags.page_tags(page_id),
+                           lambda names: self.on_page_tags_loaded(page_id, title, names),
+                           key="page tags", after_writes=True)
+
+    def on_page_tags_loaded(self, page_id, title, names):
+        dialog = wx.TextEntryDialog(self, "Tags, separated by commas:", f"Tags of {title}", ", ".join(names))
+        if dialog.ShowModal() == wx.ID_OK:
+            names = dialog.GetValue().split(",")
+            user_id = self.user_id
+            self.worker.submit_write(lambda db: self.tags.set_page_tags(user_id, page_id, names),
+                                     lambda saved: self.on_page_tags_saved())
+        dialog.Destroy()
+
+    def on_page_tags_saved(self):
+        self.load_tags()
+        if self.tag_filter.GetValue().strip():
+            self.on_tag_filter(None)
+
+    def show_database(self, page_id):
+        title = self.pages_tree.GetItemText(self.page_tree.items[page_id])
+        dialog = DatabaseDialog(self, page_id, title)
+        dialog.ShowModal()
+        dialog.Destroy()
+
+    def on_page_history(self, event):
+        if not self.current_page:
+            return
+        self.flush_autosave()
+        dialog = VersionHistoryDialog(self, self.current_page, self.shown_title)
+        dialog.ShowModal()
+        dialog.Destroy()
+
+    def on_update_page_history(self, event):
+        event.Enable(bool(self.current_page))
+
+    def restore_text(self, text):
+        # An ordinary edit: autosave stores it and Undo brings the text back
+        self.content_text.SetValue(text)
+        self.flush_autosave()
+
+    def on_settings(self, event):
+        dialog = SettingsDialog(self)
+        dialog.ShowModal()
+        dialog.Destroy()
+
+    def on_dark_mode(self, event):
+        # The stored state is toggled, so the result is applied as it comes back
+        user_id = self.user_id
+        self.worker.submit_write(lambda db: self.settings.toggle_dark_mode(user_id), self.apply_dark_mode,
+                                 on_error=lambda error: print(f"Error saving dark mode: {error}"))
+
+    def apply_dark_mode(self, enabled):
+        if enabled:
+            self.SetBackgroundColour(wx.Colour(25, 25, 25))
+            self.content_text.SetBackgroundColour(wx.Colour(25, 25, 25))
+            self.content_text.SetForegroundColour(wx.Colour(255, 255, 255))
+        else:
+            self.SetBackgroundColour(wx.NullColour)
+            self.content_text.SetBackgroundColour(wx.NullColour)
+            self.content_text.SetForegroundColour(wx.NullColour)
+        
+        self.Refresh()
+
+    def on_exit(self, event):
+        self.Close()
+
+    def on_close(self, event):
+        self.flush_autosave()
+        self.save_session()
+        # Waits for queued writes, including the flush and the session above
+        self.worker.stop()
+        event.Skip()
+
+    def save_session(self):
+        session = self.session
+        session.last_page_id = self.current_page
+        session.sash_position = self.splitter.GetSashPosition()
+        if self.sticky_canvas is not None:
+            session.editor_sash_position = self.editor_splitter.GetSashPosition()
+        # Search results say nothing about the tree; keep what was restored
+        if not self.page_tree.showing_results:
+            session.expanded = self.page_tree.expanded_page_ids()
+        user_id = self.user_id
+        self.worker.submit_write(lambda db: self.sessions.save(user_id, session))
+
+    def on_add_sticky_note(self, event):
+        if not self.current_page:
+            wx.MessageBox("Please select a page first!", "Error", wx.OK | wx.ICON_ERROR)
+            return
+            
+        dialog = wx.Dialog(self, title="Add Sticky Note", size=(300, 200))
+        panel = wx.Panel(dialog)
+        vbox = wx.BoxSizer(wx.VERTICAL)
+        
+        # Content
+        content_label = wx.StaticText(panel, label="Note Content:")
+        vbox.Add(content_label, 0, wx.ALL, 5)
+        content_text = wx.TextCtrl(panel, style=wx.TE_MULTILINE)
+        vbox.Add(content_text, 1, wx.EXPAND | wx.ALL, 5)
+        
+        # Color selection
+        color_label = wx.StaticText(panel, label="Color:")
+        vbox.Add(color_label, 0, wx.ALL, 5)
+        color_choice = wx.Choice(panel, choices=[
+            "Yellow (#ffff00)",
+            "Pink (#ffb6c1)",
+            "Green (#90ee90)",
+            "Blue (#87cefa)",
+            "Purple (#d8bfd8)"
+        ])
+        vbox.Add(color_choice, 0, wx.EXPAND | wx.ALL, 5)
+        
+        # Buttons
+        button_box = wx.BoxSizer(wx.HORIZONTAL)
+        save_button = wx.Button(panel, label="Save")
+        cancel_button = wx.Button(panel, label="Cancel")
+        
+        save_button.Bind(wx.EVT_BUTTON, lambda evt: self.save_sticky_note(
+            dialog, content_text.GetValue(), color_choice.GetString(color_choice.GetSelection())
+        ))
+        cancel_button.Bind(wx.EVT_BUTTON, lambda evt: dialog.EndModal(wx.ID_CANCEL))
+        
+        button_box.Add(save_button, 0, wx.RIGHT, 5)
+        button_box.Add(cancel_button, 0)
+        vbox.Add(button_box, 0, wx.ALL | wx.CENTER, 5)
+        
+        panel.SetSizer(vbox)
+        dialog.ShowModal()
+        dialog.Destroy()
+
+    def save_sticky_note(self, dialog, content, color_str):
+        if not content:
+            wx.MessageBox("Please enter some content!", "Error", wx.OK | wx.ICON_ERROR)
+            return
+            
+        color = color_str.split("(")[1].strip(")")
+        page_id = self.current_page
+        # New notes go to the top left of the part of the board in view
+        x, y = (int(v) + 20 for v in self.sticky_canvas.to_board(0, 0))
+        self.worker.submit_write(
+            lambda db: self.sticky_notes.add(page_id, content, color, x, y),
+            lambda note_id: self.on_sticky_note_saved(page_id, note_id, content, color, x, y))
+        dialog.EndModal(wx.ID_OK)
+
+    def on_sticky_note_saved(self, page_id, note_id, content, color, x, y):
+        self.history.record(page_id, "sticky_create", (page_id, [(note_id, content, color, x, y)]))
+        self.page_cache.invalidate(page_id)
+        if page_id == self.current_page:
+            self.sticky_canvas.add_note(note_id, content, color, x, y)
+
+    def load_sticky_notes(self, page_id, state):
+        # Replaces the notes of the previous page; nothing is created per note
+        self.sticky_canvas.set_notes(state.sticky_notes)
+        if state.notes_complete:
+            self.worker.cancel("sticky_notes")
+        else:
+            self.request_sticky_notes(page_id, state)
+
+    def request_sticky_notes(self, page_id, state):
+        # Large boards arrive in batches so the first notes show right away
+        after_id = state.sticky_notes[-1].id if state.sticky_notes else 0
+        self.worker.submit(
+            lambda db: self.sticky_notes.page(page_id, after_id),
+            lambda notes: self.on_sticky_notes_loaded(page_id, state, notes),
+            key="sticky_notes", after_writes=True)
+
+    def on_sticky_notes_loaded(self, page_id, state, notes):
+        state.sticky_notes.extend(notes)
+        if page_id == self.current_page:
+            self.sticky_canvas.add_notes(notes)
+        if len(notes) < StickyNoteStore.BATCH:
+            state.notes_complete = True
+            # Re-measures the entry now that it holds every note
+            if self.page_cache.get(page_id) is state:
+                self.page_cache.put(page_id, state)
+        elif page_id == self.current_page:
+            self.request_sticky_notes(page_id, state)
+
+    def on_sticky_notes_moved(self, moves, origins):
+        page_id = self.current_page
+        if not page_id:
+            return
+        self.history.record(page_id, "sticky_move", (page_id, moves, origins))
+        self.move_sticky_notes(page_id, moves)
+
+    def move_sticky_notes(self, page_id, moves):
+        # A whole multi-note drop is one write job and one commit
+        self.worker.submit_write(lambda db: self.sticky_notes.move_many(moves))
+        if page_id == self.current_page:
+            for note_id, x, y in moves:
+                self.sticky_canvas.move_note(note_id, x, y)
+        state = self.page_cache.get(page_id)
+        if state is not None:
+            positions = {note_id: (x, y) for note_id, x, y in moves}
+            for note in state.sticky_notes:
+                if note.id in positions:
+                    note.x, note.y = positions[note.id]
+
+    def on_sticky_notes_deleted(self, notes):
+        page_id = self.current_page
+        if not page_id:
+            return
+        notes = [tuple(note) for note in notes]
+        self.history.record(page_id, "sticky_delete", (page_id, notes))
+        self.delete_sticky_notes(page_id, notes)
+
+    def delete_sticky_notes(self, page_id, notes):
+        # notes are (note_id, content, color, x, y), kept so undo can restore them
+        note_ids = [note[0] for note in notes]
+        self.worker.submit_write(lambda db: self.sticky_notes.delete_many(note_ids))
+        self.page_cache.invalidate(page_id)
+        if page_id == self.current_page:
+            for note_id in note_ids:
+                self.sticky_canvas.remove_note(note_id)
+
+    def restore_sticky_notes(self, page_id, notes):
+        self.worker.submit_write(lambda db: self.sticky_notes.restore_many(page_id, notes))
+        self.page_cache.invalidate(page_id)
+        if page_id == self.current_page:
+            for note in notes:
+                self.sticky_canvas.add_note(*note)
+
+class SettingsDialog(wx.Dialog):
+    def __init__(self, parent):
+        super(SettingsDialog, self).__init__(parent, title="Settings", size=(300, 200))
+        self.parent = parent
+        self.init_ui()
+
+    def init_ui(self):
+        panel = wx.Panel(self)
+        vbox = wx.BoxSizer(wx.VERTICAL)
+        
+        # Font size
+        font_box = wx.BoxSizer(wx.HORIZONTAL)
+        font_label = wx.StaticText(panel, label="Font Size:")
+        self.font_spin = wx.SpinCtrl(panel, value="16", min=8, max=72)
+        font_box.Add(font_label, 0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, 5)
+        font_box.Add(self.font_spin, 0)
+        vbox.Add(font_box, 0, wx.ALL | wx.EXPAND, 10)
+        
+        # Theme selection
+        theme_box = wx.BoxSizer(wx.HORIZONTAL)
+        theme_label = wx.StaticText(panel, label="Theme:")
+        self.theme_choice = wx.Choice(panel, choices=["Default", "Dark", "Light"])
+        theme_box.Add(theme_label, 0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, 5)
+        theme_box.Add(self.theme_choice, 0)
+        vbox.Add(theme_box, 0, wx.ALL | wx.EXPAND, 10)
+        
+        # Buttons
+        button_box = wx.BoxSizer(wx.HORIZONTAL)
+        save_button = wx.Button(panel, label="Save")
+        cancel_button = wx.Button(panel, label="Cancel")
+        save_button.Bind(wx.EVT_BUTTON, self.on_save)
+        cancel_button.Bind(wx.EVT_BUTTON, self.on_cancel)
+        button_box.Add(save_button, 0, wx.RIGHT, 5)
+        button_box.Add(cancel_button, 0)
+        vbox.Add(button_box, 0, wx.ALL | wx.CENTER, 10)
+        
+        panel.SetSizer(vbox)
+
+    def on_save(self, event):
+        parent = self.parent
+        user_id = parent.user_id
+        font_size = self.font_spin.GetValue()
+        theme = self.theme_choice.GetStringSelection()
+        parent.worker.submit_write(lambda db: parent.settings.update(user_id, font_size, theme),
+                                   lambda result: parent.apply_font_size(font_size),
+                                   on_error=lambda error: print(f"Error saving settings: {error}"))
+        self.EndModal(wx.ID_OK)
+
+    def on_cancel(self, event):
+        self.EndModal(wx.ID_CANCEL)
+
+class LoginDialog(wx.Dialog):
+    def __init__(self, *args, **kwargs):
+        super(LoginDialog, self).__init__(*args, **kwargs)
+        self.init_ui()
+
+    def init_ui(self):
+        self.SetTitle("Login to TwelveB")
+        self.SetSize((400, 300))
+
+        panel = wx.Panel(self)
+        vbox = wx.BoxSizer(wx.VERTICAL)
+
+        # Username
+        username_label = wx.StaticText(panel, label="Username:")
+        vbox.Add(username_label, flag=wx.LEFT | wx.TOP, border=10)
+        self.username_textctrl = wx.TextCtrl(panel)
+        vbox.Add(self.username_textctrl, flag=wx.EXPAND | wx.LEFT | wx.RIGHT | wx.TOP, border=10)
+
+        # Password
+        password_label = wx.StaticText(panel, label="Password:")
+        vbox.Add(password_label, flag=wx.LEFT | wx.TOP, border=10)
+        self.password_textctrl = wx.TextCtrl(panel, style=wx.TE_PASSWORD)
+        vbox.Add(self.password_textctrl, flag=wx.EXPAND | wx.LEFT | wx.RIGHT | wx.TOP, border=10)
+
+        # Buttons
+        button_box = wx.BoxSizer(wx.HORIZONTAL)
+        
+        login_button = wx.Button(panel, label="Login")
+        login_button.Bind(wx.EVT_BUTTON, self.on_login)
+        button_box.Add(login_button, 0, wx.RIGHT, 5)
+        
+        register_button = wx.Button(panel, label="Register")
+        register_button.Bind(wx.EVT_BUTTON, self.on_register)
+        button_box.Add(register_button, 0, wx.RIGHT, 5)
+        
+        forgot_button = wx.Button(panel, label="Forgot Password")
+        forgot_button.Bind(wx.EVT_BUTTON, self.on_forgot_password)
+        button_box.Add(forgot_button, 0)
+        
+        vbox.Add(button_box, flag=wx.ALL | wx.CENTER, border=10)
+
+        panel.SetSizer(vbox)
+
+    def on_login(self, event):
+        username = self.username_textctrl.GetValue()
+        password = self.password_textctrl.GetValue()
+        
+        user_id = UserStore(DatabaseManager.shared()).authenticate(username, password)
+        if user_id is not None:
+            app = wx.GetApp()
+            app.frame = TwelveBApp(user_id, None)
+            app.frame.Show()
+            self.Destroy()
+        else:
+            wx.MessageBox("Invalid username or password!", "Error", wx.OK | wx.ICON_ERROR)
+
+    def on_register(self, event):
+        dialog = RegisterDialog(self)
+        if dialog.ShowModal() == wx.ID_OK:
+            wx.MessageBox("Registration successful! Please login.", "Success", wx.OK | wx.ICON_INFORMATION)
+        dialog.Destroy()
+
+    def on_forgot_password(self, event):
+        dialog = ForgotPasswordDialog(self)
+        dialog.ShowModal()
+        dialog.Destroy()
+
+class RegisterDialog(wx.Dialog):
+    def __init__(self, parent):
+        super(RegisterDialog, self).__init__(parent, title="Register", size=(400, 400))
+        self.init_ui()
+
+    def init_ui(self):
+        panel = wx.Panel(self)
+        vbox = wx.BoxSizer(wx.VERTICAL)
+
+        # Username
+        username_label = wx.StaticText(panel, label="Username:")
+        vbox.Add(username_label, flag=wx.LEFT | wx.TOP, border=10)
+        self.username_textctrl = wx.TextCtrl(panel)
+        vbox.Add(self.username_textctrl, flag=wx.EXPAND | wx.LEFT | wx.RIGHT | wx.TOP, border=10)
+
+        # Password
+        password_label = wx.StaticText(panel, label="Password:")
+        vbox.Add(password_label, flag=wx.LEFT | wx.TOP, border=10)
+        self.password_textctrl = wx.TextCtrl(panel, style=wx.TE_PASSWORD)
+        vbox.Add(self.password_textctrl, flag=wx.EXPAND | wx.LEFT | wx.RIGHT | wx.TOP, border=10)
+
+        # Security Question
+        security_label = wx.StaticText(panel, label="Security Question:")
+        vbox.Add(security_label, flag=wx.LEFT | wx.TOP, border=10)
+        self.security_question = wx.Choice(panel, choices=[
+            "What was your first pet's name?",
+            "In which city were you born?",
+            "What is your mother's maiden name?",
+            "What was your childhood nickname?",
+            "What is the name of your favorite teacher?"
+        ])
+        vbox.Add(self.security_question, flag=wx.EXPAND | wx.LEFT | wx.RIGHT | wx.TOP, border=10)
+
+        # Security Answer
+        answer_label = wx.StaticText(panel, label="Answer:")
+        vbox.Add(answer_label, flag=wx.LEFT | wx.TOP, border=10)
+        self.security_answer = wx.TextCtrl(panel)
+        vbox.Add(self.security_answer, flag=wx.EXPAND | wx.LEFT | wx.RIGHT | wx.TOP, border=10)
+
+        # Register button
+        register_button = wx.Button(panel, label="Register")
+        register_button.Bind(wx.EVT_BUTTON, self.on_register)
+        vbox.Add(register_button, flag=wx.ALL | wx.CENTER, border=10)
+
+        panel.SetSizer(vbox)
+
+    def on_register(self, event):
+        username = self.username_textctrl.GetValue()
+        password = self.password_textctrl.GetValue()
+        security_question = self.security_question.GetString(self.security_question.GetSelection())
+        security_answer = self.security_answer.GetValue()
+
+        if not all([username, password, security_question, security_answer]):
+            wx.MessageBox("All fields are required!", "Error", wx.OK | wx.ICON_ERROR)
+            return
+
+        try:
+            UserStore(DatabaseManager.shared()).register(username, password, security_question, security_answer)
+            self.EndModal(wx.ID_OK)
+        except sqlite3.IntegrityError:
+            wx.MessageBox("Username already exists!", "Error", wx.OK | wx.ICON_ERROR)
+
+class ForgotPasswordDialog(wx.Dialog):
+    def __init__(self, parent):
+        super(ForgotPasswordDialog, self).__init__(parent, title="Forgot Password", size=(400, 300))
+        self.init_ui()
+
+    def init_ui(self):
+        panel = wx.Panel(self)
+        vbox = wx.BoxSizer(wx.VERTICAL)
+
+        # Username
+        username_label = wx.StaticText(panel, label="Username:")
+        vbox.Add(username_label, flag=wx.LEFT | wx.TOP, border=10)
+        self.username_textctrl = wx.TextCtrl(panel)
+        vbox.Add(self.username_textctrl, flag=wx.EXPAND | wx.LEFT | wx.RIGHT | wx.TOP, border=10)
+
+        # Security Question
+        self.security_question_label = wx.StaticText(panel, label="")
+        vbox.Add(self.security_question_label, flag=wx.LEFT | wx.TOP, border=10)
+
+        # Security Answer
+        answer_label = wx.StaticText(panel, label="Answer:")
+        vbox.Add(answer_label, flag=wx.LEFT | wx.TOP, border=10)
+        self.security_answer = wx.TextCtrl(panel)
+        vbox.Add(self.security_answer, flag=wx.EXPAND | wx.LEFT | wx.RIGHT | wx.TOP, border=10)
+
+        # Buttons
+        button_box = wx.BoxSizer(wx.HORIZONTAL)
+        
+        verify_button = wx.Button(panel, label="Verify")
+        verify_button.Bind(wx.EVT_BUTTON, self.on_verify)
+        button_box.Add(verify_button, 0, wx.RIGHT, 5)
+        
+        cancel_button = wx.Button(panel, label="Cancel")
+        cancel_button.Bind(wx.EVT_BUTTON, self.on_cancel)
+        button_box.Add(cancel_button, 0)
+        
+        vbox.Add(button_box, flag=wx.ALL | wx.CENTER, border=10)
+
+        panel.SetSizer(vbox)
+
+    def on_verify(self, event):
+        username = self.username_textctrl.GetValue()
+        answer = self.security_answer.GetValue()
+
+        if not username:
+            wx.MessageBox("Please enter your username!", "Error", wx.OK | wx.ICON_ERROR)
+            return
+
+        result = UserStore(DatabaseManager.shared()).recovery(username)
+
+        if not result:
+            wx.MessageBox("Username not found!", "Error", wx.OK | wx.ICON_ERROR)
+            return
+
+        security_question, security_answer, password = result
+        self.security_question_label.SetLabel(security_question)
+
+        if answer.lower() == security_answer.lower():
+            wx.MessageBox(f"Your password is: {password}", "Password Recovery", wx.OK | wx.ICON_INFORMATION)
+            self.EndModal(wx.ID_OK)
+        else:
+            wx.MessageBox("Incorrect answer!", "Error", wx.OK | wx.ICON_ERROR)
+
+    def on_cancel(self, event):
+        self.EndModal(wx.ID_CANCEL)
@@ -0,0 +1,28 @@
+# Headless data layer of TwelveB. Everything here is plain Python over
+# SQLite, so scripts, worker processes and benchmarks can use it without wx.
+from createTables import DatabaseManager
+from twelveb.core.checklist_store import ChecklistStore
+from twelveb.core.database_store import DatabaseStore
+from twelveb.core.link_store import LinkStore
+from twelveb.core.page_store import PageStore
+from twelveb.core.session_store import Session, SessionStore
+from twelveb.core.settings_store import SettingsStore
+from twelveb.core.sticky_note_store import StickyNoteStore
+from twelveb.core.tag_store import TagStore
+from twelveb.core.user_store import UserStore
+from twelveb.core.version_store import VersionStore
+
+__all__ = [
+    "ChecklistStore",
+    "DatabaseStore",
+    "DatabaseManager",
+    "LinkStore",
+    "PageStore",
+    "Session",
+    "SessionStore",
+    "SettingsStore",
+    "StickyNoteStore",
+    "TagStore",
+    "UserStore",
+    "VersionStore",
+]
@@ -0,0 +1,54 @@
+class ChecklistStore:
+    # One checklist of the checklist app. Its two lists live in tables with
+    # different text columns (notes.note and notes2.note2).
+    PERSONAL = ("notes", "note")
+    CAREER = ("notes2", "note2")
+
+    def __init__(self, db, table, column):
+        self.db = db
+        self.table = table
+        self.column = column
+
+    def items(self, user_id):
+        # (item_id, text, checked) rows in insertion order
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT id, {self.column}, checked FROM {self.table}
+                WHERE user_id=?
+                ORDER BY id
+            """, (user_id,))
+            return [(item_id, text, bool(checked)) for item_id, text, checked in cursor]
+
+    def add(self, user_id, text):
+        return self.add_many(user_id, [text])[0]
+
+    def add_many(self, user_id, texts):
+        item_ids = []
+        with self.db.writing() as conn:
+            cursor = conn.cursor()
+            for text in texts:
+                cursor.execute(f"INSERT INTO {self.table} (user_id, {self.column}) VALUES (?, ?)",
+                               (user_id, text))
+                item_ids.append(cursor.lastrowid)
+        return item_ids
+
+    def rename(self, item_id, text):
+        with self.db.writing() as conn:
+            conn.execute(f"UPDATE {self.table} SET {self.column}=? WHERE id=?", (text, item_id))
+
+    def set_checked(self, item_id, checked):
+        self.set_checked_many([(item_id, checked)])
+
+    def set_checked_many(self, updates):
+        # updates are (item_id, checked)
+        with self.db.writing() as conn:
+            conn.executemany(f"UPDATE {self.table} SET checked=? WHERE id=?",
+                             [(int(checked), item_id) for item_id, checked in updates])
+
+    def delete(self, item_id):
+        self.delete_many([item_id])
+
+    def delete_many(self, item_ids):
+        with self.db.writing() as conn:
+            conn.executemany(f"DELETE FROM {self.table} WHERE id=?", [(item_id,) for item_id in item_ids])
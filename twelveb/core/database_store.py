@@ -0,0 +1,350 @@
+import json
+from datetime import date, datetime
+
+from order_keys import key_between, keys_between
+from search import fold_case
+
+# Database pages: pages whose rows have typed columns, like a Notion table.
+#
+# The columns of a page are rows of database_columns. Each row of the
+# database is a block of type 'row' in the page; its properties hold
+# {column key: value} as JSON, which is what is read to show a row. The
+# values are also copied into row_values, ordered by (column_id, value), so
+# a sort is an index walk and a filter a primary key lookup per row, both
+# inside SQLite: showing 100k rows sorted by a date never decodes the JSON
+# of rows that are not on screen.
+# row_values is always derived from properties by index_rows(), so the
+# two can not disagree in how a value is indexed.
+#
+# Every database has a "Name" text column (key TITLE_KEY), mirrored into the
+# block's content so rows are found by the page search.
+
+COLUMN_TYPES = ("text", "number", "date", "select", "checkbox")
+TITLE_KEY = "title"
+OPERATORS = ("=", "!=", "<", "<=", ">", ">=", "contains", "is empty", "is not empty")
+
+# Indexed value of each property: text goes through fold_case so it sorts
+# and matches regardless of case, a ticked checkbox is 1, anything else as
+# is. SQLite's lower() only knows ASCII, so text is folded in Python, the
+# same way as the filter values in DatabaseStore.condition().
+# {rows} names the row blocks b; CROSS JOIN keeps SQLite from starting at
+# the columns and visiting every row of the page once per column.
+INDEX_ROWS_SQL = """
+    SELECT b.id, c.id, c.type, CASE c.type WHEN 'checkbox' THEN 1 ELSE j.value END
+    FROM {rows}
+    CROSS JOIN json_each(b.properties) j
+    JOIN database_columns c ON c.page_id = b.page_id AND c.key = j.key
+    WHERE b.type = 'row' AND j.value IS NOT NULL AND j.value != ''
+"""
+
+
+class Column:
+    __slots__ = ("id", "key", "name", "type", "options")
+
+    def __init__(self, column_id, key, name, kind, options):
+        self.id = column_id
+        self.key = key
+        self.name = name
+        self.type = kind
+        self.options = json.loads(options) if options else []
+
+
+class DatabaseView:
+    # Result of DatabaseStore.view(): the ids of every matching row in
+    # display order, and (label, first index, count) of each group
+    __slots__ = ("row_ids", "groups")
+
+    def __init__(self, row_ids, groups):
+        self.row_ids = row_ids
+        self.groups = groups
+
+
+def coerce(column, raw):
+    # The stored value of user input for a column, None for empty;
+    # raises ValueError for input the column type can not take
+    if raw is None or isinstance(raw, str) and not raw.strip():
+        return None
+    if column.type == "number":
+        if isinstance(raw, bool):
+            raise ValueError("not a number")
+        number = float(raw)
+        return int(number) if number.is_integer() else number
+    if column.type == "date":
+        if isinstance(raw, (date, datetime)):
+            return raw.isoformat()[:10]
+        return date.fromisoformat(str(raw).strip()[:10]).isoformat()
+    if column.type == "checkbox":
+        if isinstance(raw, str):
+            return True if raw.strip().lower() in ("1", "true", "yes", "x", "✓") else None
+        return True if raw else None
+    return str(raw).strip() if column.type == "select" else str(raw)
+
+
+def index_rows(cursor, page_id, block_ids=None):
+    if block_ids is None:
+        cursor.execute("""
+            DELETE FROM row_values WHERE block_id IN (
+                SELECT id FROM blocks WHERE page_id=? AND type = 'row'
+            )
+        """, (page_id,))
+        cursor.execute(INDEX_ROWS_SQL.format(rows="blocks b")
+                       + " AND b.page_id = ?", (page_id,))
+    else:
+        block_ids = list(block_ids)
+        cursor.executemany("DELETE FROM row_values WHERE block_id=?", [(block_id,) for block_id in block_ids])
+        cursor.execute(INDEX_ROWS_SQL.format(rows="json_each(?) ids CROSS JOIN blocks b ON b.id = ids.value"),
+                       (json.dumps(block_ids),))
+    cursor.executemany("INSERT OR REPLACE INTO row_values (block_id, column_id, value) VALUES (?, ?, ?)",
+                       [(block_id, column_id, index_value(kind, value))
+                        for block_id, column_id, kind, value in cursor.fetchall()])
+
+
+def index_value(kind, value):
+    return fold_case(value) if kind == "text" and isinstance(value, str) else value
+
+
+def copy_database(cursor, old_page_id, new_page_id):
+    # Columns of a duplicated page; its row blocks were copied with the
+    # rest of the blocks and only need indexing
+    cursor.execute("""
+        INSERT INTO database_columns (page_id, key, name, type, options, order_key)
+        SELECT ?, key, name, type, options, order_key FROM database_columns WHERE page_id=?
+        ORDER BY order_key
+    """, (new_page_id, old_page_id))
+    if cursor.rowcount:
+        index_rows(cursor, new_page_id)
+
+
+class DatabaseStore:
+    # Columns, rows and views of database pages. Safe from any thread;
+    # writes go through the writer connection.
+    def __init__(self, db):
+        self.db = db
+
+    @staticmethod
+    def read_columns(conn, page_id):
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT id, key, name, type, options FROM database_columns
+            WHERE page_id=?
+            ORDER BY order_key
+        """, (page_id,))
+        return [Column(*row) for row in cursor]
+
+    def columns(self, page_id):
+        with self.db.reader() as conn:
+            return self.read_columns(conn, page_id)
+
+    def ensure(self, page_id):
+        # Turns the page into a database; returns its columns
+        with self.db.writing() as conn:
+            columns = self.read_columns(conn, page_id)
+            if not columns:
+                conn.execute("""
+                    INSERT INTO database_columns (page_id, key, name, type, order_key)
+                    VALUES (?, ?, 'Name', 'text', ?)
+                """, (page_id, TITLE_KEY, key_between(None, None)))
+                columns = self.read_columns(conn, page_id)
+            return columns
+
+    def add_column(self, page_id, name, kind, options=None):
+        if kind not in COLUMN_TYPES:
+            raise ValueError(f"unknown column type {kind!r}")
+        with self.db.writing() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT max(order_key) FROM database_columns WHERE page_id=?", (page_id,))
+            last_key = cursor.fetchone()[0]
+            # The key is named after the id, and ids are never reused, so the
+            # values a deleted column left in the JSON are never read again
+            cursor.execute("SELECT seq FROM sqlite_sequence WHERE name='database_columns'")
+            row = cursor.fetchone()
+            key = f"c{(row[0] if row else 0) + 1}"
+            options = json.dumps(options or [], ensure_ascii=False)
+            cursor.execute("""
+                INSERT INTO database_columns (page_id, key, name, type, options, order_key)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (page_id, key, name, kind, options, key_between(last_key, None)))
+            return Column(cursor.lastrowid, key, name, kind, options)
+
+    def rename_column(self, column_id, name):
+        with self.db.writing() as conn:
+            conn.execute("UPDATE database_columns SET name=? WHERE id=?", (name, column_id))
+
+    def delete_column(self, column_id):
+        # Its indexed values go with it; the JSON values are left in place
+        with self.db.writing() as conn:
+            conn.execute("DELETE FROM database_columns WHERE id=? AND key != ?", (column_id, TITLE_KEY))
+
+    def add_rows(self, page_id, rows):
+        # rows are {column key: raw value}; appended after the last row in
+        # one transaction. Returns the new block ids.
+        now = datetime.now()
+        block_ids = []
+        with self.db.writing() as conn:
+            cursor = conn.cursor()
+            columns = {column.key: column for column in self.read_columns(conn, page_id)}
+            cursor.execute("SELECT max(order_key) FROM blocks WHERE page_id=? AND type = 'row'", (page_id,))
+            keys = keys_between(cursor.fetchone()[0], None, len(rows))
+            for values, order_key in zip(rows, keys):
+                properties = self.encode(columns, {}, values)
+                cursor.execute("""
+                    INSERT INTO blocks (page_id, type, content, properties, order_key, created_at, updated_at)
+                    VALUES (?, 'row', ?, ?, ?, ?, ?)
+                """, (page_id, properties.get(TITLE_KEY, ""), json.dumps(properties, ensure_ascii=False),
+                      order_key, now, now))
+                block_ids.append(cursor.lastrowid)
+            self.write_options(cursor, columns.values())
+            index_rows(cursor, page_id, block_ids)
+        return block_ids
+
+    @staticmethod
+    def encode(columns, properties, values):
+        # properties updated with raw values; new select choices are added
+        # to their column
+        for key, raw in values.items():
+            column = columns.get(key)
+            if column is None:
+                raise KeyError(f"no column {key!r}")
+            value = coerce(column, raw)
+            if value is None:
+                properties.pop(key, None)
+            else:
+                properties[key] = value
+                if column.type == "select" and value not in column.options:
+                    column.options.append(value)
+        return properties
+
+    @staticmethod
+    def write_options(cursor, columns):
+        cursor.executemany("UPDATE database_columns SET options=? WHERE id=?",
+                           [(json.dumps(column.options, ensure_ascii=False), column.id)
+                            for column in columns if column.type == "select"])
+
+    def update_row(self, block_id, values):
+        # values are {column key: raw value}; returns the row's properties
+        with self.db.writing() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT page_id, properties FROM blocks WHERE id=? AND type = 'row'", (block_id,))
+            row = cursor.fetchone()
+            if row is None:
+                raise LookupError(f"no database row {block_id}")
+            page_id, properties = row
+            columns = {column.key: column for column in self.read_columns(conn, page_id)}
+            properties = self.encode(columns, json.loads(properties or "{}"), values)
+            cursor.execute("""
+                UPDATE blocks SET content=?, properties=?, updated_at=? WHERE id=?
+            """, (properties.get(TITLE_KEY, ""), json.dumps(properties, ensure_ascii=False),
+                  datetime.now(), block_id))
+            self.write_options(cursor, [columns[key] for key in values])
+            index_rows(cursor, page_id, [block_id])
+            return properties
+
+    def delete_rows(self, block_ids):
+        with self.db.writing() as conn:
+            conn.executemany("DELETE FROM blocks WHERE id=? AND type = 'row'",
+                             [(block_id,) for block_id in block_ids])
+
+    def rows(self, block_ids):
+        # {block_id: properties} of the given rows, e.g. the visible ones
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT id, properties FROM blocks
+                WHERE id IN (SELECT value FROM json_each(?))
+            """, (json.dumps(list(block_ids)),))
+            return {block_id: json.loads(properties or "{}") for block_id, properties in cursor}
+
+    def reindex(self, page_id):
+        # Rebuilds row_values of a page from the JSON, e.g. after rows
+        # were written by hand
+        with self.db.writing() as conn:
+            index_rows(conn.cursor(), page_id)
+
+    @staticmethod
+    def condition(row, column, operator, raw):
+        # (SQL, params) of one filter on the row whose id is in the SQL
+        # column row
+        if operator not in OPERATORS:
+            raise ValueError(f"unknown filter {operator!r}")
+        lookup = f"SELECT 1 FROM row_values f WHERE f.block_id = {row} AND f.column_id = ?"
+        if operator == "is empty":
+            return f"NOT EXISTS ({lookup})", [column.id]
+        if operator == "is not empty":
+            return f"EXISTS ({lookup})", [column.id]
+        if operator == "contains":
+            return f"EXISTS ({lookup} AND instr(f.value, ?) > 0)", [column.id, index_value(column.type, str(raw))]
+        value = coerce(column, raw)
+        if value is not None:
+            value = index_value(column.type, value)
+        if column.type == "checkbox":
+            # Only ticked boxes are stored
+            checked = (value is not None) == (operator == "=")
+            return f"{'' if checked else 'NOT '}EXISTS ({lookup})", [column.id]
+        if operator == "!=":
+            return f"NOT EXISTS ({lookup} AND f.value = ?)", [column.id, value]
+        return f"EXISTS ({lookup} AND f.value {operator} ?)", [column.id, value]
+
+    def view(self, page_id, filters=(), sort=None, group_by=None):
+        # filters are (column key, operator, raw value), all of which must
+        # match; sort is (column key, descending) and group_by a column key.
+        # Sorted rows come in the order of the row_values index, followed by
+        # the rows without a value in their own order.
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            columns = {column.key: column for column in self.read_columns(conn, page_id)}
+
+            def where(row):
+                clauses, params = [], []
+                for key, operator, raw in filters:
+                    clause, values = self.condition(row, columns[key], operator, raw)
+                    clauses.append(" AND " + clause)
+                    params.extend(values)
+                return "".join(clauses), params
+
+            row_ids = []
+            clauses, params = where("b.id")
+            if sort is not None:
+                key, descending = sort
+                column_id = columns[key].id
+                sorted_clauses, sorted_params = where("s.block_id")
+                cursor.execute(f"""
+                    SELECT s.block_id FROM row_values s
+                    WHERE s.column_id = ? {sorted_clauses}
+                    ORDER BY s.value {"DESC" if descending else ""}, s.block_id
+                """, [column_id] + sorted_params)
+                row_ids = [row[0] for row in cursor]
+                clauses += " AND NOT EXISTS (SELECT 1 FROM row_values s WHERE s.block_id = b.id AND s.column_id = ?)"
+                params.append(column_id)
+            cursor.execute(f"""
+                SELECT b.id FROM blocks b
+                WHERE b.page_id = ? AND b.type = 'row' {clauses}
+                ORDER BY b.order_key
+            """, [page_id] + params)
+            row_ids.extend(row[0] for row in cursor)
+            groups = []
+            if group_by is not None:
+                row_ids, groups = self.group(cursor, columns[group_by], row_ids)
+            return DatabaseView(row_ids, groups)
+
+    @staticmethod
+    def group(cursor, column, row_ids):
+        # Stable: rows keep their order within a group. Select groups follow
+        # the order of the choices; empty values come last.
+        cursor.execute("SELECT block_id, value FROM row_values WHERE column_id=?", (column.id,))
+        values = dict(cursor.fetchall())
+        buckets = {}
+        for row_id in row_ids:
+            buckets.setdefault(values.get(row_id), []).append(row_id)
+        labels = sorted((value for value in buckets if value is not None),
+                        key=lambda value: (isinstance(value, str), value))
+        if column.type == "select":
+            order = {option: index for index, option in enumerate(column.options)}
+            labels.sort(key=lambda value: order.get(value, len(order)))
+        if None in buckets:
+            labels.append(None)
+        row_ids = []
+        groups = []
+        for value in labels:
+            groups.append((value, len(row_ids), len(buckets[value])))
+            row_ids.extend(buckets[value])
+        return row_ids, groups
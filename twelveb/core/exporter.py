@@ -0,0 +1,252 @@
+import argparse
+import io
+import json
+import re
+import zipfile
+from datetime import datetime
+
+from blocks import FRONT_MATTER_RE, split_markdown
+from createTables import DatabaseManager
+from page_bodies import read_body
+
+# Export of a user's pages into a zip archive, as Markdown files or as JSON
+# Lines.
+#
+# Pages are streamed from one read snapshot. A recursive query walks the
+# page tree depth first, and blocks and sticky notes are read with their own
+# cursors, so only one page's rows are in memory at any time. Each entry is
+# written straight into the archive. An incremental export writes only the
+# pages changed since the last export with the same marker name.
+
+FORMATS = ("markdown", "jsonl")
+MAX_NAME_LENGTH = 100
+
+# (id, title, depth, color, created_at, updated_at, changed) depth first.
+# Ordering the recursion queue by depth descending makes it a stack.
+TREE_QUERY = """
+    WITH RECURSIVE tree(id, title, depth, color, created_at, updated_at) AS (
+        SELECT id, title, 0, color, created_at, updated_at
+        FROM pages WHERE user_id=:user_id AND parent_id IS NULL
+        UNION ALL
+        SELECT p.id, p.title, tree.depth + 1, p.color, p.created_at, p.updated_at
+        FROM tree JOIN pages p ON p.parent_id = tree.id
+        WHERE p.user_id=:user_id
+        ORDER BY 3 DESC
+    )
+    SELECT id, title, depth, color, created_at, updated_at,
+           :since IS NULL OR updated_at > :since
+           OR EXISTS(SELECT 1 FROM sticky_notes s WHERE s.page_id = tree.id AND s.updated_at > :since)
+    FROM tree
+"""
+
+FRONT_MATTER_KEYS = ("title", "tags", "tag", "color", "created", "updated")
+
+_UNSAFE_RE = re.compile(r'[\x00-\x1f<>:"/\\|?*]+')
+
+
+def safe_name(title):
+    name = _UNSAFE_RE.sub(" ", title).strip(" .")[:MAX_NAME_LENGTH].strip(" .")
+    return name or "Untitled"
+
+
+def other_front_matter(front_matter):
+    # The lines of front matter keys the exporter does not write itself,
+    # with any indented or list lines that belong to them
+    lines = []
+    skipping = False
+    for line in front_matter.splitlines():
+        if line[:1] not in (" ", "\t", "-"):
+            skipping = line.partition(":")[0].strip().lower() in FRONT_MATTER_KEYS
+        if not skipping:
+            lines.append(line)
+    return lines
+
+
+class Exporter:
+    def __init__(self, db, user_id, format="markdown", since=None):
+        if format not in FORMATS:
+            raise ValueError(f"unknown export format {format!r}")
+        self.db = db
+        self.user_id = user_id
+        self.format = format
+        self.since = since
+        self.exported = 0
+
+    def pages(self, conn):
+        # (path, page row) of every page; path has no extension. The stack
+        # holds the names of the current page's ancestors and the names
+        # already taken by their children.
+        cursor = conn.cursor()
+        cursor.execute(TREE_QUERY, {"user_id": self.user_id, "since": self.since})
+        taken = set()
+        stack = []
+        for row in cursor:
+            depth = row[2]
+            del stack[depth:]
+            siblings = stack[-1][1] if stack else taken
+            name = base = safe_name(row[1])
+            number = 1
+            while name.lower() in siblings:
+                number += 1
+                name = f"{base} ({number})"
+            siblings.add(name.lower())
+            stack.append((name, set()))
+            yield "/".join(entry[0] for entry in stack), row
+
+    def run(self, path):
+        with self.db.reader() as conn:
+            with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+                if self.format == "markdown":
+                    self.write_markdown(conn, archive)
+                else:
+                    self.write_jsonl(conn, archive)
+                archive.writestr("export.json", json.dumps({
+                    "format": self.format,
+                    "since": str(self.since) if self.since else None,
+                    "exported_at": datetime.now().isoformat(sep=" "),
+                    "pages": self.exported,
+                }, indent=2))
+        return self.exported
+
+    def write_markdown(self, conn, archive):
+        # Page "A/B" is A/B.md; its children are in the folder A/B/
+        for path, (page_id, title, depth, color, created_at, updated_at, changed) in self.pages(conn):
+            if not changed:
+                continue
+            with self.open(archive, path + ".md") as f:
+                f.write("---\n")
+                f.write(f"title: {json.dumps(title, ensure_ascii=False)}\n")
+                tags = self.tags(conn, page_id)
+                if tags:
+                    f.write("tags: [" + ", ".join(json.dumps(tag, ensure_ascii=False) for tag in tags) + "]\n")
+                f.write(f"color: \"{color}\"\ncreated: {created_at}\nupdated: {updated_at}\n")
+                first = True
+                for kind, content in self.blocks(conn, page_id):
+                    if first:
+                        # Imported pages bring their own front matter; merge it into ours
+                        match = FRONT_MATTER_RE.match(content)
+                        if match:
+                            f.writelines(line + "\n" for line in other_front_matter(match.group(1)))
+                            content = content[match.end():]
+                        f.write("---\n")
+                        first = False
+                    f.write(content)
+                if first:
+                    f.write("---\n")
+                header = False
+                for note_id, content, note_color, x, y in self.sticky_notes(conn, page_id):
+                    if not header:
+                        f.write("\n\n## Sticky notes\n\n")
+                        header = True
+                    f.write(f"- ({x}, {y}) {note_color}: " + (content or "").replace("\n", "\n  ") + "\n")
+            self.exported += 1
+
+    def write_jsonl(self, conn, archive):
+        # One page per line; parent_path is the path of the parent page
+        with self.open(archive, "pages.jsonl") as f:
+            for path, (page_id, title, depth, color, created_at, updated_at, changed) in self.pages(conn):
+                if not changed:
+                    continue
+                page = {
+                    "id": page_id,
+                    "title": title,
+                    "path": path,
+                    "parent_path": path.rpartition("/")[0] or None,
+                    "color": color,
+                    "created_at": str(created_at),
+                    "updated_at": str(updated_at),
+                    "tags": self.tags(conn, page_id),
+                    "blocks": [{"type": kind, "content": content}
+                               for kind, content in self.blocks(conn, page_id)],
+                    "sticky_notes": [{"id": note_id, "content": content, "color": note_color, "x": x, "y": y}
+                                     for note_id, content, note_color, x, y in self.sticky_notes(conn, page_id)],
+                }
+                f.write(json.dumps(page, ensure_ascii=False) + "\n")
+                self.exported += 1
+
+    @staticmethod
+    def open(archive, name):
+        # force_zip64 so a single entry may grow past 2 GB while streaming
+        return io.TextIOWrapper(archive.open(name, "w", force_zip64=True), encoding="utf-8", newline="")
+
+    @staticmethod
+    def blocks(conn, page_id):
+        # Pages not yet split into blocks still keep their text in pages.content
+        cursor = conn.cursor()
+        cursor.execute("SELECT content FROM pages WHERE id=? AND content IS NOT NULL", (page_id,))
+        row = cursor.fetchone()
+        if row:
+            yield "text", row[0]
+            return
+        cursor.execute("SELECT type, content FROM blocks WHERE page_id=? AND type != 'row' ORDER BY order_key, id",
+                       (page_id,))
+        empty = True
+        for kind, content in cursor:
+            empty = False
+            yield kind, content or ""
+        if empty:
+            # Packed and cold pages are stored as one body
+            yield from split_markdown(read_body(conn, page_id) or "")
+
+    @staticmethod
+    def sticky_notes(conn, page_id):
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT id, content, color, position_x, position_y
+            FROM sticky_notes
+            WHERE page_id=?
+            ORDER BY id
+        """, (page_id,))
+        return cursor
+
+    @staticmethod
+    def tags(conn, page_id):
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT t.name FROM page_tags pt JOIN tags t ON t.id = pt.tag_id
+            WHERE pt.page_id=?
+            ORDER BY t.name
+        """, (page_id,))
+        return [row[0] for row in cursor.fetchall()]
+
+
+def last_export(db, user_id, name):
+    with db.reader() as conn:
+        row = conn.execute("SELECT exported_at FROM export_markers WHERE user_id=? AND name=?",
+                           (user_id, name)).fetchone()
+    return row[0] if row else None
+
+
+def export_workspace(db, user_id, path, format="markdown", incremental=False, marker=None):
+    # The marker is taken before reading, so pages edited during the export
+    # are picked up again by the next incremental one
+    marker = marker or format
+    since = last_export(db, user_id, marker) if incremental else None
+    started = datetime.now()
+    count = Exporter(db, user_id, format, since).run(path)
+    with db.writing() as conn:
+        conn.execute("""
+            INSERT INTO export_markers (user_id, name, exported_at) VALUES (?, ?, ?)
+            ON CONFLICT(user_id, name) DO UPDATE SET exported_at=excluded.exported_at
+        """, (user_id, marker, started))
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export TwelveB pages into a zip archive")
+    parser.add_argument("output")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--db", default="twelveb.db")
+    parser.add_argument("--format", choices=FORMATS, default="markdown")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only pages changed since the last export with the same marker")
+    parser.add_argument("--marker", help="name of the export marker (default: the format)")
+    args = parser.parse_args()
+
+    db = DatabaseManager.shared(args.db)
+    with db.reader() as conn:
+        user = conn.execute("SELECT id FROM users WHERE username=?", (args.username,)).fetchone()
+    if user is None:
+        parser.error(f"no user named {args.username!r}")
+    count = export_workspace(db, user[0], args.output, args.format, args.incremental, args.marker)
+    print(f"Done: {count} pages exported to {args.output}.")
@@ -0,0 +1,295 @@
+import argparse
+import os
+import re
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime
+
+from blocks import FRONT_MATTER_RE, split_markdown
+from createTables import DatabaseManager
+from migrations import DEFERRED_INDEXES, restore_bulk_load_schema
+from order_keys import keys_between
+from search import drop_search_triggers
+from twelveb.core.page_store import append_key
+from wiki_links import update_links
+
+# Bulk import of a directory of Markdown files (an Obsidian-style vault).
+#
+# Folders become pages and files become their child pages, so the vault's
+# tree is kept through pages.parent_id. Files are parsed in a process pool
+# and written in sized transactions. Only a bounded window of parsed files
+# is in memory at any time. Every written file is recorded in
+# imported_files, so running the same import again continues after the
+# last committed batch. The search triggers and the bulk-loaded indexes are
+# dropped for the duration and rebuilt once at the end, also when the import
+# fails or is interrupted; migrate() repairs a database whose import process
+# was killed outright.
+
+MARKDOWN_EXTENSIONS = (".md", ".markdown")
+BATCH_SIZE = 500
+CHUNK_SIZE = 32
+
+_TITLE_RE = re.compile(r"^#\s+(.+?)\s*#*\s*$", re.M)
+_INLINE_TAG_RE = re.compile(r"(?<![\w#&/])#([^\W\d][\w/-]*)")
+
+
+def front_matter_tags(front_matter):
+    # Accepts "tags: [a, b]", "tags: a, b" and a YAML list under "tags:"
+    tags = []
+    lines = front_matter.splitlines()
+    for i, line in enumerate(lines):
+        key, _, value = line.partition(":")
+        if key.strip().lower() not in ("tags", "tag"):
+            continue
+        value = value.strip().strip("[]")
+        if value:
+            tags.extend(tag.strip().strip("'\"#") for tag in value.split(","))
+        else:
+            for item in lines[i + 1:]:
+                if not item.lstrip().startswith("-"):
+                    break
+                tags.append(item.lstrip()[1:].strip().strip("'\"#"))
+    return [tag for tag in tags if tag]
+
+
+def parse_markdown(name, text):
+    # Returns (title, blocks, tags); the blocks keep the file text as it is
+    # Title: front matter, else the first top-level heading, else the file name
+    title = None
+    tags = []
+    body = text
+    match = FRONT_MATTER_RE.match(text)
+    if match:
+        tags.extend(front_matter_tags(match.group(1)))
+        for line in match.group(1).splitlines():
+            key, _, value = line.partition(":")
+            if key.strip().lower() == "title" and value.strip():
+                title = value.strip().strip("'\"")
+        body = text[match.end():]
+    if title is None:
+        heading = _TITLE_RE.search(body)
+        title = heading.group(1) if heading else os.path.splitext(name)[0]
+    blocks = split_markdown(text)
+    for kind, content in blocks:
+        if kind != "code":
+            tags.extend(_INLINE_TAG_RE.findall(content))
+    unique_tags = []
+    seen = set()
+    for tag in tags:
+        if tag.lower() not in seen:
+            seen.add(tag.lower())
+            unique_tags.append(tag)
+    return title[:500], blocks, unique_tags
+
+
+def parse_markdown_files(root, paths):
+    # Runs in the pool; paths are relative to root
+    parsed = []
+    for path in paths:
+        with open(os.path.join(root, path), encoding="utf-8", errors="replace") as f:
+            text = f.read()
+        parsed.append(parse_markdown(os.path.basename(path), text))
+    return parsed
+
+
+def walk_vault(root):
+    # (folder, files) pairs top-down in a stable order, paths relative to root
+    for directory, folders, files in os.walk(root):
+        folders[:] = sorted(folder for folder in folders if not folder.startswith("."))
+        relative = os.path.relpath(directory, root).replace(os.sep, "/")
+        relative = "" if relative == "." else relative
+        names = sorted(name for name in files if name.lower().endswith(MARKDOWN_EXTENSIONS))
+        yield relative, [f"{relative}/{name}" if relative else name for name in names]
+
+
+class MarkdownImporter:
+    def __init__(self, db, user_id, root, parent_id=None, workers=None, batch_size=None, progress=None):
+        self.db = db
+        self.user_id = user_id
+        self.root = os.path.abspath(root)
+        self.source = self.root
+        self.parent_id = parent_id
+        self.workers = os.cpu_count() if workers is None else workers
+        self.batch_size = batch_size or BATCH_SIZE
+        # Called with (imported, skipped) after every committed batch
+        self.progress = progress
+        self.folders = {}
+        self.tag_ids = {}
+        self.imported = 0
+        self.skipped = 0
+
+    def done_paths(self, paths):
+        # The subset of paths committed by an earlier run, with their page ids
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            done = {}
+            for i in range(0, len(paths), 500):
+                chunk = paths[i:i + 500]
+                cursor.execute(f"""
+                    SELECT path, page_id FROM imported_files
+                    WHERE user_id=? AND source=? AND path IN ({",".join("?" * len(chunk))})
+                """, [self.user_id, self.source] + chunk)
+                done.update(cursor.fetchall())
+        return done
+
+    def work(self):
+        # Folder and file-chunk jobs in walk order, minus what is already imported
+        for folder, files in walk_vault(self.root):
+            yield "folder", folder
+            for i in range(0, len(files), CHUNK_SIZE):
+                chunk = files[i:i + CHUNK_SIZE]
+                done = self.done_paths(chunk)
+                self.skipped += len(done)
+                chunk = [path for path in chunk if path not in done]
+                if chunk:
+                    yield "files", chunk
+
+    def results(self, pool):
+        # Keeps a bounded number of chunks in flight and yields them in order
+        window = max(2, (self.workers or 1) * 4)
+        pending = deque()
+        for kind, payload in self.work():
+            future = None
+            if kind == "files" and pool is not None:
+                future = pool.submit(parse_markdown_files, self.root, payload)
+            elif kind == "files":
+                future = Future()
+                future.set_result(parse_markdown_files(self.root, payload))
+            pending.append((kind, payload, future))
+            while len(pending) > window:
+                yield self.resolve(pending.popleft())
+        while pending:
+            yield self.resolve(pending.popleft())
+
+    @staticmethod
+    def resolve(job):
+        kind, payload, future = job
+        return kind, payload, future.result() if future is not None else None
+
+    def run(self):
+        self.prepare()
+        pool = None
+        try:
+            pool = ProcessPoolExecutor(self.workers) if self.workers else None
+            batch = []
+            size = 0
+            for kind, payload, parsed in self.results(pool):
+                batch.append((kind, payload, parsed))
+                size += len(payload) if kind == "files" else 1
+                if size >= self.batch_size:
+                    self.write(batch)
+                    batch = []
+                    size = 0
+            if batch:
+                self.write(batch)
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+            # Committed batches stay; the next run continues after them
+            self.finish()
+        return self.imported
+
+    def prepare(self):
+        with self.db.writing() as conn:
+            cursor = conn.cursor()
+            drop_search_triggers(cursor)
+            for index in DEFERRED_INDEXES:
+                cursor.execute(f"DROP INDEX IF EXISTS {index}")
+            cursor.execute("SELECT name, id FROM tags WHERE user_id=?", (self.user_id,))
+            for name, tag_id in cursor.fetchall():
+                self.tag_ids.setdefault(name.lower(), tag_id)
+
+    def finish(self):
+        # Also safe to call on its own after an interrupted run
+        with self.db.writing() as conn:
+            restore_bulk_load_schema(conn.cursor())
+
+    def write(self, batch):
+        with self.db.writing() as conn:
+            cursor = conn.cursor()
+            for kind, payload, parsed in batch:
+                if kind == "folder":
+                    self.write_folder(cursor, payload)
+                else:
+                    for path, (title, blocks, tags) in zip(payload, parsed):
+                        self.write_file(cursor, path, title, blocks, tags)
+        if self.progress is not None:
+            self.progress(self.imported, self.skipped)
+
+    def write_folder(self, cursor, folder):
+        cursor.execute("""
+            SELECT page_id FROM imported_files WHERE user_id=? AND source=? AND path=?
+        """, (self.user_id, self.source, folder + "/"))
+        row = cursor.fetchone()
+        if row:
+            self.folders[folder] = row[0]
+            return
+        if folder:
+            parent_folder, _, title = folder.rpartition("/")
+            parent_id = self.folders.get(parent_folder, self.parent_id)
+        else:
+            title = os.path.basename(self.root)
+            parent_id = self.parent_id
+        page_id = self.insert_page(cursor, title, parent_id)
+        self.folders[folder] = page_id
+        cursor.execute("""
+            INSERT INTO imported_files (user_id, source, path, page_id) VALUES (?, ?, ?, ?)
+        """, (self.user_id, self.source, folder + "/", page_id))
+
+    def write_file(self, cursor, path, title, blocks, tags):
+        folder = path.rpartition("/")[0]
+        page_id = self.insert_page(cursor, title, self.folders.get(folder, self.parent_id))
+        now = datetime.now()
+        cursor.executemany("""
+            INSERT INTO blocks (page_id, type, content, order_key, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, [(page_id, kind, content, order_key, now, now)
+              for order_key, (kind, content) in zip(keys_between(None, None, len(blocks)), blocks)])
+        # Links to files further on resolve as their pages are inserted
+        update_links(cursor, page_id, "\n".join(content for kind, content in blocks))
+        if tags:
+            cursor.executemany("INSERT OR IGNORE INTO page_tags (page_id, tag_id) VALUES (?, ?)",
+                               [(page_id, self.tag_id(cursor, tag)) for tag in tags])
+        cursor.execute("""
+            INSERT INTO imported_files (user_id, source, path, page_id) VALUES (?, ?, ?, ?)
+        """, (self.user_id, self.source, path, page_id))
+        self.imported += 1
+
+    def insert_page(self, cursor, title, parent_id):
+        now = datetime.now()
+        cursor.execute("""
+            INSERT INTO pages (user_id, title, parent_id, order_key, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (self.user_id, title, parent_id, append_key(cursor, self.user_id, parent_id), now, now))
+        return cursor.lastrowid
+
+    def tag_id(self, cursor, name):
+        tag_id = self.tag_ids.get(name.lower())
+        if tag_id is None:
+            cursor.execute("INSERT INTO tags (name, user_id) VALUES (?, ?)", (name, self.user_id))
+            tag_id = self.tag_ids[name.lower()] = cursor.lastrowid
+        return tag_id
+
+
+def import_vault(db, user_id, root, parent_id=None, workers=None, batch_size=None, progress=None):
+    return MarkdownImporter(db, user_id, root, parent_id, workers, batch_size, progress).run()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import a folder of Markdown files into TwelveB")
+    parser.add_argument("vault")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--db", default="twelveb.db")
+    parser.add_argument("--parent-id", type=int)
+    parser.add_argument("--workers", type=int, help="parser processes (0 parses in this process)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    db = DatabaseManager.shared(args.db)
+    with db.reader() as conn:
+        user = conn.execute("SELECT id FROM users WHERE username=?", (args.username,)).fetchone()
+    if user is None:
+        parser.error(f"no user named {args.username!r}")
+    count = import_vault(db, user[0], args.vault, args.parent_id, args.workers, args.batch_size,
+                         lambda imported, skipped: print(f"Imported {imported} files ({skipped} already done)"))
+    print(f"Done: {count} files imported.")
@@ -0,0 +1,124 @@
+import argparse
+import json
+
+from createTables import DatabaseManager
+from page_bodies import ensure_archive
+from wiki_links import rebuild_links
+
+# Backlinks and the link graph of the pages, answered from page_links alone
+# (see wiki_links.py); no page text is read. Links go both ways for the
+# graph queries: a page is next to the pages it links to and the pages that
+# link to it. Links of a page to itself are ignored.
+#
+#   python -m twelveb.core.link_store [--db twelveb.db] [--rebuild] [--orphans USERNAME]
+
+NEIGHBORS_QUERY = """
+    SELECT target_id FROM page_links
+    WHERE source_id IN (SELECT value FROM json_each(:ids)) AND target_id IS NOT NULL
+    UNION
+    SELECT source_id FROM page_links
+    WHERE target_id IN (SELECT value FROM json_each(:ids))
+"""
+
+
+class LinkStore:
+    # Safe from any thread; only rebuild() writes
+    def __init__(self, db):
+        self.db = db
+
+    def backlinks(self, page_id):
+        # (page_id, title) of the pages linking to the page, by title
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT l.source_id, (SELECT title FROM pages WHERE id = l.source_id) AS title
+                FROM page_links l
+                WHERE l.target_id = ? AND l.source_id != l.target_id
+                ORDER BY title
+            """, (page_id,))
+            return cursor.fetchall()
+
+    def outgoing(self, page_id):
+        # (page_id, title) of the links of the page by title; page_id is
+        # None for titles no page has
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT l.target_id, coalesce((SELECT title FROM pages WHERE id = l.target_id), l.target_title) AS title
+                FROM page_links l
+                WHERE l.source_id = ?
+                ORDER BY title COLLATE NOCASE
+            """, (page_id,))
+            return cursor.fetchall()
+
+    def within(self, page_id, hops):
+        # {page_id: number of links away} of the pages at most hops links
+        # from the page, the page itself at 0. One query per hop.
+        distances = {page_id: 0}
+        frontier = [page_id]
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            for hop in range(1, hops + 1):
+                if not frontier:
+                    break
+                cursor.execute(NEIGHBORS_QUERY, {"ids": json.dumps(frontier)})
+                frontier = [row[0] for row in cursor if row[0] not in distances]
+                for found in frontier:
+                    distances[found] = hop
+        return distances
+
+    def neighbors(self, page_id):
+        # (page_id, title) of the pages linked to or from the page, by title
+        return self.titles(found for found, hops in self.within(page_id, 1).items() if hops)
+
+    def titles(self, page_ids):
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT id, title FROM pages
+                WHERE id IN (SELECT value FROM json_each(?))
+                ORDER BY title, id
+            """, (json.dumps(list(page_ids)),))
+            return cursor.fetchall()
+
+    def orphans(self, user_id):
+        # (page_id, title) of the pages with no links to or from other pages
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT p.id, p.title FROM pages p
+                WHERE p.user_id = ?
+                  AND NOT EXISTS (SELECT 1 FROM page_links l WHERE l.target_id = p.id AND l.source_id != p.id)
+                  AND NOT EXISTS (SELECT 1 FROM page_links l WHERE l.source_id = p.id AND l.target_id IS NOT NULL
+                                  AND l.target_id != p.id)
+                ORDER BY p.title
+            """, (user_id,))
+            return cursor.fetchall()
+
+    def rebuild(self):
+        # page_links from the text of every page, e.g. after pages were
+        # written by hand; returns the number of links
+        with self.db.writing() as conn:
+            # Before the transaction starts, cold bodies have links too
+            ensure_archive(conn)
+            return rebuild_links(conn.cursor())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild or query the links between TwelveB pages")
+    parser.add_argument("--db", default="twelveb.db")
+    parser.add_argument("--rebuild", action="store_true", help="read the links of every page again")
+    parser.add_argument("--orphans", metavar="USERNAME", help="list the pages of a user with no links")
+    args = parser.parse_args()
+
+    db = DatabaseManager.shared(args.db)
+    links = LinkStore(db)
+    if args.rebuild:
+        print(f"{links.rebuild()} links")
+    if args.orphans:
+        with db.reader() as conn:
+            user = conn.execute("SELECT id FROM users WHERE username=?", (args.orphans,)).fetchone()
+        if user is None:
+            parser.error(f"no user named {args.orphans!r}")
+        for page_id, title in links.orphans(user[0]):
+            print(f"{page_id}\t{title}")
@@ -0,0 +1,407 @@
+import json
+from datetime import datetime
+
+from blocks import BlockStore, fetch_page_text, insert_blocks
+from order_keys import MAX_KEY_LENGTH, key_between, spread_keys
+from page_cache import PageState
+from search import search_pages
+from twelveb.core.database_store import copy_database
+from twelveb.core.link_store import LinkStore
+from twelveb.core.sticky_note_store import StickyNoteStore
+from twelveb.core.storage_tiers import TieredStorage
+from twelveb.core.version_store import VersionStore
+from wiki_links import RESOLVE_SQL, copy_links, linkable, link_key, rewrite_links, update_links
+
+# (page_id, title, has_children) rows of one parent, in the user's order
+CHILDREN_QUERY = """
+    SELECT p.id, p.title,
+           EXISTS(SELECT 1 FROM pages c WHERE c.parent_id = p.id)
+    FROM pages p
+    WHERE p.user_id=? AND p.parent_id IS ?
+    ORDER BY p.order_key, p.id
+"""
+
+# Parent pointers are the only hierarchy; subtrees and ancestor chains are
+# one recursive query each over the parent_id index. A move is one row
+# update, however large the subtree. MAX_DEPTH stops the recursion should a
+# cycle ever make it into the table.
+MAX_DEPTH = 10000
+
+# (page_id, parent_id, title, depth) of a page and everything below it,
+# parents before their children (depth first). Children are looked up by
+# (user_id, parent_id), the covering index of the page tree.
+SUBTREE_QUERY = """
+    WITH RECURSIVE tree(id, user_id, parent_id, title, depth) AS (
+        SELECT id, user_id, parent_id, title, 0 FROM pages WHERE id=:page_id
+        UNION ALL
+        SELECT p.id, p.user_id, p.parent_id, p.title, tree.depth + 1
+        FROM tree CROSS JOIN pages p ON p.user_id IS tree.user_id AND p.parent_id = tree.id
+        WHERE tree.depth < :max_depth
+        ORDER BY 5 DESC
+    )
+    SELECT id, parent_id, title, depth FROM tree
+"""
+
+# (page_id, title) from the top level down to the page itself
+ANCESTORS_QUERY = """
+    WITH RECURSIVE chain(id, parent_id, title, depth) AS (
+        SELECT id, parent_id, title, 0 FROM pages WHERE id=:page_id
+        UNION ALL
+        SELECT p.id, p.parent_id, p.title, chain.depth + 1
+        FROM chain CROSS JOIN pages p ON p.id = chain.parent_id
+        WHERE chain.depth < :max_depth
+    )
+    SELECT id, title FROM chain ORDER BY depth DESC
+"""
+
+
+def append_key(cursor, user_id, parent_id, exclude_id=None):
+    # An order key after every child of parent_id (but exclude_id)
+    cursor.execute("""
+        SELECT max(order_key) FROM pages WHERE user_id IS ? AND parent_id IS ? AND id IS NOT ?
+    """, (user_id, parent_id, exclude_id))
+    return key_between(cursor.fetchone()[0], None)
+
+
+class PageStore:
+    # Pages of the block editor: tree reads, page state, search and writes.
+    # Reads use pooled reader connections and are safe from any thread.
+    # save_content keeps per-page block layouts in a BlockStore and the newest
+    # version of each page in a VersionStore, so call it from one thread only
+    # (the app uses the database worker's writer).
+    def __init__(self, db, block_store=None, versions=None):
+        self.db = db
+        self.block_store = block_store or BlockStore()
+        self.versions = versions or VersionStore(db)
+        self.tiers = TieredStorage(db, self.block_store)
+        # (user_id, parent_id) of siblings whose order keys grew long
+        self.unbalanced = set()
+        self.sticky_notes = StickyNoteStore(db)
+        self.links = LinkStore(db)
+
+    def children(self, user_id, parent_id):
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute(CHILDREN_QUERY, (user_id, parent_id))
+            return cursor.fetchall()
+
+    def children_many(self, user_id, parent_ids):
+        # {parent_id: rows}, read from one snapshot
+        result = {}
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            for parent_id in parent_ids:
+                cursor.execute(CHILDREN_QUERY, (user_id, parent_id))
+                result[parent_id] = cursor.fetchall()
+        return result
+
+    def get(self, page_id):
+        # Comes with the first batch of sticky notes; see notes_complete
+        with self.db.reader() as conn:
+            return self.read(conn, page_id)
+
+    def get_many(self, page_ids):
+        # {page_id: PageState} for the pages that exist
+        result = {}
+        with self.db.reader() as conn:
+            for page_id in page_ids:
+                state = self.read(conn, page_id)
+                if state is not None:
+                    result[page_id] = state
+        return result
+
+    def read(self, conn, page_id):
+        cursor = conn.cursor()
+        cursor.execute("SELECT title, content, color FROM pages WHERE id=?", (page_id,))
+        result = cursor.fetchone()
+        if not result:
+            return None
+        title, content, page_color = result
+        if not content:
+            content = fetch_page_text(conn, page_id)
+        notes = StickyNoteStore.read(conn, page_id)
+        return PageState(title, content, page_color, notes, len(notes) < StickyNoteStore.BATCH)
+
+    def find(self, user_id, title):
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id FROM pages WHERE title=? AND user_id=?", (title, user_id))
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    def search(self, user_id, text):
+        with self.db.reader() as conn:
+            return search_pages(conn, user_id, text)
+
+    def create(self, user_id, title, parent_id=None, content=None, color=None):
+        return self.create_many(user_id, [(title, parent_id, content, color)])[0]
+
+    def create_many(self, user_id, pages):
+        # pages are (title, parent_id, content, color); one transaction.
+        # New pages go after their siblings.
+        now = datetime.now()
+        page_ids = []
+        with self.db.writing() as conn:
+            cursor = conn.cursor()
+            for title, parent_id, content, color in pages:
+                cursor.execute("""
+                    INSERT INTO pages (user_id, title, parent_id, color, order_key, created_at, updated_at)
+                    VALUES (?, ?, ?, COALESCE(?, '#ffffff'), ?, ?, ?)
+                """, (user_id, title, parent_id, color, append_key(cursor, user_id, parent_id), now, now))
+                page_id = cursor.lastrowid
+                if content:
+                    insert_blocks(cursor, page_id, content)
+                    update_links(cursor, page_id, content)
+                page_ids.append(page_id)
+        return page_ids
+
+    def ensure(self, user_id, title, content=None, color=None):
+        # Creates the page unless the user already has one with this title
+        with self.db.writing():
+            page_id = self.find(user_id, title)
+            if page_id is None:
+                page_id = self.create(user_id, title, content=content, color=color)
+            return page_id
+
+    def save_content(self, page_id, content):
+        # Rewrites only the blocks that differ from what is stored, keeps
+        # the saved text as a version of the page and updates its links, all
+        # in one transaction
+        # A page stored as one body goes back to blocks when it is edited
+        self.tiers.unpack(page_id)
+        now = datetime.now()
+        with self.db.writing() as conn:
+            cursor = conn.cursor()
+            try:
+                if not self.versions.has_versions(page_id):
+                    # The first version is what the page held before any edit
+                    self.versions.append(cursor, page_id, self.text(conn, page_id) or "", now)
+                written = self.block_store.write(conn, page_id, content)
+                written += update_links(cursor, page_id, content)
+                self.versions.append(cursor, page_id, content or "", now)
+            except Exception:
+                # Rolled back, so the cached layout and version tip are stale
+                self.block_store.forget(page_id)
+                self.versions.forget(page_id)
+                raise
+        return written
+
+    @staticmethod
+    def text(conn, page_id):
+        cursor = conn.cursor()
+        cursor.execute("SELECT content FROM pages WHERE id=?", (page_id,))
+        row = cursor.fetchone()
+        return (row and row[0]) or fetch_page_text(conn, page_id)
+
+    def rename(self, page_id, title):
+        # Links to the page are rewritten to the new title in the same
+        # transaction. Returns the ids of the pages whose text changed.
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT user_id, title FROM pages WHERE id=?", (page_id,))
+            row = cursor.fetchone()
+            if row is None:
+                return []
+            user_id, old_title = row[0], row[1] or ""
+            relink = linkable(old_title) and linkable(title) and link_key(old_title) != link_key(title)
+            if relink:
+                # Stored bodies are put back into blocks to be rewritten
+                cursor.execute("""
+                    SELECT l.source_id FROM page_links l JOIN page_bodies b ON b.page_id = l.source_id
+                    WHERE l.target_id = ?
+                """, (page_id,))
+                packed = [row[0] for row in cursor.fetchall()]
+        if relink:
+            for source_id in packed:
+                self.tiers.unpack(source_id)
+        now = datetime.now()
+        with self.db.writing() as conn:
+            cursor = conn.cursor()
+            sources = []
+            if relink:
+                cursor.execute("SELECT source_id FROM page_links WHERE target_id=?", (page_id,))
+                sources = [row[0] for row in cursor.fetchall()]
+            cursor.execute("UPDATE pages SET title=?, updated_at=? WHERE id=?", (title, now, page_id))
+            if sources:
+                self.relink_texts(cursor, sources, old_title, title, now)
+                cursor.execute(f"""
+                    UPDATE OR REPLACE page_links SET target_title=?, target_id=({RESOLVE_SQL})
+                    WHERE source_id IN (SELECT value FROM json_each(?)) AND target_title=?
+                """, (title.strip(), user_id, title.strip(), json.dumps(sources), old_title.strip()))
+            return sources
+
+    def relink_texts(self, cursor, page_ids, old_title, new_title, now):
+        # Only blocks with a link are read, and only changed ones written
+        ids = json.dumps(page_ids)
+        for table, query in (("blocks", """
+                SELECT id, content FROM blocks
+                WHERE page_id IN (SELECT value FROM json_each(?)) AND type != 'row' AND content LIKE '%[[%'
+            """), ("pages", """
+                SELECT id, content FROM pages
+                WHERE id IN (SELECT value FROM json_each(?)) AND content LIKE '%[[%'
+            """)):
+            cursor.execute(query, (ids,))
+            changes = []
+            for row_id, content in cursor.fetchall():
+                rewritten = rewrite_links(content, old_title, new_title)
+                if rewritten != content:
+                    changes.append((rewritten, row_id))
+            cursor.executemany(f"UPDATE {table} SET content=? WHERE id=?", changes)
+        cursor.executemany("UPDATE pages SET updated_at=? WHERE id=?", [(now, page_id) for page_id in page_ids])
+        for page_id in page_ids:
+            self.block_store.forget(page_id)
+
+    def move(self, page_id, parent_id, before_id=None):
+        self.move_many([(page_id, parent_id, before_id)])
+
+    def move_many(self, moves):
+        # moves are (page_id, parent_id) or (page_id, parent_id, before_id):
+        # the page goes just before the sibling before_id, or last. One
+        # transaction, and none of the moves happen if any would put a page
+        # below itself. Each move writes only the moved row.
+        now = datetime.now()
+        with self.db.writing() as conn:
+            cursor = conn.cursor()
+            for page_id, parent_id, *before in moves:
+                self.place(cursor, page_id, parent_id, before[0] if before else None, now)
+
+    def place(self, cursor, page_id, parent_id, before_id, now):
+        if parent_id is not None and page_id in self.ancestor_ids(cursor, parent_id):
+            raise ValueError(f"cannot move page {page_id} into its own subtree")
+        cursor.execute("SELECT user_id FROM pages WHERE id=?", (page_id,))
+        row = cursor.fetchone()
+        if row is None:
+            return
+        user_id = row[0]
+        key = None
+        if before_id is not None:
+            cursor.execute("SELECT order_key FROM pages WHERE id=? AND user_id IS ? AND parent_id IS ?",
+                           (before_id, user_id, parent_id))
+            row = cursor.fetchone()
+            if row is not None and row[0] is None:
+                # Siblings from before order keys
+                self.rebalance_siblings(cursor, user_id, parent_id)
+                cursor.execute("SELECT order_key FROM pages WHERE id=?", (before_id,))
+                row = cursor.fetchone()
+            if row is not None:
+                before_key = row[0]
+                cursor.execute("""
+                    SELECT max(order_key) FROM pages
+                    WHERE user_id IS ? AND parent_id IS ? AND order_key < ? AND id != ?
+                """, (user_id, parent_id, before_key, page_id))
+                key = key_between(cursor.fetchone()[0], before_key)
+        if key is None:
+            key = append_key(cursor, user_id, parent_id, page_id)
+        cursor.execute("""
+            UPDATE pages
+            SET parent_id=?, order_key=?, updated_at=?
+            WHERE id=?
+        """, (parent_id, key, now, page_id))
+        if len(key) > MAX_KEY_LENGTH:
+            self.unbalanced.add((user_id, parent_id))
+
+    @staticmethod
+    def rebalance_siblings(cursor, user_id, parent_id):
+        cursor.execute("""
+            SELECT id FROM pages WHERE user_id IS ? AND parent_id IS ? ORDER BY order_key, id
+        """, (user_id, parent_id))
+        page_ids = [row[0] for row in cursor.fetchall()]
+        cursor.executemany("UPDATE pages SET order_key=? WHERE id=?", zip(spread_keys(len(page_ids)), page_ids))
+        return len(page_ids)
+
+    def rebalance(self):
+        # Idle-time upkeep: fresh, evenly spaced order keys for the siblings
+        # and blocks whose keys grew long. Returns the number of rows written.
+        written = self.block_store.rebalance(self.db)
+        while self.unbalanced:
+            user_id, parent_id = self.unbalanced.pop()
+            with self.db.writing() as conn:
+                written += self.rebalance_siblings(conn.cursor(), user_id, parent_id)
+        return written
+
+    @staticmethod
+    def next_sibling(cursor, page_id, parent_id):
+        # The page after page_id among the children of parent_id, if page_id is one
+        cursor.execute("""
+            SELECT n.id FROM pages p CROSS JOIN pages n
+            ON n.user_id IS p.user_id AND n.parent_id IS p.parent_id AND n.order_key > p.order_key
+            WHERE p.id=? AND p.parent_id IS ?
+            ORDER BY n.order_key LIMIT 1
+        """, (page_id, parent_id))
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def ancestor_ids(cursor, page_id):
+        # The page and every page above it
+        cursor.execute(ANCESTORS_QUERY, {"page_id": page_id, "max_depth": MAX_DEPTH})
+        return {row[0] for row in cursor.fetchall()}
+
+    def ancestors(self, page_id):
+        # Breadcrumb: (page_id, title) from the top level down to the page
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute(ANCESTORS_QUERY, {"page_id": page_id, "max_depth": MAX_DEPTH})
+            return cursor.fetchall()
+
+    def subtree(self, page_id):
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute(SUBTREE_QUERY, {"page_id": page_id, "max_depth": MAX_DEPTH})
+            return cursor.fetchall()
+
+    def delete_subtree(self, page_id):
+        # Deletes the page and everything below it; returns the deleted ids.
+        # Blocks, sticky notes, tags, versions and stored bodies cascade.
+        with self.db.writing() as conn:
+            cursor = conn.cursor()
+            cursor.execute(SUBTREE_QUERY, {"page_id": page_id, "max_depth": MAX_DEPTH})
+            page_ids = [row[0] for row in cursor.fetchall()]
+            # The pages_delete_subtree trigger takes the descendants along
+            cursor.execute("DELETE FROM pages WHERE id=?", (page_id,))
+        for deleted in page_ids:
+            self.block_store.forget(deleted)
+            self.versions.forget(deleted)
+        return page_ids
+
+    def duplicate_subtree(self, page_id, parent_id=None, title=None):
+        # Copies the page and everything below it, with blocks, database
+        # columns, links, sticky notes and tags, under parent_id. Returns {old page id: new page id}.
+        now = datetime.now()
+        copies = {}
+        with self.db.writing() as conn:
+            cursor = conn.cursor()
+            cursor.execute(SUBTREE_QUERY, {"page_id": page_id, "max_depth": MAX_DEPTH})
+            for old_id, old_parent, old_title, depth in cursor.fetchall():
+                if depth == 0:
+                    new_parent, new_title = parent_id, title or f"{old_title} (copy)"
+                else:
+                    new_parent, new_title = copies[old_parent], old_title
+                cursor.execute("""
+                    INSERT INTO pages (user_id, title, icon, cover_image, parent_id, color, order_key,
+                                       created_at, updated_at)
+                    SELECT user_id, ?, icon, cover_image, ?, color, order_key, ?, ? FROM pages WHERE id=?
+                """, (new_title, new_parent, now, now, old_id))
+                new_id = copies[old_id] = cursor.lastrowid
+                if depth == 0:
+                    # The copy goes right after the original, or last under another parent
+                    self.place(cursor, new_id, parent_id, self.next_sibling(cursor, old_id, parent_id), now)
+                cursor.execute("""
+                    INSERT INTO blocks (page_id, type, content, properties, order_key, created_at, updated_at)
+                    SELECT ?, type, content, properties, order_key, ?, ? FROM blocks WHERE page_id=?
+                    ORDER BY order_key, id
+                """, (new_id, now, now, old_id))
+                if not cursor.rowcount:
+                    # Packed and cold pages become blocks in the copy
+                    insert_blocks(cursor, new_id, fetch_page_text(conn, old_id))
+                copy_database(cursor, old_id, new_id)
+                copy_links(cursor, old_id, new_id)
+                cursor.execute("""
+                    INSERT INTO sticky_notes (page_id, content, color, position_x, position_y, created_at, updated_at)
+                    SELECT ?, content, color, position_x, position_y, ?, ? FROM sticky_notes WHERE page_id=?
+                    ORDER BY id
+                """, (new_id, now, now, old_id))
+                cursor.execute("""
+                    INSERT INTO page_tags (page_id, tag_id) SELECT ?, tag_id FROM page_tags WHERE page_id=?
+                """, (new_id, old_id))
+        return copies
@@ -0,0 +1,60 @@
+import json
+
+# Expanded tree nodes restored at startup; more than this is not worth the wait
+MAX_EXPANDED = 200
+
+
+class Session:
+    __slots__ = ("last_page_id", "sash_position", "editor_sash_position", "expanded", "welcome_created")
+
+    def __init__(self, last_page_id=None, sash_position=None, editor_sash_position=None,
+                 expanded=None, welcome_created=False):
+        self.last_page_id = last_page_id
+        self.sash_position = sash_position
+        self.editor_sash_position = editor_sash_position
+        # Page ids in tree order, so a parent is always restored before its children
+        self.expanded = expanded or []
+        self.welcome_created = welcome_created
+
+
+class SessionStore:
+    # What a user had open when the app was last closed, plus flags for
+    # one-time setup, so a launch does not have to work them out again
+    def __init__(self, db):
+        self.db = db
+
+    def get(self, user_id):
+        # A user without a row gets the defaults
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT last_page_id, sash_position, editor_sash_position, expanded, welcome_created
+                FROM sessions WHERE user_id=?
+            """, (user_id,))
+            row = cursor.fetchone()
+        if row is None:
+            return Session()
+        last_page_id, sash_position, editor_sash_position, expanded, welcome_created = row
+        return Session(last_page_id, sash_position, editor_sash_position,
+                       json.loads(expanded) if expanded else [], bool(welcome_created))
+
+    def save(self, user_id, session):
+        # The welcome flag is only ever set by mark_welcome_created
+        with self.db.writing() as conn:
+            conn.execute("""
+                INSERT INTO sessions (user_id, last_page_id, sash_position, editor_sash_position, expanded)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(user_id) DO UPDATE SET
+                    last_page_id=excluded.last_page_id,
+                    sash_position=excluded.sash_position,
+                    editor_sash_position=excluded.editor_sash_position,
+                    expanded=excluded.expanded
+            """, (user_id, session.last_page_id, session.sash_position, session.editor_sash_position,
+                  json.dumps(session.expanded[:MAX_EXPANDED])))
+
+    def mark_welcome_created(self, user_id):
+        with self.db.writing() as conn:
+            conn.execute("""
+                INSERT INTO sessions (user_id, welcome_created) VALUES (?, 1)
+                ON CONFLICT(user_id) DO UPDATE SET welcome_created=1
+            """, (user_id,))
@@ -0,0 +1,47 @@
+class SettingsStore:
+    # Per-user settings rows. The checklist database keys its single
+    # settings row by id instead of user_id, hence key_column.
+    def __init__(self, db, key_column="user_id"):
+        self.db = db
+        self.key_column = key_column
+
+    def get(self, key):
+        # (dark_mode, font_size, theme) or None
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT dark_mode, font_size, theme FROM settings WHERE {self.key_column}=?", (key,))
+            return cursor.fetchone()
+
+    def get_many(self, keys):
+        return {key: settings for key, settings in ((key, self.get(key)) for key in keys)
+                if settings is not None}
+
+    def dark_mode(self, key):
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT dark_mode FROM settings WHERE {self.key_column}=?", (key,))
+            row = cursor.fetchone()
+        return bool(row and row[0])
+
+    def set_dark_mode(self, key, enabled):
+        with self.db.writing() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"UPDATE settings SET dark_mode=? WHERE {self.key_column}=?", (int(enabled), key))
+            if not cursor.rowcount:
+                cursor.execute(f"INSERT INTO settings ({self.key_column}, dark_mode) VALUES (?, ?)",
+                               (key, int(enabled)))
+
+    def toggle_dark_mode(self, key):
+        # Returns the new state
+        with self.db.writing():
+            enabled = not self.dark_mode(key)
+            self.set_dark_mode(key, enabled)
+        return enabled
+
+    def update(self, key, font_size, theme):
+        with self.db.writing() as conn:
+            conn.execute(f"""
+                UPDATE settings
+                SET font_size=?, theme=?
+                WHERE {self.key_column}=?
+            """, (font_size, theme, key))
@@ -0,0 +1,537 @@
+import argparse
+import hashlib
+import html
+import json
+import os
+import re
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+
+from blocks import FRONT_MATTER_RE, fetch_page_text, split_markdown
+from createTables import DatabaseManager
+from page_bodies import read_body
+from search import plain_text
+from wiki_links import WIKI_LINK_RE, wiki_links
+
+# Static, read-only HTML site of a user's pages (or of some page subtrees).
+#
+# A build reads a cheap stamp of every published page (updated_at, colour,
+# sticky notes and tags), compares it with the manifest of the previous
+# build and renders only what changed. A page is also rendered again when
+# its breadcrumb, child pages, backlinks or resolved [[Page Title]] links
+# changed, which the manifest keeps as a hash. Rendering runs in a process
+# pool with one read-only connection per worker. Each page records the
+# sha256 of its HTML; unchanged output is not rewritten. The client-side
+# search index is rebuilt from per-page term files whenever a page changed.
+#
+#   python -m twelveb.core.site site/ --username NAME [--page-id ID ...]
+
+RENDER_VERSION = 1
+CHUNK_SIZE = 64
+MANIFEST = ".manifest.json"
+TERMS_DIR = ".terms"
+PAGES_DIR = "p"
+
+# (id, parent_id, title, stamp) of the published pages in tree order
+PUBLISHED_QUERY = """
+    WITH RECURSIVE published(id) AS (
+        SELECT id FROM pages WHERE user_id=:user_id AND {roots}
+        UNION
+        SELECT p.id FROM published CROSS JOIN pages p ON p.parent_id = published.id
+        WHERE p.user_id=:user_id
+    )
+    SELECT p.id, p.parent_id, p.title,
+           p.updated_at || '|' || coalesce(p.color, '') || '|' ||
+           (SELECT count(*) || ',' || coalesce(max(s.updated_at), '')
+            FROM sticky_notes s WHERE s.page_id = p.id) || '|' ||
+           (SELECT coalesce(group_concat(t.name, ','), '')
+            FROM page_tags pt JOIN tags t ON t.id = pt.tag_id WHERE pt.page_id = p.id)
+    FROM published JOIN pages p ON p.id = published.id
+    ORDER BY p.order_key, p.id
+"""
+
+_LINK_RE = re.compile(r"\[([^\[\]\n]+)\]\(([^()\s]+)\)")
+_CODE_SPAN_RE = re.compile(r"(`+)(.+?)\1")
+_STRONG_RE = re.compile(r"\*\*(?=\S)(.+?)(?<=\S)\*\*|__(?=\S)(.+?)(?<=\S)__")
+_EM_RE = re.compile(r"(?<![\w*])\*(?=\S)(.+?)(?<=\S)\*(?![\w*])|(?<![\w_])_(?=\S)(.+?)(?<=\S)_(?![\w_])")
+_LIST_ITEM_RE = re.compile(r"\s*([-*+]|\d+[.)])\s+(.*)")
+_RULE_RE = re.compile(r"\s*([-*_])(\s*\1){2,}\s*")
+_COLOR_RE = re.compile(r"#[0-9a-fA-F]{3,8}")
+_SAFE_URL_RE = re.compile(r"(https?:|mailto:|#|/|\.|[^:]*$)", re.I)
+_TERM_RE = re.compile(r"\w{2,}")
+_TOKEN_RE = re.compile("\x00(\\d+)\x00")
+
+
+def search_terms(text):
+    # Folded like the app's search, accents removed, for the client index
+    return set(_TERM_RE.findall(plain_text(text)))
+
+
+def page_url(page_id):
+    return f"{page_id}.html"
+
+
+def safe_color(color, default="#ffff88"):
+    return color if color and _COLOR_RE.fullmatch(color) else default
+
+
+def render_inline(text, links):
+    # Links and code spans become placeholders first so that emphasis is
+    # never applied inside a URL or inside code
+    tokens = []
+
+    def keep(markup):
+        tokens.append(markup)
+        return f"\x00{len(tokens) - 1}\x00"
+
+    def code_span(match):
+        return keep(f"<code>{html.escape(match.group(2).strip())}</code>")
+
+    def wiki_link(match):
+        title = match.group(1).strip()
+        label = html.escape((match.group(2) or title).strip())
+        page_id = links.get(title.lower())
+        if page_id is None:
+            return keep(f'<span class="missing">{label}</span>')
+        return keep(f'<a href="{page_url(page_id)}">{label}</a>')
+
+    def link(match):
+        label, url = match.groups()
+        if not _SAFE_URL_RE.match(url):
+            return keep(html.escape(match.group(0)))
+        return keep(f'<a href="{html.escape(url)}">{html.escape(label)}</a>')
+
+    text = _CODE_SPAN_RE.sub(code_span, text)
+    text = WIKI_LINK_RE.sub(wiki_link, text)
+    text = _LINK_RE.sub(link, text)
+    text = html.escape(text, quote=False)
+    text = _STRONG_RE.sub(lambda m: f"<strong>{m.group(1) or m.group(2)}</strong>", text)
+    text = _EM_RE.sub(lambda m: f"<em>{m.group(1) or m.group(2)}</em>", text)
+    return _TOKEN_RE.sub(lambda m: tokens[int(m.group(1))], text)
+
+
+def render_block(kind, content, links):
+    if kind == "heading":
+        stripped = content.strip()
+        level = min(6, len(stripped) - len(stripped.lstrip("#")))
+        return f"<h{level}>{render_inline(stripped[level:].strip().rstrip('#').strip(), links)}</h{level}>"
+    if kind == "code":
+        lines = content.strip("\n").split("\n")
+        fence = lines[0].strip()[:3]
+        language = lines[0].strip()[3:].strip()
+        if len(lines) > 1 and lines[-1].strip().startswith(fence):
+            lines = lines[:-1]
+        attribute = f' class="language-{html.escape(language)}"' if language else ""
+        return f"<pre><code{attribute}>{html.escape(chr(10).join(lines[1:]))}</code></pre>"
+    if kind == "list":
+        items = []
+        ordered = False
+        for line in content.strip("\n").split("\n"):
+            match = _LIST_ITEM_RE.fullmatch(line)
+            if match:
+                if not items:
+                    ordered = match.group(1)[0].isdigit()
+                items.append(match.group(2))
+            elif line.strip() and items:
+                items[-1] += " " + line.strip()
+        tag = "ol" if ordered else "ul"
+        return f"<{tag}>" + "".join(f"<li>{render_inline(item, links)}</li>" for item in items) + f"</{tag}>"
+    if kind == "quote":
+        lines = [line.strip()[1:].strip() if line.strip().startswith(">") else line.strip()
+                 for line in content.strip("\n").split("\n")]
+        return "<blockquote><p>" + render_inline("\n".join(lines), links) + "</p></blockquote>"
+    parts = []
+    for paragraph in re.split(r"\n\s*\n", content.strip("\n")):
+        if _RULE_RE.fullmatch(paragraph):
+            parts.append("<hr>")
+        elif paragraph.strip():
+            parts.append("<p>" + render_inline(paragraph.strip(), links) + "</p>")
+    return "\n".join(parts)
+
+
+def render_markdown(text, links):
+    # Front matter is page metadata, not content
+    match = FRONT_MATTER_RE.match(text)
+    if match:
+        text = text[match.end():]
+    return "\n".join(render_block(kind, content, links) for kind, content in split_markdown(text))
+
+
+def page_text(conn, page_id):
+    cursor = conn.cursor()
+    cursor.execute("SELECT content FROM pages WHERE id=?", (page_id,))
+    row = cursor.fetchone()
+    if row and row[0]:
+        return row[0]
+    return fetch_page_text(conn, page_id)
+
+
+def page_links(conn, page_id):
+    # Only blocks that contain a link are read
+    cursor = conn.cursor()
+    cursor.execute("SELECT content FROM pages WHERE id=? AND content LIKE '%[[%'", (page_id,))
+    texts = [row[0] for row in cursor.fetchall()]
+    cursor.execute("""
+        SELECT content FROM blocks WHERE page_id=? AND type != 'row' AND content LIKE '%[[%' ORDER BY order_key, id
+    """, (page_id,))
+    texts.extend(row[0] for row in cursor.fetchall())
+    if not texts:
+        # Packed and cold pages have no blocks to filter
+        texts.append(read_body(conn, page_id) or "")
+    return wiki_links("\n".join(texts))
+
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title}</title>
+<link rel="stylesheet" href="../style.css">
+</head>
+<body>
+<header><a href="../index.html">Home</a>{breadcrumb}
+<form action="../index.html"><input name="q" placeholder="Search"></form></header>
+<main>
+<h1>{title}</h1>
+{tags}<article>
+{body}
+</article>
+{notes}{children}{backlinks}</main>
+</body>
+</html>
+"""
+
+INDEX_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title}</title>
+<link rel="stylesheet" href="style.css">
+</head>
+<body>
+<header><a href="index.html">Home</a>
+<form><input id="search" name="q" placeholder="Search" autocomplete="off"></form></header>
+<main>
+<h1>{title}</h1>
+<ul id="results"></ul>
+<nav id="pages"><ul>
+{pages}
+</ul></nav>
+</main>
+<script src="search.js"></script>
+</body>
+</html>
+"""
+
+STYLE = """body { font-family: sans-serif; margin: 0; color: #222; }
+header { display: flex; gap: 1em; align-items: center; padding: .5em 1em; background: #f0f8ff; }
+header form { margin-left: auto; }
+main { max-width: 50em; margin: 0 auto; padding: 1em; }
+pre { background: #f4f4f4; padding: .75em; overflow-x: auto; }
+blockquote { border-left: 3px solid #ccc; margin-left: 0; padding-left: 1em; color: #555; }
+.tags span { background: #eee; border-radius: 3px; padding: 0 .4em; margin-right: .3em; }
+.notes { display: flex; flex-wrap: wrap; gap: .75em; }
+.note { width: 12em; min-height: 6em; padding: .5em; box-shadow: 1px 1px 3px #aaa; white-space: pre-wrap; }
+.missing { color: #a00; }
+"""
+
+# Every word has to match, the last one as a prefix, like the app's search
+SEARCH_SCRIPT = """(function () {
+  var box = document.getElementById("search"), list = document.getElementById("results");
+  var nav = document.getElementById("pages"), index = null;
+  function fold(text) {
+    return text.replace(/\\u0130/g, "i").replace(/\\u0131/g, "i").toLowerCase()
+      .normalize("NFD").replace(/[\\u0300-\\u036f]/g, "");
+  }
+  function lookup(word, prefix) {
+    var found = {};
+    (index.terms[word] || []).forEach(function (i) { found[i] = true; });
+    if (prefix) {
+      for (var term in index.terms) {
+        if (term.lastIndexOf(word, 0) === 0) index.terms[term].forEach(function (i) { found[i] = true; });
+      }
+    }
+    return found;
+  }
+  function run() {
+    var words = (fold(box.value).match(/[\\p{L}\\p{N}_]+/gu) || []);
+    list.innerHTML = "";
+    nav.hidden = words.length > 0;
+    if (!words.length || !index) return;
+    var hits = null;
+    words.forEach(function (word, n) {
+      var found = lookup(word, n === words.length - 1);
+      if (hits) { for (var i in hits) if (!found[i]) delete hits[i]; } else hits = found;
+    });
+    Object.keys(hits).slice(0, 50).forEach(function (i) {
+      var page = index.pages[i], item = document.createElement("li"), link = document.createElement("a");
+      link.href = page[0]; link.textContent = page[1];
+      item.appendChild(link); list.appendChild(item);
+    });
+  }
+  fetch("search-index.json").then(function (r) { return r.json(); }).then(function (data) {
+    index = data;
+    box.value = new URLSearchParams(location.search).get("q") || "";
+    run();
+  });
+  box.addEventListener("input", run);
+})();
+"""
+
+
+def page_list(entries, prefix=""):
+    return "\n".join(f'<li><a href="{prefix}{page_url(page_id)}">{html.escape(title)}</a></li>'
+                     for page_id, title in entries)
+
+
+def render_page(conn, page_id, context):
+    # Returns the page's HTML and its search terms
+    links = {title.lower(): target for title, target in context["links"]}
+    text = page_text(conn, page_id)
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT t.name FROM page_tags pt JOIN tags t ON t.id = pt.tag_id
+        WHERE pt.page_id=? ORDER BY t.name
+    """, (page_id,))
+    tags = [row[0] for row in cursor.fetchall()]
+    cursor.execute("SELECT content, color FROM sticky_notes WHERE page_id=? ORDER BY id", (page_id,))
+    notes = cursor.fetchall()
+
+    title = html.escape(context["title"])
+    breadcrumb = "".join(f' › <a href="{page_url(ancestor_id)}">{html.escape(ancestor)}</a>'
+                         for ancestor_id, ancestor in context["breadcrumb"])
+    document = PAGE_TEMPLATE.format(
+        title=title,
+        breadcrumb=breadcrumb,
+        tags=('<p class="tags">' + "".join(f"<span>{html.escape(tag)}</span>" for tag in tags) + "</p>\n"
+              if tags else ""),
+        body=render_markdown(text, links),
+        notes=('<section class="notes">' + "".join(
+            f'<div class="note" style="background: {safe_color(color)}">{html.escape(content or "")}</div>'
+            for content, color in notes) + "</section>\n" if notes else ""),
+        children=("<nav><h2>Pages</h2><ul>\n" + page_list(context["children"]) + "\n</ul></nav>\n"
+                  if context["children"] else ""),
+        backlinks=('<aside><h2>Linked from</h2><ul>\n' + page_list(context["backlinks"]) + "\n</ul></aside>\n"
+                   if context["backlinks"] else ""),
+    )
+    terms = search_terms(" ".join([context["title"], text] + tags + [content or "" for content, color in notes]))
+    return document, terms
+
+
+def write_file(path, data):
+    # Written next to the target and renamed, so a reader never sees half a page
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(data)
+    os.replace(temporary, path)
+
+
+_worker_conn = None
+
+
+def open_worker(db_name):
+    global _worker_conn
+    _worker_conn = sqlite3.connect("file:" + os.path.abspath(db_name) + "?mode=ro", uri=True)
+
+
+def render_chunk(output, jobs):
+    # Runs in the pool; returns (page_id, html sha256) per job
+    results = []
+    for page_id, old_hash, context in jobs:
+        document, terms = render_page(_worker_conn, page_id, context)
+        data = document.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = os.path.join(output, PAGES_DIR, page_url(page_id))
+        if digest != old_hash or not os.path.exists(path):
+            write_file(path, data)
+            write_file(os.path.join(output, TERMS_DIR, f"{page_id}.txt"),
+                       " ".join(sorted(terms)).encode("utf-8"))
+        results.append((page_id, digest))
+    return results
+
+
+class SiteBuilder:
+    def __init__(self, db, user_id, output, root_ids=None, workers=None, title="TwelveB"):
+        self.db = db
+        self.user_id = user_id
+        self.output = os.path.abspath(output)
+        self.root_ids = sorted(root_ids) if root_ids else None
+        self.workers = os.cpu_count() if workers is None else workers
+        self.title = title
+
+    def load_manifest(self):
+        # A manifest of another user, subset or renderer means a full build
+        try:
+            with open(os.path.join(self.output, MANIFEST), encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if (manifest.get("version") != RENDER_VERSION or manifest.get("user_id") != self.user_id
+                or manifest.get("roots") != self.root_ids):
+            return {}
+        return {int(page_id): entry for page_id, entry in manifest.get("pages", {}).items()}
+
+    def published(self, conn):
+        if self.root_ids:
+            roots = f"id IN ({','.join(str(int(root_id)) for root_id in self.root_ids)})"
+        else:
+            roots = "parent_id IS NULL"
+        cursor = conn.cursor()
+        cursor.execute(PUBLISHED_QUERY.format(roots=roots), {"user_id": self.user_id})
+        return cursor.fetchall()
+
+    def build(self):
+        for directory in (self.output, os.path.join(self.output, PAGES_DIR),
+                          os.path.join(self.output, TERMS_DIR)):
+            os.makedirs(directory, exist_ok=True)
+        old = self.load_manifest()
+        with self.db.reader() as conn:
+            rows = self.published(conn)
+            pages = {page_id: (parent_id, title, stamp) for page_id, parent_id, title, stamp in rows}
+            # Outgoing links of changed pages are read again, the rest come from the manifest
+            links = {}
+            for page_id, (parent_id, title, stamp) in pages.items():
+                entry = old.get(page_id)
+                if entry and entry["stamp"] == stamp:
+                    links[page_id] = entry["links"]
+                else:
+                    links[page_id] = page_links(conn, page_id)
+
+        by_title = {}
+        children = {}
+        for page_id, parent_id, title, stamp in rows:
+            by_title.setdefault(title.lower(), page_id)
+            if parent_id in pages:
+                children.setdefault(parent_id, []).append((page_id, title))
+        backlinks = {}
+        for page_id, titles in links.items():
+            for target in titles:
+                target_id = by_title.get(target.lower())
+                if target_id is not None and target_id != page_id:
+                    backlinks.setdefault(target_id, []).append((page_id, pages[page_id][1]))
+
+        jobs = []
+        manifest = {}
+        for page_id, (parent_id, title, stamp) in pages.items():
+            breadcrumb = []
+            ancestor = parent_id
+            while ancestor in pages and len(breadcrumb) < len(pages):
+                breadcrumb.append((ancestor, pages[ancestor][1]))
+                ancestor = pages[ancestor][0]
+            context = {
+                "title": title,
+                "breadcrumb": breadcrumb[::-1],
+                "children": children.get(page_id, []),
+                "backlinks": sorted(backlinks.get(page_id, [])),
+                "links": [(target, by_title[target.lower()]) for target in links[page_id]
+                          if target.lower() in by_title],
+            }
+            deps = hashlib.sha1(json.dumps(context, ensure_ascii=False).encode("utf-8")).hexdigest()
+            entry = old.get(page_id)
+            manifest[page_id] = {"stamp": stamp, "deps": deps, "links": links[page_id],
+                                 "hash": entry["hash"] if entry else None}
+            if not entry or entry["stamp"] != stamp or entry["deps"] != deps:
+                jobs.append((page_id, entry["hash"] if entry else None, context))
+
+        written = 0
+        for page_id, digest in self.render(jobs):
+            if digest != manifest[page_id]["hash"]:
+                written += 1
+            manifest[page_id]["hash"] = digest
+
+        removed = [page_id for page_id in old if page_id not in pages]
+        for page_id in removed:
+            for path in (os.path.join(self.output, PAGES_DIR, page_url(page_id)),
+                         os.path.join(self.output, TERMS_DIR, f"{page_id}.txt")):
+                if os.path.exists(path):
+                    os.remove(path)
+
+        index_path = os.path.join(self.output, "search-index.json")
+        if written or removed or not os.path.exists(index_path):
+            self.write_search_index(rows)
+        self.write_static(rows)
+        self.write_manifest(manifest)
+        return {"pages": len(pages), "rendered": len(jobs), "written": written, "removed": len(removed)}
+
+    def render(self, jobs):
+        chunks = [jobs[i:i + CHUNK_SIZE] for i in range(0, len(jobs), CHUNK_SIZE)]
+        if not self.workers or len(chunks) < 2:
+            open_worker(self.db.db_name)
+            try:
+                for chunk in chunks:
+                    yield from render_chunk(self.output, chunk)
+            finally:
+                _worker_conn.close()
+            return
+        with ProcessPoolExecutor(self.workers, initializer=open_worker, initargs=(self.db.db_name,)) as pool:
+            for results in pool.map(render_chunk, [self.output] * len(chunks), chunks):
+                yield from results
+
+    def write_search_index(self, rows):
+        # {"pages": [[url, title]], "terms": {term: [page index]}}
+        pages = []
+        terms = {}
+        for page_id, parent_id, title, stamp in rows:
+            try:
+                with open(os.path.join(self.output, TERMS_DIR, f"{page_id}.txt"), encoding="utf-8") as f:
+                    words = f.read().split()
+            except OSError:
+                continue
+            for word in words:
+                terms.setdefault(word, []).append(len(pages))
+            pages.append([f"{PAGES_DIR}/{page_url(page_id)}", title])
+        data = json.dumps({"pages": pages, "terms": terms}, ensure_ascii=False, separators=(",", ":"))
+        write_file(os.path.join(self.output, "search-index.json"), data.encode("utf-8"))
+
+    def write_static(self, rows):
+        # The home page lists the top of the published tree
+        page_ids = {row[0] for row in rows}
+        top = [(page_id, title) for page_id, parent_id, title, stamp in rows if parent_id not in page_ids]
+        files = {
+            "index.html": INDEX_TEMPLATE.format(title=html.escape(self.title),
+                                                pages=page_list(top, PAGES_DIR + "/")),
+            "style.css": STYLE,
+            "search.js": SEARCH_SCRIPT,
+        }
+        for name, text in files.items():
+            path = os.path.join(self.output, name)
+            data = text.encode("utf-8")
+            try:
+                with open(path, "rb") as f:
+                    if f.read() == data:
+                        continue
+            except OSError:
+                pass
+            write_file(path, data)
+
+    def write_manifest(self, pages):
+        manifest = {"version": RENDER_VERSION, "user_id": self.user_id, "roots": self.root_ids,
+                    "pages": {str(page_id): entry for page_id, entry in pages.items()}}
+        write_file(os.path.join(self.output, MANIFEST),
+                   json.dumps(manifest, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def build_site(db, user_id, output, root_ids=None, workers=None):
+    return SiteBuilder(db, user_id, output, root_ids, workers).build()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a static HTML site of TwelveB pages")
+    parser.add_argument("output")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--db", default="twelveb.db")
+    parser.add_argument("--page-id", type=int, action="append",
+                        help="publish only this page and its subpages (repeatable)")
+    parser.add_argument("--workers", type=int, help="render processes (0 renders in this process)")
+    parser.add_argument("--title", default="TwelveB")
+    args = parser.parse_args()
+
+    db = DatabaseManager.shared(args.db)
+    with db.reader() as conn:
+        user = conn.execute("SELECT id FROM users WHERE username=?", (args.username,)).fetchone()
+    if user is None:
+        parser.error(f"no user named {args.username!r}")
+    stats = SiteBuilder(db, user[0], args.output, args.page_id, args.workers, args.title).build()
+    print("{pages} pages, {rendered} rendered, {written} written, {removed} removed".format(**stats))
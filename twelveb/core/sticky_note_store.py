@@ -0,0 +1,85 @@
+from datetime import datetime
+
+from sticky_notes import StickyNote
+
+
+class StickyNoteStore:
+    # Sticky notes of the pages. Reads are keyset-paged by id so large boards
+    # can be streamed in batches; every batch write is one transaction.
+    BATCH = 500
+
+    def __init__(self, db):
+        self.db = db
+
+    @staticmethod
+    def read(conn, page_id, after_id=0, limit=None):
+        # Each batch continues after the last id of the previous one
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT id, content, color, position_x, position_y
+            FROM sticky_notes
+            WHERE page_id=? AND id>?
+            ORDER BY id
+            LIMIT ?
+        """, (page_id, after_id, limit or StickyNoteStore.BATCH))
+        return [StickyNote(*row) for row in cursor]
+
+    def page(self, page_id, after_id=0, limit=None):
+        with self.db.reader() as conn:
+            return self.read(conn, page_id, after_id, limit)
+
+    def all(self, page_id):
+        with self.db.reader() as conn:
+            notes = self.read(conn, page_id)
+            batch = notes
+            while len(batch) == self.BATCH:
+                batch = self.read(conn, page_id, batch[-1].id)
+                notes.extend(batch)
+        return notes
+
+    def get_many(self, page_ids):
+        # {page_id: [StickyNote]}
+        return {page_id: self.all(page_id) for page_id in page_ids}
+
+    def add(self, page_id, content, color, x=0, y=0):
+        return self.add_many(page_id, [(content, color, x, y)])[0]
+
+    def add_many(self, page_id, notes):
+        # notes are (content, color, x, y); returns the new ids in order
+        now = datetime.now()
+        note_ids = []
+        with self.db.writing() as conn:
+            cursor = conn.cursor()
+            for content, color, x, y in notes:
+                cursor.execute("""
+                    INSERT INTO sticky_notes (page_id, content, color, position_x, position_y, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, (page_id, content, color, x, y, now, now))
+                note_ids.append(cursor.lastrowid)
+        return note_ids
+
+    def restore_many(self, page_id, notes):
+        # Puts deleted notes back under their old ids, for undo
+        now = datetime.now()
+        with self.db.writing() as conn:
+            conn.executemany("""
+                INSERT INTO sticky_notes (id, page_id, content, color, position_x, position_y, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, [(note_id, page_id, content, color, x, y, now, now) for note_id, content, color, x, y in notes])
+
+    def move(self, note_id, x, y):
+        self.move_many([(note_id, x, y)])
+
+    def move_many(self, moves):
+        # moves are (note_id, x, y); one transaction however many notes moved
+        now = datetime.now()
+        with self.db.writing() as conn:
+            conn.executemany("""
+                UPDATE sticky_notes
+                SET position_x=?, position_y=?, updated_at=?
+                WHERE id=?
+            """, [(x, y, now, note_id) for note_id, x, y in moves])
+
+    def delete_many(self, note_ids):
+        with self.db.writing() as conn:
+            conn.executemany("DELETE FROM sticky_notes WHERE id=?", [(note_id,) for note_id in note_ids])
@@ -0,0 +1,251 @@
+import argparse
+from datetime import datetime, timedelta
+
+from blocks import BlockStore, insert_blocks
+from createTables import DatabaseManager
+from page_bodies import ARCHIVE, COMPRESS_MIN_BYTES, archive_attached, archive_path, attach_archive, encode_body, ensure_archive, read_body
+from search import fold_text
+
+# Moves page bodies between storage tiers:
+#
+#   blocks  - editable block rows in the main database (every edited page)
+#   packed  - one body in the main database, compressed if large enough
+#   cold    - one body in the archive database
+#
+# Large pages not edited for PACK_AFTER are packed, and any page not edited
+# for COLD_AFTER goes cold. Packing replaces a page's block rows and their
+# search entries with a single row, which is what keeps the main file small.
+# Packed and cold bodies are still found by search (packed_fts) and are
+# decompressed when read; editing the page unpacks it into blocks again.
+#
+# A move to the archive is two transactions, archive first, since SQLite does
+# not commit attached WAL databases atomically together. Archive rows that
+# are not referenced by a cold page are swept away afterwards, so a crash in
+# between never loses a body.
+#
+#   python -m twelveb.core.storage_tiers [--db twelveb.db] [--vacuum]
+
+PACK_AFTER = timedelta(days=7)
+COLD_AFTER = timedelta(days=90)
+
+# Pages due for a move, least recently edited first. Pages with blocks are
+# packed once they are old and large, or old enough to go cold; packed pages
+# only move on to the archive. Database pages keep their rows editable and
+# are never packed.
+CANDIDATES_QUERY = f"""
+    SELECT p.id, pb.tier,
+           coalesce(p.updated_at, p.created_at) < :cold_before AS cold
+    FROM pages p LEFT JOIN page_bodies pb ON pb.page_id = p.id
+    WHERE coalesce(p.updated_at, p.created_at) < :pack_before
+      AND CASE
+          WHEN pb.tier IS NULL THEN
+              EXISTS(SELECT 1 FROM blocks b WHERE b.page_id = p.id AND b.type != 'row')
+              AND NOT EXISTS(SELECT 1 FROM blocks b WHERE b.page_id = p.id AND b.type = 'row')
+              AND (coalesce(p.updated_at, p.created_at) < :cold_before
+                   OR (SELECT sum(length(b.content)) FROM blocks b
+                       WHERE b.page_id = p.id AND b.type != 'row') >= {COMPRESS_MIN_BYTES})
+          WHEN pb.tier = 'packed' THEN
+              :archive AND coalesce(p.updated_at, p.created_at) < :cold_before
+          ELSE 0
+      END
+    ORDER BY coalesce(p.updated_at, p.created_at)
+    LIMIT :limit
+"""
+
+
+class TieredStorage:
+    # Writes go through the writer connection; call maintain() and unpack()
+    # from the thread that saves pages (the app uses the database worker's
+    # writer), since both drop the page from the BlockStore.
+    BATCH = 50
+
+    def __init__(self, db, block_store=None, pack_after=None, cold_after=None):
+        self.db = db
+        self.block_store = block_store or BlockStore()
+        self.pack_after = PACK_AFTER if pack_after is None else pack_after
+        self.cold_after = COLD_AFTER if cold_after is None else cold_after
+
+    def archive_enabled(self):
+        # In-memory databases have nowhere to keep an archive; elsewhere the
+        # archive file is made by the first page that goes cold
+        return not self.db.in_memory
+
+    def open_archive(self):
+        # Attaches the archive to the writer, creating it if needed; the
+        # writer must not be in a transaction
+        return attach_archive(self.db.writer, archive_path(self.db.db_name))
+
+    def unpack(self, page_id):
+        # Splits a packed or cold page back into blocks before it is edited.
+        # Returns False if the page already has blocks.
+        with self.db.writing() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id FROM page_bodies WHERE page_id=?", (page_id,))
+            row = cursor.fetchone()
+            if row is None:
+                return False
+            text = read_body(conn, page_id)
+            if text is None:
+                raise LookupError(f"page {page_id} is archived but the archive database is missing it")
+            cursor.execute("INSERT INTO packed_fts(packed_fts, rowid, content) VALUES ('delete', ?, ?)",
+                           (row[0], fold_text(text)))
+            cursor.execute("DELETE FROM page_bodies WHERE id=?", (row[0],))
+            insert_blocks(cursor, page_id, text)
+            self.block_store.forget(page_id)
+            return True
+
+    def candidates(self, conn, now, limit):
+        cursor = conn.cursor()
+        cursor.execute(CANDIDATES_QUERY, {
+            "pack_before": now - self.pack_after,
+            "cold_before": now - self.cold_after,
+            "archive": self.archive_enabled(),
+            "limit": limit,
+        })
+        return [(page_id, tier, bool(cold) and self.archive_enabled()) for page_id, tier, cold in cursor]
+
+    @staticmethod
+    def block_text(cursor, page_id):
+        cursor.execute("SELECT content FROM blocks WHERE page_id=? AND type != 'row' ORDER BY order_key, id", (page_id,))
+        return "".join(row[0] or "" for row in cursor.fetchall())
+
+    def maintain(self, now=None, limit=None):
+        # Moves one batch of pages; returns how many moved. Call it again
+        # until it returns less than the batch size.
+        now = now or datetime.now()
+        limit = limit or self.BATCH
+        # The writer lock is held throughout, so no save slips in between
+        with self.db.write_lock:
+            with self.db.writing() as conn:
+                batch = self.candidates(conn, now, limit)
+                if not batch:
+                    return 0
+                cursor = conn.cursor()
+                bodies = {}
+                for page_id, tier, cold in batch:
+                    if tier is None:
+                        text = self.block_text(cursor, page_id)
+                        bodies[page_id] = (text, encode_body(text))
+            if any(cold for page_id, tier, cold in batch):
+                self.open_archive()
+            with self.db.writing() as conn:
+                # The archive copy is committed before the main file points at it
+                cursor = conn.cursor()
+                for page_id, tier, cold in batch:
+                    if not cold:
+                        continue
+                    if tier is None:
+                        text, data = bodies[page_id]
+                        cursor.execute(f"""
+                            INSERT OR REPLACE INTO {ARCHIVE}.page_bodies (page_id, data, size, archived_at)
+                            VALUES (?, ?, ?, ?)
+                        """, (page_id, data, len(text), now))
+                    else:
+                        cursor.execute(f"""
+                            INSERT OR REPLACE INTO {ARCHIVE}.page_bodies (page_id, data, size, archived_at)
+                            SELECT page_id, data, size, ? FROM main.page_bodies WHERE page_id=?
+                        """, (now, page_id))
+            with self.db.writing() as conn:
+                cursor = conn.cursor()
+                for page_id, tier, cold in batch:
+                    if tier is None:
+                        text, data = bodies[page_id]
+                        cursor.execute("""
+                            INSERT INTO page_bodies (page_id, tier, data, size, packed_at)
+                            VALUES (?, ?, ?, ?, ?)
+                        """, (page_id, "cold" if cold else "packed", None if cold else data, len(text), now))
+                        cursor.execute("INSERT INTO packed_fts(rowid, content) VALUES (?, ?)",
+                                       (cursor.lastrowid, fold_text(text)))
+                        cursor.execute("DELETE FROM blocks WHERE page_id=? AND type != 'row'", (page_id,))
+                        self.block_store.forget(page_id)
+                    else:
+                        cursor.execute("UPDATE page_bodies SET tier='cold', data=NULL WHERE page_id=?", (page_id,))
+            self.sweep()
+            return len(batch)
+
+    def sweep(self):
+        # Archive rows of pages that were unpacked, deleted or never finished moving
+        if not archive_attached(self.db.writer):
+            return 0
+        with self.db.writing() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                DELETE FROM {ARCHIVE}.page_bodies
+                WHERE page_id NOT IN (SELECT page_id FROM main.page_bodies WHERE tier='cold')
+            """)
+            return cursor.rowcount
+
+    def maintain_all(self, now=None):
+        now = now or datetime.now()
+        total = 0
+        while True:
+            moved = self.maintain(now)
+            total += moved
+            if moved < self.BATCH:
+                return total
+
+    def reindex(self):
+        # Rebuilds the search index of packed and cold pages from their bodies
+        with self.db.writing() as conn:
+            cursor = conn.cursor()
+            cursor.execute("INSERT INTO packed_fts(packed_fts) VALUES ('delete-all')")
+            cursor.execute("SELECT id, page_id FROM page_bodies")
+            for body_id, page_id in cursor.fetchall():
+                text = read_body(conn, page_id)
+                if text is not None:
+                    cursor.execute("INSERT INTO packed_fts(rowid, content) VALUES (?, ?)",
+                                   (body_id, fold_text(text)))
+
+    def vacuum(self):
+        # Returns the freed pages of the main file to the file system. The
+        # first call switches the file to incremental vacuuming; later
+        # maintenance runs then shrink it as they go.
+        with self.db.write_lock:
+            conn = self.db.writer
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                conn.execute("VACUUM")
+            else:
+                conn.execute("PRAGMA incremental_vacuum")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def stats(self):
+        # {tier: (pages, stored bytes, text bytes)}
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT count(DISTINCT page_id), coalesce(sum(length(content)), 0) FROM blocks")
+            pages, size = cursor.fetchone()
+            result = {"blocks": (pages, size, size)}
+            cursor.execute("""
+                SELECT tier, count(*), coalesce(sum(length(data)), 0), coalesce(sum(size), 0)
+                FROM page_bodies GROUP BY tier
+            """)
+            for tier, count, stored, size in cursor.fetchall():
+                result[tier] = (count, stored, size)
+            if "cold" in result and ensure_archive(conn):
+                cursor.execute(f"SELECT coalesce(sum(length(data)), 0) FROM {ARCHIVE}.page_bodies")
+                count, stored, size = result["cold"]
+                result["cold"] = (count, cursor.fetchone()[0], size)
+            return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move old TwelveB pages into compressed and archive storage")
+    parser.add_argument("--db", default="twelveb.db")
+    parser.add_argument("--pack-after-days", type=float, default=PACK_AFTER.days)
+    parser.add_argument("--cold-after-days", type=float, default=COLD_AFTER.days)
+    parser.add_argument("--vacuum", action="store_true", help="shrink the main database file afterwards")
+    parser.add_argument("--reindex", action="store_true", help="rebuild the search index of stored bodies")
+    args = parser.parse_args()
+
+    db = DatabaseManager.shared(args.db)
+    storage = TieredStorage(db, pack_after=timedelta(days=args.pack_after_days),
+                            cold_after=timedelta(days=args.cold_after_days))
+    moved = storage.maintain_all()
+    if args.reindex:
+        storage.reindex()
+    if args.vacuum:
+        storage.vacuum()
+    print(f"Moved {moved} pages.")
+    for tier, (pages, stored, size) in storage.stats().items():
+        print(f"{tier}: {pages} pages, {stored} bytes stored for {size} bytes of text")
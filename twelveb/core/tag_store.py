@@ -0,0 +1,112 @@
+import json
+import threading
+
+from tag_index import TagIndex, members, parse_filter
+
+
+class TagStore:
+    # Tags of the pages and the tag filter of the page tree. Page counts come
+    # from tags.page_count, which triggers keep current; filters run on the
+    # in-memory bitsets of a TagIndex per user. Safe from any thread.
+    FILTER_LIMIT = 500
+
+    def __init__(self, db):
+        self.db = db
+        self.indexes = {}
+        self.lock = threading.Lock()
+
+    def tags(self, user_id):
+        # (tag_id, name, color, page_count) rows by name
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT id, name, color, page_count FROM tags
+                WHERE user_id=?
+                ORDER BY name
+            """, (user_id,))
+            return cursor.fetchall()
+
+    def page_tags(self, page_id):
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT t.name FROM page_tags pt JOIN tags t ON t.id = pt.tag_id
+                WHERE pt.page_id=?
+                ORDER BY t.name
+            """, (page_id,))
+            return [row[0] for row in cursor]
+
+    def set_page_tags(self, user_id, page_id, names):
+        # Tags the page with exactly these names, creating missing tags; one
+        # transaction. Names match existing tags case-insensitively.
+        wanted = {}
+        for name in names:
+            name = name.strip().lstrip("#")
+            if name:
+                wanted.setdefault(name.lower(), name)
+        with self.db.writing() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id, name FROM tags WHERE user_id=? ORDER BY id", (user_id,))
+            tag_ids = {}
+            for tag_id, name in cursor.fetchall():
+                tag_ids.setdefault(name.lower(), tag_id)
+            for key, name in wanted.items():
+                if key not in tag_ids:
+                    cursor.execute("INSERT INTO tags (name, user_id) VALUES (?, ?)", (name, user_id))
+                    tag_ids[key] = cursor.lastrowid
+            keep = {tag_ids[key] for key in wanted}
+            cursor.execute("SELECT tag_id FROM page_tags WHERE page_id=?", (page_id,))
+            current = {row[0] for row in cursor.fetchall()}
+            cursor.executemany("DELETE FROM page_tags WHERE page_id=? AND tag_id=?",
+                               [(page_id, tag_id) for tag_id in current - keep])
+            cursor.executemany("INSERT INTO page_tags (page_id, tag_id) VALUES (?, ?)",
+                               [(page_id, tag_id) for tag_id in keep - current])
+        return sorted(wanted.values(), key=str.lower)
+
+    def delete(self, tag_id):
+        # The tag comes off every page it was on
+        with self.db.writing() as conn:
+            conn.execute("DELETE FROM tags WHERE id=?", (tag_id,))
+
+    def index(self, user_id):
+        with self.lock:
+            index = self.indexes.get(user_id)
+            if index is None:
+                index = self.indexes[user_id] = TagIndex(user_id)
+            return index
+
+    def match(self, user_id, expression):
+        # Bitset of the pages matching a filter such as "work AND NOT done";
+        # raises ValueError if the filter does not parse
+        node = parse_filter(expression)
+        if node is None:
+            return None
+        with self.db.reader() as conn:
+            return self.index(user_id).match(conn, node)
+
+    def filter(self, user_id, expression, limit=None):
+        # (number of matching pages, [(page_id, title)] of the first limit by title)
+        limit = limit or self.FILTER_LIMIT
+        bits = self.match(user_id, expression)
+        if not bits:
+            return 0, []
+        page_ids = members(bits)
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            if len(page_ids) <= limit:
+                cursor.execute("""
+                    SELECT id, title FROM pages
+                    WHERE id IN (SELECT value FROM json_each(?))
+                    ORDER BY title, id
+                """, (json.dumps(page_ids),))
+                return len(page_ids), cursor.fetchall()
+            # Many matches: walk the titles in order until enough are found
+            wanted = set(page_ids)
+            rows = []
+            cursor.execute("SELECT id, title FROM pages WHERE user_id=? ORDER BY title", (user_id,))
+            for page_id, title in cursor:
+                if page_id in wanted:
+                    rows.append((page_id, title))
+                    if len(rows) == limit:
+                        break
+            return len(page_ids), rows
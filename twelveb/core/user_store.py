@@ -0,0 +1,56 @@
+class UserStore:
+    # Accounts and password recovery. The checklist database has no security
+    # question columns, so register only writes them when they are given.
+    def __init__(self, db):
+        self.db = db
+
+    def authenticate(self, username, password):
+        # The user id, or None for a wrong username or password
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id FROM users WHERE username=? AND password=?", (username, password))
+            user = cursor.fetchone()
+        return user[0] if user else None
+
+    def register(self, username, password, security_question=None, security_answer=None):
+        # Raises sqlite3.IntegrityError when the username is taken
+        with self.db.writing() as conn:
+            cursor = conn.cursor()
+            if security_question is None:
+                cursor.execute("INSERT INTO users (username, password) VALUES (?, ?)", (username, password))
+            else:
+                cursor.execute("""
+                    INSERT INTO users (username, password, security_question, security_answer)
+                    VALUES (?, ?, ?, ?)
+                """, (username, password, security_question, security_answer))
+            return cursor.lastrowid
+
+    def recovery(self, username):
+        # (security_question, security_answer, password) or None
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT security_question, security_answer, password
+                FROM users
+                WHERE username=?
+            """, (username,))
+            return cursor.fetchone()
+
+    def password(self, username):
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT password FROM users WHERE username=?", (username,))
+            user = cursor.fetchone()
+        return user[0] if user else None
+
+    def get_many(self, user_ids):
+        # {user_id: username}
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            result = {}
+            for user_id in user_ids:
+                cursor.execute("SELECT username FROM users WHERE id=?", (user_id,))
+                user = cursor.fetchone()
+                if user:
+                    result[user_id] = user[0]
+        return result
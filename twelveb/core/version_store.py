@@ -0,0 +1,284 @@
+import json
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from difflib import SequenceMatcher
+
+# Version history of page text. Every autosave flush becomes a version.
+#
+# Most versions are stored as a zlib-compressed line diff against the
+# version before them. Every KEYFRAME_EVERY versions, or once the diffs
+# since the last keyframe outweigh it, the full text is stored compressed
+# instead. A version is rebuilt by replaying the diffs from the nearest
+# keyframe at or before it. thin() keeps fewer old versions the older they
+# get (RETENTION) and re-encodes the survivors so the chain stays valid.
+
+KEYFRAME_EVERY = 32
+# A new keyframe once the diffs since the last one are this share of its size
+KEYFRAME_RATIO = 0.5
+# Versions younger than the first age are all kept; older ones are kept one
+# per spacing: per minute up to an hour, per hour up to a day, and so on
+RETENTION = (
+    (timedelta(minutes=10), None),
+    (timedelta(hours=1), timedelta(minutes=1)),
+    (timedelta(days=1), timedelta(hours=1)),
+    (timedelta(days=30), timedelta(days=1)),
+    (None, timedelta(weeks=1)),
+)
+
+
+def line_diff(old, new):
+    # [(start, end, replacement)]: old's lines start:end become replacement
+    a = old.splitlines(keepends=True)
+    b = new.splitlines(keepends=True)
+    limit = min(len(a), len(b))
+    prefix = 0
+    while prefix < limit and a[prefix] == b[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and a[-1 - suffix] == b[-1 - suffix]:
+        suffix += 1
+    middle_a = a[prefix:len(a) - suffix]
+    middle_b = b[prefix:len(b) - suffix]
+    ops = []
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, middle_a, middle_b, autojunk=False).get_opcodes():
+        if tag != "equal":
+            ops.append((prefix + i1, prefix + i2, "".join(middle_b[j1:j2])))
+    return ops
+
+
+def apply_line_diff(text, ops):
+    lines = text.splitlines(keepends=True)
+    parts = []
+    position = 0
+    for start, end, replacement in ops:
+        parts.extend(lines[position:start])
+        parts.append(replacement)
+        position = end
+    parts.extend(lines[position:])
+    return "".join(parts)
+
+
+def encode_text(text):
+    return zlib.compress(text.encode("utf-8"))
+
+
+def encode_diff(ops):
+    return zlib.compress(json.dumps(ops, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def decode(kind, data, previous):
+    if kind == "key":
+        return zlib.decompress(data).decode("utf-8")
+    return apply_line_diff(previous, json.loads(zlib.decompress(data)))
+
+
+class Tip:
+    # The newest version of a page and the state of its chain
+    __slots__ = ("version_id", "text", "chain_length", "chain_bytes", "key_bytes")
+
+    def __init__(self, version_id, text, chain_length, chain_bytes, key_bytes):
+        self.version_id = version_id
+        self.text = text
+        self.chain_length = chain_length
+        self.chain_bytes = chain_bytes
+        self.key_bytes = key_bytes
+
+
+class VersionStore:
+    # Reads are safe from any thread. record() and thin() keep the newest
+    # version of recently saved pages in memory, so call them from one thread
+    # only (the app uses the database worker's writer, like BlockStore).
+    MAX_TIPS = 16
+
+    def __init__(self, db, max_tips=None):
+        self.db = db
+        self.max_tips = max_tips or self.MAX_TIPS
+        self.tips = OrderedDict()
+
+    def chain(self, conn, page_id, version_id=None):
+        # (id, created_at, kind, data) from the nearest keyframe up to version_id
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT max(id) FROM page_versions
+            WHERE page_id=? AND kind='key' AND id <= coalesce(?, id)
+        """, (page_id, version_id))
+        key_id = cursor.fetchone()[0]
+        if key_id is None:
+            return []
+        cursor.execute("""
+            SELECT id, created_at, kind, data FROM page_versions
+            WHERE page_id=? AND id >= ? AND id <= coalesce(?, id)
+            ORDER BY id
+        """, (page_id, key_id, version_id))
+        return cursor.fetchall()
+
+    def tip(self, conn, page_id):
+        tip = self.tips.get(page_id)
+        if tip is not None:
+            self.tips.move_to_end(page_id)
+            return tip
+        rows = self.chain(conn, page_id)
+        if not rows:
+            return None
+        text = None
+        for version_id, created_at, kind, data in rows:
+            text = decode(kind, data, text)
+        key_bytes = len(rows[0][3])
+        chain_bytes = sum(len(row[3]) for row in rows[1:])
+        tip = Tip(rows[-1][0], text, len(rows) - 1, chain_bytes, key_bytes)
+        self.remember(page_id, tip)
+        return tip
+
+    def remember(self, page_id, tip):
+        self.tips[page_id] = tip
+        self.tips.move_to_end(page_id)
+        while len(self.tips) > self.max_tips:
+            self.tips.popitem(last=False)
+
+    def forget(self, page_id):
+        self.tips.pop(page_id, None)
+
+    def has_versions(self, page_id):
+        if page_id in self.tips:
+            return True
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1 FROM page_versions WHERE page_id=? LIMIT 1", (page_id,))
+            return cursor.fetchone() is not None
+
+    def record(self, page_id, text, created_at=None):
+        # Returns the new version id, or None if text equals the newest version
+        text = text or ""
+        with self.db.writing() as conn:
+            try:
+                return self.append(conn.cursor(), page_id, text, created_at or datetime.now())
+            except Exception:
+                self.tips.pop(page_id, None)
+                raise
+
+    def append(self, cursor, page_id, text, created_at):
+        tip = self.tip(cursor.connection, page_id)
+        if tip is not None and tip.text == text:
+            return None
+        kind, data = self.encode(tip, text)
+        cursor.execute("""
+            INSERT INTO page_versions (page_id, created_at, kind, data, size)
+            VALUES (?, ?, ?, ?, ?)
+        """, (page_id, created_at, kind, data, len(text)))
+        version_id = cursor.lastrowid
+        if kind == "key":
+            self.remember(page_id, Tip(version_id, text, 0, 0, len(data)))
+            if tip is not None:
+                # A new keyframe is a good moment to drop old versions
+                self.thin_chain(cursor, page_id, datetime.now())
+        else:
+            self.remember(page_id, Tip(version_id, text, tip.chain_length + 1,
+                                       tip.chain_bytes + len(data), tip.key_bytes))
+        return version_id
+
+    @staticmethod
+    def encode(tip, text):
+        # (kind, data) for text following tip
+        if tip is None or tip.chain_length + 1 >= KEYFRAME_EVERY:
+            return "key", encode_text(text)
+        data = encode_diff(line_diff(tip.text, text))
+        if tip.chain_bytes + len(data) > tip.key_bytes * KEYFRAME_RATIO:
+            key = encode_text(text)
+            if len(key) <= len(data) or tip.chain_bytes + len(data) > tip.key_bytes:
+                return "key", key
+        return "diff", data
+
+    def versions(self, page_id):
+        # (version_id, created_at, size) newest first
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT id, created_at, size FROM page_versions
+                WHERE page_id=?
+                ORDER BY id DESC
+            """, (page_id,))
+            return cursor.fetchall()
+
+    def text(self, version_id):
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT page_id FROM page_versions WHERE id=?", (version_id,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            text = None
+            for _, created_at, kind, data in self.chain(conn, row[0], version_id):
+                text = decode(kind, data, text)
+            return text
+
+    def storage(self, page_id):
+        # (versions, stored bytes, bytes of every version stored in full)
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT count(*), coalesce(sum(length(data)), 0), coalesce(sum(size), 0)
+                FROM page_versions WHERE page_id=?
+            """, (page_id,))
+            return cursor.fetchone()
+
+    @staticmethod
+    def survivors(rows, now):
+        # Ids to keep out of (id, created_at) rows in id order; the newest
+        # version of each retention bucket survives, as does the newest overall
+        keep = set()
+        seen = set()
+        for version_id, created_at in reversed(rows):
+            if isinstance(created_at, str):
+                created_at = datetime.fromisoformat(created_at)
+            age = now - created_at
+            bucket = None
+            for tier, (limit, spacing) in enumerate(RETENTION):
+                if limit is None or age < limit:
+                    if spacing is not None:
+                        bucket = (tier, int((created_at - datetime.min) / spacing))
+                    break
+            if bucket is None or bucket not in seen:
+                keep.add(version_id)
+                if bucket is not None:
+                    seen.add(bucket)
+        if rows:
+            keep.add(rows[-1][0])
+        return keep
+
+    def thin(self, page_id, now=None):
+        # Returns the number of versions removed
+        with self.db.writing() as conn:
+            try:
+                return self.thin_chain(conn.cursor(), page_id, now or datetime.now())
+            except Exception:
+                self.tips.pop(page_id, None)
+                raise
+
+    def thin_chain(self, cursor, page_id, now):
+        cursor.execute("SELECT id, created_at, kind FROM page_versions WHERE page_id=? ORDER BY id", (page_id,))
+        rows = cursor.fetchall()
+        keep = self.survivors([(version_id, created_at) for version_id, created_at, kind in rows], now)
+        dropped = [row for row in rows if row[0] not in keep]
+        if not dropped:
+            return 0
+        # Versions before the keyframe preceding the first dropped one stay as they are
+        first = dropped[0][0]
+        start = max((index for index, (version_id, created_at, kind) in enumerate(rows)
+                     if kind == "key" and version_id <= first), default=0)
+        tip = None
+        text = None
+        for version_id, created_at, kind in rows[start:]:
+            cursor.execute("SELECT data FROM page_versions WHERE id=?", (version_id,))
+            text = decode(kind, cursor.fetchone()[0], text)
+            if version_id not in keep:
+                cursor.execute("DELETE FROM page_versions WHERE id=?", (version_id,))
+                continue
+            new_kind, data = self.encode(tip, text)
+            cursor.execute("UPDATE page_versions SET kind=?, data=? WHERE id=?", (new_kind, data, version_id))
+            if new_kind == "key":
+                tip = Tip(version_id, text, 0, 0, len(data))
+            else:
+                tip = Tip(version_id, text, tip.chain_length + 1, tip.chain_bytes + len(data), tip.key_bytes)
+        self.remember(page_id, tip)
+        return len(dropped)
@@ -0,0 +1,203 @@
+import sys
+import time
+from collections import OrderedDict, deque
+
+# Undo/redo history of the editor, kept per page.
+#
+# Steps are small reversible deltas, never copies of a page: a text step is
+# (position, removed text, inserted text) against the text recorded before
+# it. The only full copy of a page is the text of the page that is open,
+# which the next delta is computed against. Each page's history is a ring
+# buffer bounded in steps and in bytes; the oldest steps fall off first.
+# Text is recorded when the editor's autosave buffer flushes, so a burst of
+# typing becomes one step; bursts that continue each other are merged.
+
+# Scope of the steps that are not about one page, such as page moves
+TREE = "tree"
+
+
+class Step:
+    __slots__ = ("kind", "data", "size", "recorded_at")
+
+    def __init__(self, kind, data):
+        self.kind = kind
+        self.data = data
+        self.size = data_size(data)
+        self.recorded_at = time.monotonic()
+
+
+def data_size(data):
+    # Rough footprint in bytes
+    if isinstance(data, (tuple, list)):
+        return sys.getsizeof(data) + sum(data_size(item) for item in data)
+    return sys.getsizeof(data)
+
+
+def common_prefix(a, b):
+    # Binary search over slice comparisons, which run at memcmp speed
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[low:middle] == b[low:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def common_suffix(a, b, limit):
+    low, high = 0, limit
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[len(a) - middle:len(a) - low] == b[len(b) - middle:len(b) - low]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def text_delta(old, new):
+    # (position, removed, inserted) turning old into new, or None if equal
+    if old == new:
+        return None
+    start = common_prefix(old, new)
+    end = common_suffix(old, new, min(len(old), len(new)) - start)
+    return start, old[start:len(old) - end], new[start:len(new) - end]
+
+
+def merge_text(previous, delta):
+    # One delta doing both, if the second continues the first
+    position, removed, inserted = previous
+    new_position, new_removed, new_inserted = delta
+    if not removed and not new_removed and new_position == position + len(inserted):
+        return position, "", inserted + new_inserted
+    if not inserted and not new_inserted:
+        if new_position + len(new_removed) == position:
+            return new_position, new_removed + removed, ""
+        if new_position == position:
+            return position, removed + new_removed, ""
+    return None
+
+
+class PageHistory:
+    def __init__(self, max_bytes, max_steps):
+        self.max_bytes = max_bytes
+        self.undo_steps = deque()
+        self.redo_steps = []
+        self.total_bytes = 0
+        self.max_steps = max_steps
+
+    def push(self, step, merge_seconds):
+        for redone in self.redo_steps:
+            self.total_bytes -= redone.size
+        self.redo_steps = []
+        last = self.undo_steps[-1] if self.undo_steps else None
+        if (last is not None and last.kind == step.kind == "text"
+                and step.recorded_at - last.recorded_at <= merge_seconds):
+            merged = merge_text(last.data, step.data)
+            if merged is not None:
+                self.undo_steps.pop()
+                self.total_bytes -= last.size
+                step = Step("text", merged)
+        if step.size > self.max_bytes:
+            # Cannot be kept, and older steps would not apply without it
+            self.clear()
+            return False
+        self.undo_steps.append(step)
+        self.total_bytes += step.size
+        while self.undo_steps and (self.total_bytes > self.max_bytes or len(self.undo_steps) > self.max_steps):
+            self.total_bytes -= self.undo_steps.popleft().size
+        return True
+
+    def clear(self):
+        self.undo_steps.clear()
+        self.redo_steps = []
+        self.total_bytes = 0
+
+
+class UndoHistory:
+    MAX_BYTES_PER_PAGE = 1024 * 1024
+    MAX_STEPS = 500
+    MAX_PAGES = 32
+    MERGE_SECONDS = 5.0
+
+    def __init__(self, max_bytes_per_page=None, max_steps=None, max_pages=None, merge_seconds=None):
+        self.max_bytes_per_page = max_bytes_per_page or self.MAX_BYTES_PER_PAGE
+        self.max_steps = max_steps or self.MAX_STEPS
+        self.max_pages = max_pages or self.MAX_PAGES
+        self.merge_seconds = self.MERGE_SECONDS if merge_seconds is None else merge_seconds
+        self.histories = OrderedDict()
+        self.page_id = None
+        self.text = None
+
+    def history(self, scope, create=False):
+        history = self.histories.get(scope)
+        if history is None and create:
+            history = self.histories[scope] = PageHistory(self.max_bytes_per_page, self.max_steps)
+            # Pages not edited for a while lose their history first
+            while len(self.histories) > self.max_pages:
+                self.histories.popitem(last=False)
+        if history is not None:
+            self.histories.move_to_end(scope)
+        return history
+
+    def begin(self, page_id, text):
+        # Called when a page is shown in the editor, like AutosaveBuffer.begin
+        self.page_id = page_id
+        self.text = text or ""
+
+    def record_text(self, text):
+        # The text of the open page at a checkpoint; records what changed
+        if self.page_id is None:
+            return False
+        delta = text_delta(self.text, text)
+        self.text = text
+        if delta is None:
+            return False
+        return self.record(self.page_id, "text", delta)
+
+    def record(self, scope, kind, data):
+        return self.history(scope, create=True).push(Step(kind, data), self.merge_seconds)
+
+    def can_undo(self, scope):
+        history = self.histories.get(scope)
+        return bool(history and history.undo_steps)
+
+    def can_redo(self, scope):
+        history = self.histories.get(scope)
+        return bool(history and history.redo_steps)
+
+    def undo(self, scope):
+        # The step to reverse, now on the redo stack
+        history = self.history(scope)
+        if history is None or not history.undo_steps:
+            return None
+        step = history.undo_steps.pop()
+        history.redo_steps.append(step)
+        return step
+
+    def redo(self, scope):
+        history = self.history(scope)
+        if history is None or not history.redo_steps:
+            return None
+        step = history.redo_steps.pop()
+        history.undo_steps.append(step)
+        # Redone steps are never merged with what gets typed next
+        step.recorded_at = float("-inf")
+        return step
+
+    def apply_text(self, step, reverse):
+        # (start, end, replacement) to apply to the editor, or None when the
+        # open text no longer matches the step, which drops the page's history
+        position, removed, inserted = step.data
+        if reverse:
+            removed, inserted = inserted, removed
+        end = position + len(removed)
+        if self.text[position:end] != removed:
+            self.forget(self.page_id)
+            return None
+        self.text = self.text[:position] + inserted + self.text[end:]
+        return position, end, inserted
+
+    def forget(self, scope):
+        self.histories.pop(scope, None)
@@ -0,0 +1,128 @@
+import difflib
+import html
+
+import wx
+import wx.html
+
+# Diff tables are kept readable on large pages by showing only the changed
+# lines and this many lines of context around them
+CONTEXT_LINES = 3
+DIFF_STYLE = """
+<style>
+table.diff {font-family: monospace; border-collapse: collapse}
+.diff_header {background-color: #e0e0e0}
+td.diff_header {text-align: right}
+.diff_next {background-color: #c0c0c0}
+.diff_add {background-color: #aaffaa}
+.diff_chg {background-color: #ffff77}
+.diff_sub {background-color: #ffaaaa}
+</style>
+"""
+
+
+def diff_html(old, new, old_label, new_label):
+    # Side-by-side table of two page texts
+    if old == new:
+        return "<p>No differences.</p>"
+    table = difflib.HtmlDiff(wrapcolumn=70).make_table(
+        old.splitlines(), new.splitlines(), html.escape(old_label), html.escape(new_label),
+        context=True, numlines=CONTEXT_LINES)
+    return "<html><head>" + DIFF_STYLE + "</head><body>" + table + "</body></html>"
+
+
+class VersionHistoryDialog(wx.Dialog):
+    # Saved versions of the open page, newest first, each shown side by side
+    # with the text in the editor. Versions are read and diffed on the
+    # database worker. Restore puts the version into the editor, where it is
+    # saved and can be undone like any other edit.
+    def __init__(self, parent, page_id, title):
+        super(VersionHistoryDialog, self).__init__(
+            parent, title=f"History of {title}", size=(1000, 650),
+            style=wx.DEFAULT_DIALOG_STYLE | wx.RESIZE_BORDER)
+        self.parent = parent
+        self.page_id = page_id
+        self.versions = []
+        self.selected_text = None
+        self.init_ui()
+        self.Bind(wx.EVT_WINDOW_DESTROY, self.on_destroy)
+        # Waits for the save of what was typed just before opening the dialog
+        parent.worker.submit(lambda db: parent.pages.versions.versions(page_id),
+                             self.on_versions_loaded, key="version list", after_writes=True)
+
+    def init_ui(self):
+        panel = wx.Panel(self)
+        vbox = wx.BoxSizer(wx.VERTICAL)
+
+        splitter = wx.SplitterWindow(panel, style=wx.SP_LIVE_UPDATE)
+        self.version_list = wx.ListBox(splitter, style=wx.LB_SINGLE)
+        self.version_list.Bind(wx.EVT_LISTBOX, self.on_select_version)
+        self.diff_view = wx.html.HtmlWindow(splitter)
+        self.diff_view.SetPage("<p>Loading versions…</p>")
+        splitter.SplitVertically(self.version_list, self.diff_view, 220)
+        splitter.SetMinimumPaneSize(150)
+        vbox.Add(splitter, 1, wx.ALL | wx.EXPAND, 5)
+
+        button_box = wx.BoxSizer(wx.HORIZONTAL)
+        self.restore_button = wx.Button(panel, label="Restore")
+        self.restore_button.Disable()
+        close_button = wx.Button(panel, wx.ID_CLOSE, label="Close")
+        self.restore_button.Bind(wx.EVT_BUTTON, self.on_restore)
+        close_button.Bind(wx.EVT_BUTTON, self.on_close)
+        button_box.Add(self.restore_button, 0, wx.RIGHT, 5)
+        button_box.Add(close_button, 0)
+        vbox.Add(button_box, 0, wx.ALL | wx.ALIGN_RIGHT, 5)
+
+        panel.SetSizer(vbox)
+
+    def on_versions_loaded(self, versions):
+        if not self:
+            return
+        self.versions = versions
+        self.version_list.Set([f"{str(created_at)[:19]}  ({size} chars)"
+                               for version_id, created_at, size in versions])
+        if versions:
+            self.version_list.SetSelection(0)
+            self.show_version(0)
+        else:
+            self.diff_view.SetPage("<p>This page has no saved versions yet.</p>")
+
+    def on_select_version(self, event):
+        self.show_version(event.GetSelection())
+
+    def show_version(self, index):
+        version_id, created_at, size = self.versions[index]
+        current = self.parent.content_text.GetValue()
+        versions = self.parent.pages.versions
+        self.selected_text = None
+        self.restore_button.Disable()
+        self.diff_view.SetPage("<p>Loading…</p>")
+
+        def load(db):
+            text = versions.text(version_id)
+            return text, diff_html(text, current, f"Version of {str(created_at)[:19]}", "Current text")
+
+        # Clicking through the list supersedes the version still loading
+        self.parent.worker.submit(load, self.on_version_loaded, key="version diff")
+
+    def on_version_loaded(self, result):
+        if not self:
+            return
+        text, page = result
+        self.selected_text = text
+        self.diff_view.SetPage(page)
+        self.restore_button.Enable(text != self.parent.content_text.GetValue())
+
+    def on_restore(self, event):
+        if self.selected_text is None or self.parent.current_page != self.page_id:
+            return
+        self.parent.restore_text(self.selected_text)
+        self.EndModal(wx.ID_OK)
+
+    def on_close(self, event):
+        self.EndModal(wx.ID_CLOSE)
+
+    def on_destroy(self, event):
+        if event.GetEventObject() is self:
+            self.parent.worker.cancel("version list")
+            self.parent.worker.cancel("version diff")
+        event.Skip()
@@ -0,0 +1,121 @@
+import re
+import string
+
+from page_bodies import ARCHIVE, archive_attached, decode_body
+
+# [[Page Title]] links between pages, and [[Page Title|label]] with a label.
+#
+# page_links has a row per page and link target. It is kept in step with the
+# text incrementally: a save compares the links of the new text with the
+# rows of that page and writes only the difference, so no other page is
+# ever parsed. A link goes to the oldest page of the same user with that
+# title, compared without regard to ASCII case (the NOCASE collation of
+# target_title), or has no target_id until such a page exists. Triggers on
+# pages resolve links again when pages are created, renamed or deleted.
+
+WIKI_LINK_RE = re.compile(r"\[\[([^\[\]|\n]+)(?:\|([^\[\]\n]+))?\]\]")
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+# The page a link to a title goes to
+RESOLVE_SQL = "SELECT id FROM pages WHERE user_id = ? AND title = ? COLLATE NOCASE ORDER BY id LIMIT 1"
+
+
+def link_key(title):
+    # Titles with the same key are the same link target, as in NOCASE
+    return title.strip().translate(_ASCII_LOWER)
+
+
+def wiki_links(text):
+    # Titles of the links in text, in order, without repeats
+    titles = {}
+    for match in WIKI_LINK_RE.finditer(text or ""):
+        title = match.group(1).strip()
+        if title:
+            titles.setdefault(link_key(title), title)
+    return list(titles.values())
+
+
+def linkable(title):
+    # Whether [[title]] is a link to the title
+    title = title.strip()
+    return bool(title) and WIKI_LINK_RE.fullmatch(f"[[{title}]]") is not None
+
+
+def rewrite_links(text, old_title, new_title):
+    # text with the links to old_title going to new_title; labels are kept
+    key = link_key(old_title)
+    new_title = new_title.strip()
+
+    def replace(match):
+        if link_key(match.group(1)) != key:
+            return match.group(0)
+        if match.group(2) is None:
+            return f"[[{new_title}]]"
+        return f"[[{new_title}|{match.group(2)}]]"
+
+    return WIKI_LINK_RE.sub(replace, text)
+
+
+def update_links(cursor, page_id, text):
+    # Brings the links of a page in line with its text; returns the number
+    # of rows written
+    cursor.execute("SELECT target_title FROM page_links WHERE source_id=?", (page_id,))
+    stored = {link_key(row[0]): row[0] for row in cursor.fetchall()}
+    if not stored and "[[" not in text:
+        return 0
+    titles = {link_key(title): title for title in wiki_links(text)}
+    removed = [(page_id, stored[key]) for key in stored.keys() - titles.keys()]
+    added = [titles[key] for key in titles.keys() - stored.keys()]
+    cursor.executemany("DELETE FROM page_links WHERE source_id=? AND target_title=?", removed)
+    if added:
+        cursor.execute("SELECT user_id FROM pages WHERE id=?", (page_id,))
+        user_id = cursor.fetchone()[0]
+        cursor.executemany(f"""
+            INSERT INTO page_links (source_id, user_id, target_title, target_id)
+            VALUES (?, ?, ?, ({RESOLVE_SQL}))
+        """, [(page_id, user_id, title, user_id, title) for title in added])
+    return len(removed) + len(added)
+
+
+def copy_links(cursor, old_page_id, new_page_id):
+    # Links of a duplicated page, which has the same text
+    cursor.execute("""
+        INSERT INTO page_links (source_id, user_id, target_title, target_id)
+        SELECT ?, user_id, target_title, target_id FROM page_links WHERE source_id=?
+    """, (new_page_id, old_page_id))
+
+
+def linked_texts(cursor):
+    # {page_id: text} of the pages whose stored text has a link, read without
+    # putting pages together block by block. Cold bodies are only read if
+    # the archive database is attached.
+    texts = {}
+    cursor.execute("SELECT id, content FROM pages WHERE content LIKE '%[[%'")
+    for page_id, content in cursor.fetchall():
+        texts[page_id] = [content]
+    # Links never span lines, so the order of the blocks does not matter
+    cursor.execute("SELECT page_id, content FROM blocks WHERE type != 'row' AND content LIKE '%[[%'")
+    for page_id, content in cursor:
+        texts.setdefault(page_id, []).append(content)
+    cursor.execute("SELECT page_id, data FROM page_bodies WHERE data IS NOT NULL")
+    bodies = cursor.fetchall()
+    if archive_attached(cursor.connection):
+        cursor.execute(f"""
+            SELECT a.page_id, a.data FROM {ARCHIVE}.page_bodies a
+            JOIN main.page_bodies b ON b.page_id = a.page_id AND b.tier = 'cold'
+        """)
+        bodies.extend(cursor.fetchall())
+    for page_id, data in bodies:
+        text = decode_body(data)
+        if "[[" in text:
+            texts.setdefault(page_id, []).append(text)
+    return {page_id: "\n".join(parts) for page_id, parts in texts.items()}
+
+
+def rebuild_links(cursor):
+    # page_links from scratch; returns the number of links
+    cursor.execute("DELETE FROM page_links")
+    for page_id, text in linked_texts(cursor).items():
+        update_links(cursor, page_id, text)
+    cursor.execute("SELECT count(*) FROM page_links")
+    return cursor.fetchone()[0]